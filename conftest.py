@@ -0,0 +1 @@
+# raíz del repositorio en sys.path para que las pruebas de tests/ importen langton y el visor
@@ -1,646 +1,1379 @@
-import os
-import sys
-import time
-import pygame
-import numpy as np
-
-# ---------------- Inicialización ----------------
-pygame.init()
-pygame.font.init()
-
-# ---------------- Config & Colores ----------------
-BLACK = (12, 14, 20)
-WHITE = (240, 244, 248)
-PANEL_BG = (28, 36, 48)
-PANEL_ACCENT = (72, 148, 200)
-ACCENT = (245, 200, 80)
-BTN_BG = (36, 46, 60)
-BTN_BORDER = (120, 130, 140)
-GRID_BG = (18, 22, 30)
-GRID_LINE = (40, 48, 60)
-CELL_COLOR = (100, 220, 160)
-ANT_COLOR = (255, 140, 60)
-HELP_BG = (30, 30, 40)
-
-BASE_CELL_SIZE = 8
-GRID_W = 120
-GRID_H = 100
-ZOOM_LEVELS = [0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 3.0]
-FPS = 60
-
-# Fuentes
-TITLE_FONT = pygame.font.SysFont('Segoe UI', 26, bold=True)
-MED_FONT = pygame.font.SysFont('Segoe UI', 16, bold=True)
-SMALL_FONT = pygame.font.SysFont('Segoe UI', 15)
-
-# Ruta de la imagen subida (se usará si existe)
-LOGO_PATH = "/mnt/data/cb1011a1-b921-4581-af88-8ceb1fc72800.png"
-
-# ---------------- Clase principal ----------------
-class LangtonsAntApp:
-    def __init__(self, window_size=(1300, 820)):
-        self.window_w, self.window_h = window_size
-        self.screen = pygame.display.set_mode((self.window_w, self.window_h), pygame.RESIZABLE)
-        pygame.display.set_caption("Hormiga de Langton - Viewport (Clip)")
-
-        # Estado lógico
-        self.grid = np.zeros((GRID_H, GRID_W), dtype=np.uint8)
-        self.ant = {'x': GRID_W // 2, 'y': GRID_H // 2, 'dir': 0}
-        self.is_running = False
-        self.speed = 5  # 1..10
-        self.steps = 0
-
-        # Zoom & cell size
-        self.zoom_idx = 2  # start at 1.0
-        self.cell_size = max(1, int(BASE_CELL_SIZE * ZOOM_LEVELS[self.zoom_idx]))
-
-        # Canvas overall pixel size
-        self.canvas_w = GRID_W * self.cell_size
-        self.canvas_h = GRID_H * self.cell_size
-
-        # Pan / drag
-        self.pan_x = 0
-        self.pan_y = 0
-        self.dragging = False
-        self.last_drag_pos = None
-
-        # Timing
-        self.last_update = time.time()
-
-        # Buttons rects (recalculated every draw)
-        self.buttons = {}
-
-        # Optional logo
-        self.logo = None
-        if os.path.exists(LOGO_PATH):
-            try:
-                img = pygame.image.load(LOGO_PATH)
-                maxw = 240
-                scale = maxw / img.get_width()
-                new_h = int(img.get_height() * scale)
-                self.logo = pygame.transform.smoothscale(img, (maxw, new_h))
-            except Exception:
-                self.logo = None
-
-    # ---------------- Utilidades ----------------
-    def controls_width(self):
-        # Panel lateral responsivo: ocupa ~28% ancho, mínimo 300, máximo 420
-        w = int(self.window_w * 0.28)
-        return max(300, min(420, w))
-
-    def update_sizes(self):
-        self.cell_size = max(1, int(BASE_CELL_SIZE * ZOOM_LEVELS[self.zoom_idx]))
-        self.canvas_w = GRID_W * self.cell_size
-        self.canvas_h = GRID_H * self.cell_size
-        self.limit_pan()
-
-    def limit_pan(self):
-        view_w = self.window_w - self.controls_width()
-        view_h = self.window_h
-        min_x = min(0, view_w - self.canvas_w - 20)
-        max_x = 20
-        min_y = min(0, view_h - self.canvas_h - 20)
-        max_y = 20
-        self.pan_x = max(min(self.pan_x, max_x), min_x)
-        self.pan_y = max(min(self.pan_y, max_y), min_y)
-
-    # ---------------- Reglas ----------------
-    def move_ant_step(self):
-        x, y = self.ant['x'], self.ant['y']
-        if self.grid[y, x] == 0:
-            self.ant['dir'] = (self.ant['dir'] + 1) % 4
-            self.grid[y, x] = 1
-        else:
-            self.ant['dir'] = (self.ant['dir'] - 1) % 4
-            self.grid[y, x] = 0
-
-        # avanzar con wrap-around
-        if self.ant['dir'] == 0:
-            self.ant['y'] = (self.ant['y'] - 1) % GRID_H
-        elif self.ant['dir'] == 1:
-            self.ant['x'] = (self.ant['x'] + 1) % GRID_W
-        elif self.ant['dir'] == 2:
-            self.ant['y'] = (self.ant['y'] + 1) % GRID_H
-        else:
-            self.ant['x'] = (self.ant['x'] - 1) % GRID_W
-
-    # ---------------- Coordenadas ----------------
-    def screen_to_grid(self, sx, sy):
-        # canvas origin = (20 + pan_x, 20 + pan_y)
-        canvas_x = 20 + int(self.pan_x)
-        canvas_y = 20 + int(self.pan_y)
-        gx = (sx - canvas_x) // self.cell_size
-        gy = (sy - canvas_y) // self.cell_size
-        return int(gx), int(gy)
-
-    # ---------------- Zoom (centrado) ----------------
-    def zoom_at(self, screen_pos, zoom_in=True):
-        old_cell_size = self.cell_size
-        old_idx = self.zoom_idx
-        if zoom_in and self.zoom_idx < len(ZOOM_LEVELS) - 1:
-            self.zoom_idx += 1
-        elif not zoom_in and self.zoom_idx > 0:
-            self.zoom_idx -= 1
-        if self.zoom_idx == old_idx:
-            return
-        self.update_sizes()
-        sx, sy = screen_pos
-        # ajustar pan para mantener la celda bajo el mouse
-        canvas_x = 20 + self.pan_x
-        canvas_y = 20 + self.pan_y
-        rel_x = sx - canvas_x
-        rel_y = sy - canvas_y
-        if rel_x < 0 or rel_y < 0:
-            return
-        cell_x = rel_x / old_cell_size
-        cell_y = rel_y / old_cell_size
-        new_rel_x = cell_x * self.cell_size
-        new_rel_y = cell_y * self.cell_size
-        self.pan_x += (rel_x - new_rel_x)
-        self.pan_y += (rel_y - new_rel_y)
-        self.limit_pan()
-
-    # ---------------- Dibujo de la hormiga ----------------
-    def draw_ant_icon(self, surface, cell_x, cell_y, cs):
-        center_x = cell_x * cs + cs // 2
-        center_y = cell_y * cs + cs // 2
-        size = max(2, cs // 2)
-        if self.ant['dir'] == 0:
-            pts = [(center_x, center_y - size), (center_x - size, center_y + size), (center_x + size, center_y + size)]
-        elif self.ant['dir'] == 1:
-            pts = [(center_x + size, center_y), (center_x - size, center_y - size), (center_x - size, center_y + size)]
-        elif self.ant['dir'] == 2:
-            pts = [(center_x, center_y + size), (center_x - size, center_y - size), (center_x + size, center_y - size)]
-        else:
-            pts = [(center_x - size, center_y), (center_x + size, center_y - size), (center_x + size, center_y + size)]
-        pygame.draw.polygon(surface, ANT_COLOR, pts)
-
-    # ---------------- Dibujar UI ----------------
-    def draw(self):
-        # fondo
-        self.screen.fill(BLACK)
-
-        cw = self.controls_width()
-        panel_rect = pygame.Rect(self.window_w - cw, 0, cw, self.window_h)
-
-        # area del canvas (izquierda). OPCIÓN A: recorte lateral solamente
-        canvas_area_rect = pygame.Rect(0, 0, self.window_w - cw, self.window_h)
-        pygame.draw.rect(self.screen, GRID_BG, canvas_area_rect)
-
-        # actualizar tamaños según zoom
-        self.update_sizes()
-
-        # crear surface para el canvas (rendera la totalidad pero será recortado por set_clip)
-        # NOTA: usar tamaño del canvas lógico puede ser grande; aquí lo creamos con canvas_w/canvas_h
-        canvas_surf = pygame.Surface((self.canvas_w, self.canvas_h))
-        canvas_surf.fill(GRID_BG)
-
-        cs = self.cell_size
-        # dibujar celdas vivas
-        if cs >= 2:
-            ys, xs = np.where(self.grid == 1)
-            for yy, xx in zip(ys, xs):
-                rect = pygame.Rect(xx * cs, yy * cs, cs, cs)
-                pygame.draw.rect(canvas_surf, CELL_COLOR, rect)
-        else:
-            ys, xs = np.where(self.grid == 1)
-            for yy, xx in zip(ys, xs):
-                canvas_surf.set_at((xx, yy), CELL_COLOR)
-
-        # dibujar hormiga encima del canvas surface
-        self.draw_ant_icon(canvas_surf, self.ant['x'], self.ant['y'], cs)
-
-        # BLIT del canvas en la pantalla con pan y margen de 20px
-        canvas_pos = (20 + int(self.pan_x), 20 + int(self.pan_y))
-
-        # USAR CLIP: fijamos el clip al área del canvas (no invade el panel derecho)
-        self.screen.set_clip(canvas_area_rect)
-
-        # dibujar el canvas dentro del clipado (si el canvas_surf es más grande que la ventana,
-        # blit se recorta automáticamente gracias al clip)
-        try:
-            self.screen.blit(canvas_surf, canvas_pos)
-        except Exception:
-            # en caso de que canvas_surf sea demasiado grande en algunas plataformas, escalar temporalmente
-            scaled_w = min(canvas_surf.get_width(), canvas_area_rect.width - 40)
-            scaled_h = min(canvas_surf.get_height(), canvas_area_rect.height - 40)
-            temp = pygame.transform.smoothscale(canvas_surf, (max(1, scaled_w), max(1, scaled_h)))
-            self.screen.blit(temp, canvas_pos)
-
-        # dibujar marco de visualización (solo sobre la parte visible)
-        visible_w = min(self.canvas_w, canvas_area_rect.width - 40)
-        visible_h = min(self.canvas_h, canvas_area_rect.height - 40)
-        border_rect = pygame.Rect(canvas_pos[0] - 2, canvas_pos[1] - 2, visible_w + 4, visible_h + 4)
-
-        # desactivar clip — ahora el panel se dibujará encima
-        self.screen.set_clip(None)
-
-        # dibujar panel lateral (siempre encima)
-        self.draw_panel(panel_rect)
-
-        # swap buffers
-        pygame.display.flip()
-
-    def draw_panel(self, panel_rect):
-        # fondo del panel
-        pygame.draw.rect(self.screen, PANEL_BG, panel_rect)
-
-        # título
-        title = TITLE_FONT.render("Hormiga de Langton", True, WHITE)
-        self.screen.blit(title, (panel_rect.x + 18, 18))
-
-        # logo si existe
-        y_offset = 60
-        if self.logo:
-            self.screen.blit(self.logo, (panel_rect.x + 18, y_offset))
-            y_offset += self.logo.get_height() + 8
-
-        # indicador de zoom debajo del título
-        zoom_text = MED_FONT.render(f"Zoom: {ZOOM_LEVELS[self.zoom_idx]:.2f}x", True, PANEL_ACCENT)
-        self.screen.blit(zoom_text, (panel_rect.x + 18, y_offset))
-        y_offset += 36
-
-        # botones (dibujados como rects; manejados por self.buttons)
-        margin_x = panel_rect.x + 18
-        cur_y = y_offset
-        bw = panel_rect.w - 36
-        bh = 38
-        gap = 10
-
-        # Play / Pause
-        b_play = pygame.Rect(margin_x, cur_y, bw // 2 - 6, bh)
-        b_pause = pygame.Rect(margin_x + bw // 2 + 6, cur_y, bw // 2 - 6, bh)
-        self.draw_button(self.screen, b_play, "Play", icon_type='play')
-        self.draw_button(self.screen, b_pause, "Pause", icon_type='pause')
-        cur_y += bh + gap
-
-        # Step / Reset
-        b_step = pygame.Rect(margin_x, cur_y, bw // 2 - 6, bh)
-        b_reset = pygame.Rect(margin_x + bw // 2 + 6, cur_y, bw // 2 - 6, bh)
-        self.draw_button(self.screen, b_step, "Step", icon_type='step')
-        self.draw_button(self.screen, b_reset, "Reset", icon_type='reset')
-        cur_y += bh + gap
-
-        # Zoom in/out
-        z_label = SMALL_FONT.render("Zoom", True, WHITE)
-        self.screen.blit(z_label, (margin_x, cur_y))
-        cur_y += 22
-        b_zoom_in = pygame.Rect(margin_x, cur_y, bw // 2 - 6, bh)
-        b_zoom_out = pygame.Rect(margin_x + bw // 2 + 6, cur_y, bw // 2 - 6, bh)
-        self.draw_button(self.screen, b_zoom_in, "+", icon_type='zoom_in')
-        self.draw_button(self.screen, b_zoom_out, "-", icon_type='zoom_out')
-        cur_y += bh + gap
-
-        # Speed
-        s_label = SMALL_FONT.render("Velocidad", True, WHITE)
-        self.screen.blit(s_label, (margin_x, cur_y))
-        cur_y += 22
-        b_faster = pygame.Rect(margin_x, cur_y, bw // 2 - 6, bh)
-        b_slower = pygame.Rect(margin_x + bw // 2 + 6, cur_y, bw // 2 - 6, bh)
-        self.draw_button(self.screen, b_faster, "Más rápido", icon_type='faster')
-        self.draw_button(self.screen, b_slower, "Más lento", icon_type='slower')
-        cur_y += bh + gap
-
-        # Stats boxes
-        sb_h = 64
-        sb_w = (bw - gap) // 2
-        sbox1 = pygame.Rect(margin_x, cur_y, sb_w, sb_h)
-        sbox2 = pygame.Rect(margin_x + sb_w + gap, cur_y, sb_w, sb_h)
-        pygame.draw.rect(self.screen, PANEL_ACCENT, sbox1, border_radius=8)
-        pygame.draw.rect(self.screen, PANEL_ACCENT, sbox2, border_radius=8)
-        steps_text = MED_FONT.render(f"{self.steps:,}", True, ACCENT)
-        self.screen.blit(steps_text, (sbox1.x + (sbox1.w - steps_text.get_width()) // 2, sbox1.y + 10))
-        steps_label = SMALL_FONT.render("Pasos", True, WHITE)
-        self.screen.blit(steps_label, (sbox1.x + (sbox1.w - steps_label.get_width()) // 2, sbox1.y + 38))
-        speed_text = MED_FONT.render(f"{self.speed}/10", True, ACCENT)
-        self.screen.blit(speed_text, (sbox2.x + (sbox2.w - speed_text.get_width()) // 2, sbox2.y + 10))
-        speed_label = SMALL_FONT.render("Velocidad", True, WHITE)
-        self.screen.blit(speed_label, (sbox2.x + (sbox2.w - speed_label.get_width()) // 2, sbox2.y + 38))
-        cur_y += sb_h + gap
-
-        # Estado y dirección
-        st_label = SMALL_FONT.render("Estado: " + ("EJECUTANDO" if self.is_running else "PAUSADO"), True, WHITE)
-        self.screen.blit(st_label, (margin_x, cur_y))
-        dir_names = ["NORTE", "ESTE", "SUR", "OESTE"]
-        dir_label = SMALL_FONT.render("Dirección: " + dir_names[self.ant['dir']], True, WHITE)
-        self.screen.blit(dir_label, (margin_x, cur_y + 20))
-        cur_y += 48
-
-        # Fase actual
-        fase = self.get_phase()
-        fase_label = SMALL_FONT.render("Fase: " + fase, True, ACCENT)
-        self.screen.blit(fase_label, (margin_x, cur_y))
-        cur_y += 36
-
-        # Help button abajo
-        bh2 = 40
-        b_help = pygame.Rect(margin_x, panel_rect.h - bh2 - 20, bw, bh2)
-        self.draw_button(self.screen, b_help, "Ver explicación y reglas")
-        # registrar botones para manejo de clics
-        self.buttons = {
-            'play': b_play, 'pause': b_pause, 'step': b_step, 'reset': b_reset,
-            'zoom_in': b_zoom_in, 'zoom_out': b_zoom_out, 'faster': b_faster, 'slower': b_slower,
-            'help': b_help
-        }
-
-    def draw_button(self, surface, rect, label, icon_type=None):
-        pygame.draw.rect(surface, BTN_BG, rect, border_radius=8)
-        pygame.draw.rect(surface, BTN_BORDER, rect, 2, border_radius=8)
-        if icon_type:
-            ix = rect.x + 10
-            cy = rect.y + rect.h // 2
-            if icon_type == 'play':
-                pts = [(ix, cy - 8), (ix, cy + 8), (ix + 14, cy)]
-                pygame.draw.polygon(surface, ACCENT, pts)
-            elif icon_type == 'pause':
-                pygame.draw.rect(surface, ACCENT, (ix, cy - 8, 5, 16))
-                pygame.draw.rect(surface, ACCENT, (ix + 8, cy - 8, 5, 16))
-            elif icon_type == 'step':
-                pygame.draw.polygon(surface, ACCENT, [(ix, cy - 8), (ix, cy + 8), (ix + 10, cy)])
-                pygame.draw.rect(surface, ACCENT, (ix + 12, cy - 10, 2, 20))
-            elif icon_type == 'reset':
-                pygame.draw.circle(surface, ACCENT, (ix + 8, cy), 9, 2)
-                pygame.draw.polygon(surface, ACCENT, [(ix + 8, cy - 9), (ix + 8, cy - 3), (ix + 12, cy - 3)])
-            elif icon_type == 'zoom_in':
-                pygame.draw.circle(surface, ACCENT, (ix + 8, cy), 7, 2)
-                pygame.draw.line(surface, ACCENT, (ix + 8, cy - 3), (ix + 8, cy + 3), 2)
-                pygame.draw.line(surface, ACCENT, (ix + 5, cy), (ix + 11, cy), 2)
-            elif icon_type == 'zoom_out':
-                pygame.draw.circle(surface, ACCENT, (ix + 8, cy), 7, 2)
-                pygame.draw.line(surface, ACCENT, (ix + 5, cy), (ix + 11, cy), 2)
-            elif icon_type == 'faster':
-                pygame.draw.polygon(surface, ACCENT, [(ix, cy+8), (ix+10, cy), (ix, cy-8)])
-                pygame.draw.polygon(surface, ACCENT, [(ix+8, cy+8), (ix+18, cy), (ix+8, cy-8)])
-            elif icon_type == 'slower':
-                pygame.draw.polygon(surface, ACCENT, [(ix+18, cy+8), (ix+8, cy), (ix+18, cy-8)])
-            text_surf = SMALL_FONT.render(label, True, WHITE)
-            surface.blit(text_surf, (rect.x + 44, rect.y + (rect.h - text_surf.get_height()) // 2))
-        else:
-            text_surf = SMALL_FONT.render(label, True, WHITE)
-            surface.blit(text_surf, (rect.x + (rect.w - text_surf.get_width()) // 2,
-                                     rect.y + (rect.h - text_surf.get_height()) // 2))
-
-    def get_phase(self):
-        if self.steps < 500:
-            return "CAÓTICA"
-        elif self.steps < 10000:
-            return "REPETITIVA"
-        else:
-            return "CARRERA ESTABLE"
-
-    # ---------------- Eventos ----------------
-    def handle_event(self, event):
-        if event.type == pygame.QUIT:
-            pygame.quit()
-            sys.exit()
-
-        elif event.type == pygame.VIDEORESIZE:
-            self.window_w, self.window_h = event.w, event.h
-            self.screen = pygame.display.set_mode((self.window_w, self.window_h), pygame.RESIZABLE)
-            self.limit_pan()
-
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            if event.button == 1:  # click izquierdo
-                mx, my = event.pos
-                # comprobar botones en panel
-                for name, rect in self.buttons.items():
-                    if rect.collidepoint(mx, my):
-                        self.handle_action(name)
-                        return
-                # si clic en canvas, alternar celda
-                if mx < self.window_w - self.controls_width():
-                    gx, gy = self.screen_to_grid(mx, my)
-                    if 0 <= gx < GRID_W and 0 <= gy < GRID_H:
-                        self.grid[gy, gx] ^= 1
-            elif event.button == 3:  # click derecho -> comenzar drag pan
-                self.dragging = True
-                self.last_drag_pos = event.pos
-            # ruedas (compatibilidad)
-            elif event.button == 4:  # rueda arriba
-                self.zoom_at(event.pos, zoom_in=True)
-            elif event.button == 5:  # rueda abajo
-                self.zoom_at(event.pos, zoom_in=False)
-
-        elif event.type == pygame.MOUSEBUTTONUP:
-            if event.button == 3:
-                self.dragging = False
-                self.last_drag_pos = None
-
-        elif event.type == pygame.MOUSEMOTION and self.dragging:
-            x, y = event.pos
-            lx, ly = self.last_drag_pos
-            dx, dy = x - lx, y - ly
-            self.pan_x += dx
-            self.pan_y += dy
-            self.limit_pan()
-            self.last_drag_pos = (x, y)
-
-        elif event.type == pygame.MOUSEWHEEL:
-            # evento moderno de rueda
-            mx, my = pygame.mouse.get_pos()
-            if mx < self.window_w - self.controls_width():
-                if event.y > 0:
-                    self.zoom_at((mx, my), zoom_in=True)
-                else:
-                    self.zoom_at((mx, my), zoom_in=False)
-
-        elif event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_SPACE:
-                self.is_running = not self.is_running
-            elif event.key == pygame.K_RIGHT:
-                self.move_ant_step()
-                self.steps += 1
-            elif event.key == pygame.K_r:
-                self.reset()
-            elif event.key == pygame.K_h:
-                # mostrar modal de ayuda (bloqueante)
-                self.display_help_modal()
-            elif event.key == pygame.K_EQUALS or event.key == pygame.K_PLUS:
-                self.speed = min(10, self.speed + 1)
-            elif event.key == pygame.K_MINUS or event.key == pygame.K_UNDERSCORE:
-                self.speed = max(1, self.speed - 1)
-
-    def handle_action(self, name):
-        if name == 'play':
-            self.is_running = True
-        elif name == 'pause':
-            self.is_running = False
-        elif name == 'step':
-            self.move_ant_step()
-            self.steps += 1
-        elif name == 'reset':
-            self.reset()
-        elif name == 'zoom_in':
-            self.zoom_at((self.window_w // 2, self.window_h // 2), zoom_in=True)
-        elif name == 'zoom_out':
-            self.zoom_at((self.window_w // 2, self.window_h // 2), zoom_in=False)
-        elif name == 'faster':
-            self.speed = min(10, self.speed + 1)
-        elif name == 'slower':
-            self.speed = max(1, self.speed - 1)
-        elif name == 'help':
-            self.display_help_modal()
-
-    def display_help_modal(self):
-        # Tamaño del modal
-        modal_w = min(self.window_w - 160, 820)
-        modal_h = min(self.window_h - 160, 640)
-
-        # Fondo oscuro semitransparente
-        overlay = pygame.Surface((self.window_w, self.window_h), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))
-
-        # --- COLOR ÚNICO PARA EL MODAL ---
-        MODAL_COLOR = (38, 38, 48)          # fondo
-        CONTENT_COLOR = (48, 48, 60)        # contenido scrollable
-        BORDER_COLOR = (180, 180, 200)      # borde
-
-        # Crear modal
-        modal = pygame.Surface((modal_w, modal_h))
-        modal.fill(MODAL_COLOR)
-        pygame.draw.rect(modal, BORDER_COLOR, modal.get_rect(), 3, border_radius=12)
-
-        padding = 24
-        inner_w = modal_w - padding * 2
-        inner_h = modal_h - padding * 2
-
-        # Área scrollable
-        content = pygame.Surface((inner_w, 2000))  # lo ajustaremos luego
-        content.fill(CONTENT_COLOR)
-
-        # Textos
-        L = [
-            "HORMIGA DE LANGTON",
-            "",
-            "¿Qué es?",
-            "La Hormiga de Langton es un autómata celular bidimensional",
-            "con reglas simples pero comportamiento complejo emergente.",
-            "Fue creada por Chris Langton en 1986.",
-            "",
-            "Reglas simples:",
-            "• Celda BLANCA → gira 90° a la DERECHA, se vuelve NEGRA y avanza.",
-            "• Celda NEGRA → gira 90° a la IZQUIERDA, se vuelve BLANCA y avanza.",
-            "",
-            "Comportamiento emergente:",
-            "• 0–500 pasos → Fase CAÓTICA.",
-            "• 500–10,000 pasos → Fase de patrones repetitivos.",
-            "• >10,000 pasos → Fase de “autopista” estable.",
-            "",
-            "Aplicaciones:",
-            "• Computación",
-            "• Biología",
-            "• Filosofía",
-            "",
-            "",
-            "CONTROLES:",
-            "- Click izquierdo: alternar celda",
-            "- Click derecho + arrastrar: mover canvas",
-            "- Rueda del mouse: zoom",
-            "- SPACE: iniciar/pausar",
-            "- FLECHA DERECHA: paso manual",
-            "- R: reiniciar",
-            "- H: abrir/cerrar ayuda",
-            "",
-            "",
-            "El zoom real mantiene fija la celda bajo el puntero mientras ajustas nivel."
-        ]
-
-        # Render del texto
-        y = 0
-        TITLE = pygame.font.SysFont("Segoe UI", 30, bold=True)
-        BODY = pygame.font.SysFont("Segoe UI", 20)
-
-        for i, ln in enumerate(L):
-            font = TITLE if ln == "HORMIGA DE LANGTON" else BODY
-            txt = font.render(ln, True, (230, 230, 240))
-            content.blit(txt, (10, y))
-            y += txt.get_height() + 10
-
-        # Ajustar alto real del contenido
-        real_h = y + 20
-        if real_h < content.get_height():
-            content = content.subsurface((0, 0, inner_w, real_h))
-
-        scroll_y = 0
-        max_scroll = max(0, real_h - inner_h)
-
-        # Posición del modal centrado
-        modal_rect = modal.get_rect(center=(self.window_w // 2, self.window_h // 2))
-
-        running_modal = True
-        while running_modal:
-            self.screen.blit(overlay, (0, 0))
-
-            # Redibujar modal base
-            modal.fill(MODAL_COLOR)
-            pygame.draw.rect(modal, BORDER_COLOR, modal.get_rect(), 3, border_radius=12)
-
-            # Dibujar contenido scrollable
-            modal.blit(content, (padding, padding), pygame.Rect(0, scroll_y, inner_w, inner_h))
-
-            # Dibujar modal en pantalla
-            self.screen.blit(modal, modal_rect.topleft)
-            pygame.display.flip()
-
-            # Eventos
-            for e in pygame.event.get():
-                if e.type == pygame.QUIT:
-                    pygame.quit(); sys.exit()
-
-                # Cerrar con clic o tecla
-                if e.type == pygame.KEYDOWN:
-                    running_modal = False
-
-                if e.type == pygame.MOUSEBUTTONDOWN:
-                    if e.button == 1:
-                        running_modal = False
-
-                    # Scroll rueda tradicional
-                    if e.button == 4: 
-                        scroll_y = max(0, scroll_y - 40)
-                    if e.button == 5:
-                        scroll_y = min(max_scroll, scroll_y + 40)
-
-                # Scroll con eventos modernos
-                if e.type == pygame.MOUSEWHEEL:
-                    if e.y > 0:
-                        scroll_y = max(0, scroll_y - 40)
-                    else:
-                        scroll_y = min(max_scroll, scroll_y + 40)
-
-
-
-    def reset(self):
-        self.grid.fill(0)
-        self.ant = {'x': GRID_W // 2, 'y': GRID_H // 2, 'dir': 0}
-        self.is_running = False
-        self.steps = 0
-        self.zoom_idx = 2
-        self.pan_x = 0
-        self.pan_y = 0
-        self.update_sizes()
-
-    # ---------------- Loop principal ----------------
-    def run(self):
-        clock = pygame.time.Clock()
-        while True:
-            dt = clock.tick(FPS) / 1000.0
-            for event in pygame.event.get():
-                self.handle_event(event)
-
-            # actualizar simulación segun velocidad
-            now = time.time()
-            period = max(0.02, 1.1 - self.speed * 0.1)
-            if self.is_running and (now - self.last_update) >= period:
-                self.move_ant_step()
-                self.steps += 1
-                self.last_update = now
-
-            # dibujar todo
-            self.draw()
-
-# ---------------- Ejecutar ----------------
-if __name__ == "__main__":
-    app = LangtonsAntApp((1300, 820))
-    app.run()
-
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+import numpy as np
+import pygame
+
+from langton import DIR_NAMES, LangtonEngine
+from langton.checkpoint import load, save
+from langton.highway import DETECT_WINDOW, trajectory_period
+from langton.lod import DensityPyramid, density_levels
+from langton.profiler import PHASES, FrameProfiler
+from langton.raster import (ANT_COLOR, BASE_CELL_SIZE, CELL_COLOR, GRID_BG, ZOOM_LEVELS, ant_masks,
+                            color_ramp, density_palette, heat_levels, heat_palette, rasterize)
+from langton.stats import HEATMAP_MAX_CELLS
+from langton.worker import SimWorker, merge_rect
+
+# ---------------- Inicialización ----------------
+pygame.init()
+pygame.font.init()  # sólo el módulo: las fuentes se abren al usarlas por primera vez (ver FontCache)
+
+# ---------------- Config & Colores ----------------
+BLACK = (12, 14, 20)
+WHITE = (240, 244, 248)
+PANEL_BG = (28, 36, 48)
+PANEL_ACCENT = (72, 148, 200)
+ACCENT = (245, 200, 80)
+BTN_BG = (36, 46, 60)
+BTN_BORDER = (120, 130, 140)
+GRID_LINE = (40, 48, 60)
+HELP_BG = (30, 30, 40)
+HELP_MODAL_COLOR = (38, 38, 48)     # fondo del modal de ayuda
+HELP_CONTENT_COLOR = (48, 48, 60)   # contenido scrollable
+HELP_BORDER_COLOR = (180, 180, 200)
+
+FPS = 60
+MAX_SPEED = 10
+TURBO_SPEED = MAX_SPEED + 1  # velocidad extra: tantos pasos como quepan en el frame
+TURBO_BUDGET = 0.010         # segundos de simulación por frame en modo turbo
+TURBO_CHUNK = 2048           # pasos por llamada a advance() en modo turbo
+DIRTY_LIMIT = 20000          # con más celdas sucias por frame sale más barato reconstruir el canvas
+LOD_ZOOM_STEP = 1.25         # factor por paso de rueda en el zoom continuo, por debajo de ZOOM_LEVELS[0]
+LOD_ANT_SIZE = 6             # tamaño mínimo (px) del marcador de la hormiga con el mundo alejado
+IDLE_TIMEOUT = 500           # ms máximos bloqueado en event.wait sin nada que animar (pasos/s, HUD)
+CHECKPOINT_PATH = "hormiga_langton.lgt"  # fichero de los botones Guardar / Cargar
+PROFILE_PATH = "hormiga_langton_perf.json"  # volcado del perfil de frames (F4)
+HUD_REFRESH = 0.25           # segundos entre actualizaciones del texto del HUD de rendimiento
+HUD_BG = (0, 0, 0, 170)
+TEXT_CACHE_SIZE = 256        # superficies de texto renderizadas que se conservan (LRU)
+# eventos que no tocan el motor: no hace falta pausar el proceso de simulación para atenderlos
+VIEW_EVENTS = (pygame.MOUSEMOTION, pygame.MOUSEWHEEL, pygame.MOUSEBUTTONUP)
+
+# Fuentes: (nombre, tamaño, negrita), resueltas la primera vez que se usan (ver FontCache)
+TITLE_FONT = ('Segoe UI', 26, True)
+MED_FONT = ('Segoe UI', 16, True)
+SMALL_FONT = ('Segoe UI', 15, False)
+HELP_TITLE_FONT = ('Segoe UI', 30, True)
+HELP_BODY_FONT = ('Segoe UI', 20, False)
+# rutas de los ficheros de fuente ya resueltos, para no recorrer las del sistema en cada arranque
+FONT_CACHE_PATH = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+                               "hormiga_langton", "fonts.json")
+
+# Texto de la ayuda (H); la primera línea es el título
+HELP_LINES = (
+    "HORMIGA DE LANGTON",
+    "",
+    "¿Qué es?",
+    "La Hormiga de Langton es un autómata celular bidimensional",
+    "con reglas simples pero comportamiento complejo emergente.",
+    "Fue creada por Chris Langton en 1986.",
+    "",
+    "Reglas simples:",
+    "• Celda BLANCA → gira 90° a la DERECHA, se vuelve NEGRA y avanza.",
+    "• Celda NEGRA → gira 90° a la IZQUIERDA, se vuelve BLANCA y avanza.",
+    "Otras reglas (RLR, LLRR, turmites): python -m langton --rule LLRR",
+    "Colonias: python -m langton --ants 500 --order simultaneous",
+    "Continuar una partida: python -m langton --resume hormiga_langton.lgt",
+    "",
+    "Comportamiento emergente:",
+    "• 0–500 pasos → Fase CAÓTICA.",
+    "• 500–10,000 pasos → Fase de patrones repetitivos.",
+    "• >10,000 pasos → Fase de “autopista” estable.",
+    "",
+    "Aplicaciones:",
+    "• Computación",
+    "• Biología",
+    "• Filosofía",
+    "",
+    "",
+    "CONTROLES:",
+    "- Click izquierdo: alternar celda",
+    "- Click derecho + arrastrar: mover canvas",
+    "- Rueda del mouse: zoom (por debajo de 0.5x, continuo hasta ver todo el mundo,",
+    "  sombreado según la densidad de celdas vivas de cada bloque)",
+    "- SPACE: iniciar/pausar",
+    "- FLECHA DERECHA: paso manual",
+    "- FLECHA IZQUIERDA: paso atrás (la regla se invierte, sin historial)",
+    "- B: reproducir hacia atrás",
+    "- Línea temporal del panel: arrastrar para rebobinar",
+    "- +/-: velocidad (por encima de 10: TURBO)",
+    "- R: reiniciar",
+    f"- S / L: guardar / cargar checkpoint ({CHECKPOINT_PATH})",
+    "- M: mapa de calor de visitas (activa las métricas: población y área visitada en el panel)",
+    "- H: abrir/cerrar ayuda",
+    f"- F3: HUD de rendimiento  /  F4: volcar el perfil de frames ({PROFILE_PATH})",
+    "",
+    "",
+    "El zoom real mantiene fija la celda bajo el puntero mientras ajustas nivel.",
+)
+
+# Ruta de la imagen subida (se usará si existe)
+LOGO_PATH = "/mnt/data/cb1011a1-b921-4581-af88-8ceb1fc72800.png"
+
+# ---------------- Caché de fuentes ----------------
+class FontCache:
+    # pygame.font.SysFont recorre la lista de fuentes del sistema (fc-list / registro) la primera vez que
+    # se llama en cada proceso, y es lo más lento del arranque. Aquí cada fuente se abre al pedirla por
+    # primera vez y la ruta del fichero que eligió SysFont (con la negrita simulada si hizo falta) se
+    # guarda en `path`: en los arranques siguientes se abre directamente con pygame.font.Font. Si el
+    # fichero guardado ya no existe se vuelve a buscar; borrar `path` fuerza una búsqueda nueva
+    def __init__(self, path=FONT_CACHE_PATH):
+        self.path = path
+        self.fonts = {}
+        self.paths = None      # "nombre|negrita" -> [ruta (None = fuente por defecto), negrita simulada]
+        self.scanned = False   # si en este proceso hubo que buscar en las fuentes del sistema
+        self.load_time = 0.0   # segundos abriendo fuentes
+
+    def get(self, spec):
+        font = self.fonts.get(spec)
+        if font is None:
+            t = time.perf_counter()
+            font = self.fonts[spec] = self.open(*spec)
+            self.load_time += time.perf_counter() - t
+        return font
+
+    def open(self, name, size, bold):
+        if self.paths is None:
+            self.paths = self.read()
+        key = f"{name}|{int(bold)}"
+        entry = self.paths.get(key)
+        if not self.usable(entry):
+            resolved = []
+            pygame.font.SysFont(name, size, bold=bold,
+                                constructor=lambda path, size, bold, italic: resolved.append([path, bold]))
+            entry = self.paths[key] = resolved[0]
+            self.scanned = True
+            self.write()
+        path, fake_bold = entry
+        font = pygame.font.Font(path, size)
+        font.set_bold(fake_bold)
+        return font
+
+    @staticmethod
+    def usable(entry):
+        # entrada de la caché en disco con el formato esperado y cuyo fichero sigue existiendo
+        return (isinstance(entry, list) and len(entry) == 2
+                and (entry[0] is None or os.path.exists(entry[0])))
+
+    def read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                paths = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return paths if isinstance(paths, dict) else {}
+
+    def write(self):
+        # la caché es opcional: si no se puede escribir, el próximo arranque vuelve a buscar
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self.paths, f, indent=1)
+        except OSError:
+            pass
+
+
+FONTS = FontCache()
+
+
+# ---------------- Caché de texto ----------------
+class TextCache:
+    # Font.render es de lo más caro del panel: cada (fuente, texto, color) se renderiza una vez y se
+    # reutiliza mientras no cambie. Los textos que varían cada frame (pasos) desalojan a los más
+    # antiguos, así la caché nunca pasa de `size` superficies
+    def __init__(self, size=TEXT_CACHE_SIZE):
+        self.size = size
+        self.items = OrderedDict()
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surf = self.items.get(key)
+        if surf is None:
+            surf = FONTS.get(font).render(text, True, color)
+            self.items[key] = surf
+            if len(self.items) > self.size:
+                self.items.popitem(last=False)
+        else:
+            self.items.move_to_end(key)
+        return surf
+
+
+# ---------------- Clase principal ----------------
+class LangtonsAntApp:
+    def __init__(self, window_size=(1300, 820), engine=None, worker=True):
+        self.window_w, self.window_h = window_size
+        self.screen = pygame.display.set_mode((self.window_w, self.window_h), pygame.RESIZABLE)
+        pygame.display.set_caption("Hormiga de Langton - Viewport (Clip)")
+
+        # Estado lógico (la simulación vive en el motor)
+        self.engine = engine if engine is not None else LangtonEngine()
+        # color por valor de celda (tantos como colores tenga la regla)
+        self.palette = color_ramp(self.engine.rule.n_colors, GRID_BG, CELL_COLOR)
+        self.is_running = False
+        self.speed = 5  # 1..10, TURBO_SPEED = turbo
+
+        # Zoom & cell size
+        self.zoom_idx = 2  # start at 1.0
+        self.cell_size = max(1, int(BASE_CELL_SIZE * ZOOM_LEVELS[self.zoom_idx]))
+        # Por debajo de ZOOM_LEVELS[0] el zoom es continuo (lod_zoom, celdas de menos de un píxel) y el
+        # canvas sale de la pirámide de densidad (ver draw_lod); None = en uno de los ZOOM_LEVELS
+        self.lod_zoom = None
+        self.pyramid = None
+        self.lod_surf = None  # imagen del nivel de detalle a un píxel por bloque, antes de escalarla
+        self.density_palette = density_palette(GRID_BG, CELL_COLOR)
+
+        # Canvas overall pixel size
+        self.canvas_w = self.engine.width * self.cell_size
+        self.canvas_h = self.engine.height * self.cell_size
+
+        # Canvas persistente: se actualiza sólo en las celdas que el motor reporta como sucias
+        self.engine.enable_dirty_log()
+        # Modo mapa de calor (M) que pinta las visitas en lugar de los colores. Las métricas
+        # incrementales del motor (población, área visitada, mapa de visitas...) son opcionales: las
+        # trae el motor (--stats) o se activan al pulsar M por primera vez (ver enable_stats)
+        self.show_heat = False
+        self.heat_palette = heat_palette(GRID_BG)
+        self.canvas_surf = None
+        self.canvas_view = None  # (c0, r0, c1, r1): celdas rasterizadas en canvas_surf
+        self.needs_full_redraw = True
+
+        # Pan / drag
+        self.pan_x = 0
+        self.pan_y = 0
+        self.dragging = False
+        self.last_drag_pos = None
+
+        # Timing
+        self.last_update = time.time()
+        self.sps = 0.0  # pasos por segundo medidos
+        self.sps_time = time.perf_counter()
+        self.sps_steps = 0
+
+        # Detección pasiva de la autopista sobre la trayectoria reciente (claves del registro sucio)
+        self.trail = []
+        self.highway = None  # (periodo, desplazamiento) o None
+        # con varias hormigas el registro mezcla trayectorias: no hay autopista que detectar
+        self.multi_ant = len(self.engine.ants()[0]) > 1
+        self.status = ""  # resultado del último guardado / carga
+
+        # Retroceso: reproducción hacia atrás y línea temporal (la regla se invierte, sin historial)
+        self.reverse = False
+        self.seek_target = None  # paso al que se está yendo desde la línea temporal
+        self.scrubbing = False
+        self.scrub_rect = None
+        self.max_seen = self.engine.steps  # paso más alto alcanzado: extremo de la línea temporal
+
+        # Turbo en un proceso aparte sobre memoria compartida (ver langton.worker); se arranca la
+        # primera vez que hace falta y sólo con rejillas fijas de una hormiga
+        self.use_worker = worker
+        self.worker = None
+        self.lost_rect = None  # celdas que el proceso cambió sin caber en su anillo (ver take_lost)
+
+        # Redibujo bajo demanda: el bucle sólo llama a draw() si algo cambió (ver run)
+        self.frame_dirty = True
+        # Ayuda superpuesta (H) sin bloquear el bucle principal
+        self.help_open = False
+        self.help_scroll = 0
+        self.help_cache = None  # ((ancho, alto) de la ventana, superficies del modal)
+        self.help_text = None   # líneas de HELP_LINES ya renderizadas (no dependen de la ventana)
+
+        # Perfil por fases de cada frame (siempre activo, muy barato) y HUD de rendimiento (F3)
+        self.profiler = FrameProfiler()
+        self.show_hud = False
+        self.hud_surf = None
+        self.hud_time = 0.0
+
+        # Buttons rects (recalculated with the static panel layer)
+        self.buttons = {}
+
+        # Panel por capas (ver draw_panel) y caché de texto
+        self.text_cache = TextCache()
+        self.panel_static = None
+        self.panel_static_key = None
+        self.panel_surf = None
+        self.panel_layout = None
+        self.panel_key = None
+
+        # Optional logo
+        self.logo = None
+        if os.path.exists(LOGO_PATH):
+            try:
+                img = pygame.image.load(LOGO_PATH)
+                maxw = 240
+                scale = maxw / img.get_width()
+                new_h = int(img.get_height() * scale)
+                self.logo = pygame.transform.smoothscale(img, (maxw, new_h))
+            except Exception:
+                self.logo = None
+
+    # ---------------- Utilidades ----------------
+    def controls_width(self):
+        # Panel lateral responsivo: ocupa ~28% ancho, mínimo 300, máximo 420
+        w = int(self.window_w * 0.28)
+        return max(300, min(420, w))
+
+    def zoom_factor(self):
+        return self.lod_zoom if self.lod_zoom is not None else ZOOM_LEVELS[self.zoom_idx]
+
+    def min_zoom(self):
+        # zoom más alejado: la rejilla entera cabe en el área del canvas
+        fit = min((self.window_w - self.controls_width() - 40) / self.engine.width,
+                  (self.window_h - 40) / self.engine.height) / BASE_CELL_SIZE
+        return min(ZOOM_LEVELS[0], fit)
+
+    def update_sizes(self):
+        if self.lod_zoom is not None:
+            cell_size = BASE_CELL_SIZE * self.lod_zoom  # fraccionario
+        else:
+            cell_size = max(1, int(BASE_CELL_SIZE * ZOOM_LEVELS[self.zoom_idx]))
+        if cell_size != self.cell_size:
+            self.needs_full_redraw = True
+        self.cell_size = cell_size
+        self.canvas_w = self.engine.width * self.cell_size
+        self.canvas_h = self.engine.height * self.cell_size
+        self.limit_pan()
+
+    def limit_pan(self):
+        if not self.engine.bounded:
+            return  # mundo sin bordes: pan libre
+        view_w = self.window_w - self.controls_width()
+        view_h = self.window_h
+        min_x = min(0, view_w - self.canvas_w - 20)
+        max_x = 20
+        min_y = min(0, view_h - self.canvas_h - 20)
+        max_y = 20
+        self.pan_x = max(min(self.pan_x, max_x), min_x)
+        self.pan_y = max(min(self.pan_y, max_y), min_y)
+
+    # ---------------- Coordenadas ----------------
+    def screen_to_grid(self, sx, sy):
+        # canvas origin = (20 + pan_x, 20 + pan_y)
+        canvas_x = 20 + int(self.pan_x)
+        canvas_y = 20 + int(self.pan_y)
+        gx = (sx - canvas_x) // self.cell_size
+        gy = (sy - canvas_y) // self.cell_size
+        return int(gx), int(gy)
+
+    # ---------------- Zoom (centrado) ----------------
+    def zoom_at(self, screen_pos, zoom_in=True):
+        old_cell_size = self.cell_size
+        old_zoom = self.zoom_factor()
+        if self.lod_zoom is not None:
+            # zoom continuo: se vuelve a los ZOOM_LEVELS al pasar de ZOOM_LEVELS[0]
+            z = self.lod_zoom * LOD_ZOOM_STEP if zoom_in else self.lod_zoom / LOD_ZOOM_STEP
+            z = max(z, self.min_zoom())
+            self.lod_zoom = z if z < ZOOM_LEVELS[0] else None
+        elif zoom_in and self.zoom_idx < len(ZOOM_LEVELS) - 1:
+            self.zoom_idx += 1
+        elif not zoom_in and self.zoom_idx > 0:
+            self.zoom_idx -= 1
+        elif not zoom_in and self.engine.bounded:
+            # mundo sin bordes: no hay pirámide de densidad, el zoom se queda en ZOOM_LEVELS[0]
+            z = max(ZOOM_LEVELS[0] / LOD_ZOOM_STEP, self.min_zoom())
+            if z < ZOOM_LEVELS[0]:
+                self.lod_zoom = z
+        if self.zoom_factor() == old_zoom:
+            return
+        if self.lod_zoom is None:
+            self.pyramid = None  # fuera del nivel de detalle no se mantiene al día
+        self.update_sizes()
+        sx, sy = screen_pos
+        # ajustar pan para mantener la celda bajo el mouse
+        canvas_x = 20 + self.pan_x
+        canvas_y = 20 + self.pan_y
+        rel_x = sx - canvas_x
+        rel_y = sy - canvas_y
+        if rel_x < 0 or rel_y < 0:
+            return
+        cell_x = rel_x / old_cell_size
+        cell_y = rel_y / old_cell_size
+        new_rel_x = cell_x * self.cell_size
+        new_rel_y = cell_y * self.cell_size
+        self.pan_x += (rel_x - new_rel_x)
+        self.pan_y += (rel_y - new_rel_y)
+        self.limit_pan()
+
+    # ---------------- Dibujo de las hormigas ----------------
+    def draw_ants(self, origin, clip):
+        # todas las hormigas en una pasada NumPy por dirección, escribiendo directamente en los píxeles.
+        # Con celdas fraccionarias (nivel de detalle) el marcador tiene al menos LOD_ANT_SIZE píxeles y
+        # se centra en la celda
+        cs = self.cell_size
+        xs, ys, ds = self.engine.ants()
+        if cs != int(cs):
+            mcs = max(LOD_ANT_SIZE, int(cs))
+            px = np.floor(origin[0] + xs * cs + (cs - mcs) / 2).astype(np.int64)
+            py = np.floor(origin[1] + ys * cs + (cs - mcs) / 2).astype(np.int64)
+            cs = mcs
+        else:
+            px = origin[0] + xs * cs
+            py = origin[1] + ys * cs
+        near = ((px > clip.left - 2 * cs - 4) & (px < clip.right + cs + 4)
+                & (py > clip.top - 2 * cs - 4) & (py < clip.bottom + cs + 4))
+        pixels = pygame.surfarray.pixels3d(self.screen)
+        for d, (mx, my) in enumerate(ant_masks(cs)):
+            sel = near & (ds == d)
+            X = (px[sel, None] + mx).ravel()
+            Y = (py[sel, None] + my).ravel()
+            ok = (X >= clip.left) & (X < clip.right) & (Y >= clip.top) & (Y < clip.bottom)
+            pixels[X[ok], Y[ok]] = ANT_COLOR
+        del pixels  # libera el bloqueo de la superficie
+
+    # ---------------- HUD de rendimiento ----------------
+    def draw_hud(self, area):
+        # el texto se rehace cada HUD_REFRESH segundos; entre medias sólo se blitea la superficie
+        now = time.perf_counter()
+        if self.hud_surf is None or now - self.hud_time >= HUD_REFRESH:
+            self.hud_surf = self.render_hud(self.profiler.summary())
+            self.hud_time = now
+        if self.hud_surf is not None:
+            self.screen.blit(self.hud_surf, (area.x + 10, area.y + 10))
+
+    def render_hud(self, st):
+        if st is None:
+            return None
+        budget = 1000 / FPS
+        lines = [
+            (f"FPS {st['fps']:.1f}   frame p50 {st['frame_p50_ms']:.1f} ms  p99 {st['frame_p99_ms']:.1f} ms",
+             None),
+            (f"pasos/s {st['steps_per_s']:,.0f}   (F4: volcar a {PROFILE_PATH})", None),
+        ]
+        lines += [(f"{name:<7} {st['phase_ms'][name]:6.2f} ms", st['phase_ms'][name] / budget)
+                  for name in PHASES]
+        font = FONTS.get(SMALL_FONT)
+        texts = [(font.render(text, True, WHITE), frac) for text, frac in lines]
+        w = max(t.get_width() for t, _ in texts) + 20
+        h = sum(t.get_height() + 2 for t, _ in texts) + 12
+        surf = pygame.Surface((w, h), pygame.SRCALPHA)
+        surf.fill(HUD_BG)
+        # barras a la derecha de las fases: fracción del presupuesto de un frame a FPS
+        bar_x = max(t.get_width() for t, frac in texts if frac is not None) + 20
+        y = 6
+        for text, frac in texts:
+            surf.blit(text, (10, y))
+            if frac is not None:
+                bar = pygame.Rect(bar_x, y + 3, int((w - 10 - bar_x) * min(1.0, frac)), text.get_height() - 6)
+                pygame.draw.rect(surf, PANEL_ACCENT, bar)
+            y += text.get_height() + 2
+        return surf
+
+    def dump_profile(self):
+        try:
+            self.profiler.dump(PROFILE_PATH)
+            self.status = f"Perfil guardado: {PROFILE_PATH}"
+        except OSError as exc:
+            self.status = f"Error al guardar el perfil: {exc}"
+
+    # ---------------- Dibujar UI ----------------
+    def draw(self):
+        # fondo
+        self.screen.fill(BLACK)
+
+        cw = self.controls_width()
+        panel_rect = pygame.Rect(self.window_w - cw, 0, cw, self.window_h)
+
+        # area del canvas (izquierda). OPCIÓN A: recorte lateral solamente
+        canvas_area_rect = pygame.Rect(0, 0, self.window_w - cw, self.window_h)
+        pygame.draw.rect(self.screen, GRID_BG, canvas_area_rect)
+
+        # actualizar tamaños según zoom
+        self.update_sizes()
+
+        # origen del canvas lógico en pantalla, con pan y margen de 20px
+        canvas_pos = (20 + int(self.pan_x), 20 + int(self.pan_y))
+        cs = self.cell_size
+
+        # sólo se rasterizan las filas/columnas visibles: el coste depende de la ventana, no de la rejilla.
+        # El canvas persistente se reconstruye en zoom / pan / reset / resize; en el resto de frames
+        # se repintan únicamente las celdas sucias (y el rectángulo de las que no cupieron en el anillo
+        # del proceso de simulación, que no rompe la trayectoria)
+        dirty = self.engine.take_dirty()
+        lost = self.take_lost()
+        self.track_trail(dirty)
+        if self.lod_zoom is not None:
+            canvas_origin = self.draw_lod(canvas_pos, canvas_area_rect, dirty, lost)
+        else:
+            view = self.visible_cells(canvas_pos, canvas_area_rect.width, canvas_area_rect.height)
+            if (self.canvas_surf is None or self.needs_full_redraw or view != self.canvas_view
+                    or dirty is None or len(dirty) > DIRTY_LIMIT):
+                self.rebuild_canvas(view)
+            else:
+                self.update_dirty_cells(dirty)
+                if lost is not None:
+                    self.repaint_cells(lost)
+            canvas_origin = (canvas_pos[0] + view[0] * cs, canvas_pos[1] + view[1] * cs)
+
+        # USAR CLIP: fijamos el clip al área del canvas (no invade el panel derecho)
+        self.screen.set_clip(canvas_area_rect)
+
+        if self.canvas_surf is not None:
+            self.screen.blit(self.canvas_surf, canvas_origin)
+        prof = self.profiler
+        prof.mark("canvas")
+
+        # las hormigas se dibujan sobre la pantalla para no ensuciar el canvas persistente
+        self.draw_ants(canvas_pos, canvas_area_rect)
+        prof.mark("ants")
+
+        # dibujar marco de visualización (solo sobre la parte visible)
+        visible_w = min(self.canvas_w, canvas_area_rect.width - 40)
+        visible_h = min(self.canvas_h, canvas_area_rect.height - 40)
+        border_rect = pygame.Rect(canvas_pos[0] - 2, canvas_pos[1] - 2, visible_w + 4, visible_h + 4)
+
+        # desactivar clip — ahora el panel se dibujará encima
+        self.screen.set_clip(None)
+
+        # dibujar panel lateral (siempre encima) y, si está abierta, la ayuda sobre todo lo demás
+        self.draw_panel(panel_rect)
+        if self.help_open:
+            self.draw_help()
+        prof.mark("panel")
+
+        if self.show_hud:
+            self.draw_hud(canvas_area_rect)
+        prof.mark("hud")
+
+        # swap buffers
+        pygame.display.flip()
+        prof.mark("flip")
+
+    def visible_cells(self, origin, view_w, view_h):
+        # rango [c0, c1) x [r0, r1) de celdas que caen dentro del área de dibujo
+        cs = self.cell_size
+        c0 = -origin[0] // cs
+        r0 = -origin[1] // cs
+        c1 = -(-(view_w - origin[0]) // cs)
+        r1 = -(-(view_h - origin[1]) // cs)
+        if self.engine.bounded:
+            c0, r0 = max(0, c0), max(0, r0)
+            c1, r1 = min(self.engine.width, c1), min(self.engine.height, r1)
+        return c0, r0, max(c0, c1), max(r0, r1)
+
+    def rebuild_canvas(self, view):
+        c0, r0, c1, r1 = view
+        self.canvas_view = view
+        self.needs_full_redraw = False
+        if c1 <= c0 or r1 <= r0:
+            self.canvas_surf = None
+            return
+        self.canvas_surf = self.render_cells(c0, r0, c1, r1)
+
+    def render_cells(self, c0, r0, c1, r1):
+        # una sola pasada NumPy: paleta + expansión a cell_size, traspuesta al layout (x, y) de surfarray
+        if self.show_heat:
+            cells, palette = heat_levels(self.engine.stats.visits[r0:r1, c0:c1]), self.heat_palette
+        else:
+            cells, palette = self.engine.region(c0, r0, c1, r1), self.palette
+        return pygame.surfarray.make_surface(rasterize(cells.T, self.cell_size, palette))
+
+    def repaint_cells(self, rect):
+        # vuelve a rasterizar la parte visible del rectángulo de celdas (x0, y0, x1, y1)
+        if self.canvas_surf is None:
+            return
+        c0, r0, c1, r1 = self.canvas_view
+        x0, y0 = max(c0, rect[0]), max(r0, rect[1])
+        x1, y1 = min(c1, rect[2]), min(r1, rect[3])
+        if x1 > x0 and y1 > y0:
+            cs = self.cell_size
+            self.canvas_surf.blit(self.render_cells(x0, y0, x1, y1), ((x0 - c0) * cs, (y0 - r0) * cs))
+
+    def update_dirty_cells(self, dirty):
+        if self.canvas_surf is None:
+            return
+        cs = self.cell_size
+        c0, r0, c1, r1 = self.canvas_view
+        xs, ys = self.engine.dirty_coords(list(set(dirty)))
+        inside = (xs >= c0) & (xs < c1) & (ys >= r0) & (ys < r1)
+        xs, ys = xs[inside], ys[inside]
+        # en el mapa de calor las visitas sólo cambian en las celdas por las que pasa la hormiga
+        if self.show_heat:
+            values, palette = heat_levels(self.engine.stats.visits[ys, xs]), self.heat_palette
+        else:
+            values, palette = self.engine.gather(xs, ys), self.palette
+        palette = palette.tolist()
+        for xx, yy, v in zip(xs.tolist(), ys.tolist(), values.tolist()):
+            self.canvas_surf.fill(palette[v], ((xx - c0) * cs, (yy - r0) * cs, cs, cs))
+
+    # ---------------- Nivel de detalle (mundo alejado) ----------------
+    def lod_level(self):
+        # nivel de la pirámide cuyo bloque ocupa entre 1 y 2 píxeles (0 si las celdas ya los ocupan)
+        if self.cell_size >= 1:
+            return 0
+        level = int(np.ceil(np.log2(1 / self.cell_size) - 1e-9))
+        return min(level, self.lod_pyramid().max_level)
+
+    def lod_pyramid(self):
+        source = "visits" if self.show_heat else "cells"
+        pyramid = self.pyramid
+        if pyramid is None or pyramid.engine is not self.engine or pyramid.source != source:
+            self.pyramid = DensityPyramid(self.engine, source)
+        return self.pyramid
+
+    def lod_colors(self, level, values):
+        # valores de celda (nivel 0) o sumas por bloque -> RGB
+        if self.show_heat:
+            if level:
+                values = -(-values // (1 << 2 * level))  # visitas medias del bloque, redondeando arriba
+            return self.heat_palette[heat_levels(values)]
+        if level:
+            return self.density_palette[density_levels(values, level)]
+        return self.palette[values]
+
+    def draw_lod(self, origin, area, dirty, lost=None):
+        # Mundo alejado: la imagen del nivel `level` de la pirámide tiene un píxel por bloque visible,
+        # así que su tamaño depende de la ventana y no de la rejilla. Se rehace al cambiar de nivel o
+        # de vista; en el resto de frames la pirámide y la imagen se actualizan sólo en los bloques con
+        # celdas sucias o dentro del rectángulo `lost` (ver take_lost). pygame.transform.scale la lleva
+        # después al tamaño de pantalla. Devuelve la posición en pantalla del canvas
+        pyramid = self.lod_pyramid()
+        level = self.lod_level()
+        b = self.cell_size * (1 << level)  # píxeles por bloque
+        rows, cols = pyramid.shape(level)
+        bx0, by0 = max(0, int(-origin[0] // b)), max(0, int(-origin[1] // b))
+        bx1 = max(bx0, min(cols, int(-(-(area.w - origin[0]) // b))))
+        by1 = max(by0, min(rows, int(-(-(area.h - origin[1]) // b))))
+        view = ('lod', level, bx0, by0, bx1, by1)
+        if dirty is None:
+            pyramid.invalidate()
+        else:
+            if dirty:
+                xs, ys = self.engine.dirty_coords(list(set(dirty)))
+                pyramid.update(xs, ys)
+            if lost is not None:
+                pyramid.update_rect(*lost)
+        changed = True
+        if self.needs_full_redraw or view != self.canvas_view or dirty is None:
+            self.canvas_view = view
+            self.needs_full_redraw = False
+            self.lod_surf = None
+            if bx1 > bx0 and by1 > by0:
+                values = pyramid.blocks(level, bx0, by0, bx1, by1)
+                self.lod_surf = pygame.surfarray.make_surface(self.lod_colors(level, values.T))
+        elif (dirty or lost is not None) and self.lod_surf is not None:
+            pixels = pygame.surfarray.pixels3d(self.lod_surf)
+            if dirty:
+                keys = np.unique((ys >> level) * cols + (xs >> level))
+                bys, bxs = np.divmod(keys, cols)
+                inside = (bxs >= bx0) & (bxs < bx1) & (bys >= by0) & (bys < by1)
+                bxs, bys = bxs[inside], bys[inside]
+                pixels[bxs - bx0, bys - by0] = self.lod_colors(level, pyramid.block_values(level, bxs, bys))
+            if lost is not None:
+                # bloques visibles del rectángulo
+                lx0, ly0 = max(bx0, lost[0] >> level), max(by0, lost[1] >> level)
+                lx1, ly1 = min(bx1, ((lost[2] - 1) >> level) + 1), min(by1, ((lost[3] - 1) >> level) + 1)
+                if lx1 > lx0 and ly1 > ly0:
+                    values = pyramid.blocks(level, lx0, ly0, lx1, ly1)
+                    pixels[lx0 - bx0:lx1 - bx0, ly0 - by0:ly1 - by0] = self.lod_colors(level, values.T)
+            del pixels  # libera el bloqueo de la superficie
+        else:
+            changed = False
+        left, top = round(origin[0] + bx0 * b), round(origin[1] + by0 * b)
+        size = (round(origin[0] + bx1 * b) - left, round(origin[1] + by1 * b) - top)
+        if self.lod_surf is None:
+            self.canvas_surf = None
+        elif changed or self.canvas_surf is None or self.canvas_surf.get_size() != size:
+            self.canvas_surf = pygame.transform.scale(self.lod_surf, size)
+        return left, top
+
+    def draw_panel(self, panel_rect):
+        # Dos capas: la estática (fondo, título, logo, botones con iconos, cajas y etiquetas fijas) sólo
+        # se rehace al cambiar el rectángulo del panel o la etiqueta de "Hacia atrás". La dinámica se
+        # divide en grupos (zoom, valores de las cajas, línea temporal, estado...) y en panel_surf sólo
+        # se repinta, sobre su trozo de la capa estática, el grupo cuyos valores cambian. Un frame sin
+        # cambios cuesta un único blit; corriendo, el de las franjas de pasos y línea temporal.
+        static_key = (tuple(panel_rect), self.reverse)
+        if self.panel_static is None or self.panel_static_key != static_key:
+            self.build_panel_static(panel_rect)
+            self.panel_static_key = static_key
+            self.panel_key = None
+        self.max_seen = max(self.max_seen, self.engine.steps)
+        state = "EJECUTANDO" if self.is_running else "PAUSADO"
+        if self.reverse:
+            state += " (HACIA ATRÁS)"
+        if self.multi_ant:
+            dir_text = f"Hormigas: {len(self.engine.ants()[0]):,} ({self.engine.order})"
+        else:
+            dir_text = "Dirección: " + DIR_NAMES[self.engine.ant_dir]
+        speed_str = "TURBO" if self.speed == TURBO_SPEED else f"{self.speed}/{MAX_SPEED}"
+        key = {
+            'zoom': (self.zoom_factor(),),
+            'stats': (self.engine.steps, speed_str),
+            'timeline': (self.engine.steps, self.max_seen, self.seek_target),
+            'info': (state, dir_text, int(self.sps), self.engine.rule.name, self.get_phase(), self.status),
+            'metrics': self.metrics_key(),
+        }
+        old = self.panel_key or {}
+        for group, values in key.items():
+            if old.get(group) != values:
+                area = self.panel_layout[group]
+                self.panel_surf.blit(self.panel_static, area, area)
+                self.draw_panel_group(group, values)
+        self.panel_key = key
+        self.screen.blit(self.panel_surf, panel_rect.topleft)
+
+    def build_panel_static(self, panel_rect):
+        # coordenadas locales al panel; los rects de self.buttons se guardan en coordenadas de pantalla
+        surf = pygame.Surface(panel_rect.size)
+        surf.fill(PANEL_BG)
+        text = self.text_cache.render
+        layout = {}
+
+        # título
+        surf.blit(text(TITLE_FONT, "Hormiga de Langton", WHITE), (18, 18))
+
+        # logo si existe
+        y_offset = 60
+        if self.logo:
+            surf.blit(self.logo, (18, y_offset))
+            y_offset += self.logo.get_height() + 8
+
+        # indicador de zoom debajo del título (dinámico)
+        layout['zoom'] = pygame.Rect(18, y_offset, panel_rect.w - 36, 30)
+        y_offset += 36
+
+        # botones (dibujados como rects; manejados por self.buttons)
+        margin_x = 18
+        cur_y = y_offset
+        bw = panel_rect.w - 36
+        bh = 38
+        gap = 10
+
+        def pair(left, right, y):
+            # dos botones de media anchura en la fila y
+            rl = pygame.Rect(margin_x, y, bw // 2 - 6, bh)
+            rr = pygame.Rect(margin_x + bw // 2 + 6, y, bw // 2 - 6, bh)
+            self.draw_button(surf, rl, left[1], icon_type=left[2])
+            self.draw_button(surf, rr, right[1], icon_type=right[2])
+            return {left[0]: rl, right[0]: rr}
+
+        buttons = {}
+        buttons.update(pair(('play', "Play", 'play'), ('pause', "Pause", 'pause'), cur_y))
+        cur_y += bh + gap
+        buttons.update(pair(('step', "Step", 'step'), ('reset', "Reset", 'reset'), cur_y))
+        cur_y += bh + gap
+        buttons.update(pair(('save', "Guardar", 'save'), ('load', "Cargar", 'load'), cur_y))
+        cur_y += bh + gap
+        reverse_label = "Hacia atrás" + (" (ON)" if self.reverse else "")
+        buttons.update(pair(('step_back', "Paso atrás", 'step_back'), ('reverse', reverse_label, 'reverse'),
+                            cur_y))
+        cur_y += bh + gap
+
+        # Zoom in/out
+        surf.blit(text(SMALL_FONT, "Zoom", WHITE), (margin_x, cur_y))
+        cur_y += 22
+        buttons.update(pair(('zoom_in', "+", 'zoom_in'), ('zoom_out', "-", 'zoom_out'), cur_y))
+        cur_y += bh + gap
+
+        # Speed
+        surf.blit(text(SMALL_FONT, "Velocidad", WHITE), (margin_x, cur_y))
+        cur_y += 22
+        buttons.update(pair(('faster', "Más rápido", 'faster'), ('slower', "Más lento", 'slower'), cur_y))
+        cur_y += bh + gap
+
+        # Stats boxes: fondo y etiquetas fijos; los valores se centran en la capa dinámica
+        sb_h = 64
+        sb_w = (bw - gap) // 2
+        sbox1 = pygame.Rect(margin_x, cur_y, sb_w, sb_h)
+        sbox2 = pygame.Rect(margin_x + sb_w + gap, cur_y, sb_w, sb_h)
+        for box, label in ((sbox1, "Pasos"), (sbox2, "Velocidad")):
+            pygame.draw.rect(surf, PANEL_ACCENT, box, border_radius=8)
+            label_surf = text(SMALL_FONT, label, WHITE)
+            surf.blit(label_surf, (box.x + (box.w - label_surf.get_width()) // 2, box.y + 38))
+        layout['boxes'] = (sbox1, sbox2)
+        layout['stats'] = pygame.Rect(margin_x, cur_y + 6, bw, 30)
+        cur_y += sb_h + gap
+
+        # Línea temporal: de 0 al paso más alto alcanzado; arrastrar para rebobinar / volver. La franja
+        # ocupa todo el ancho: el tirador sobresale de la barra
+        layout['timeline'] = pygame.Rect(0, cur_y, panel_rect.w, 22 + 14 + gap)
+        layout['scrub'] = pygame.Rect(margin_x, cur_y + 22, bw, 14)
+        self.scrub_rect = layout['scrub'].move(panel_rect.x, panel_rect.y)
+        cur_y += 22 + 14 + gap
+
+        # Estado, dirección, pasos/s, regla, fase y resultado del último guardado / carga
+        layout['info'] = pygame.Rect(0, cur_y, panel_rect.w, 88 + 24 + 24)
+        cur_y += layout['info'].h
+
+        # Métricas incrementales del motor (si las tiene)
+        layout['metrics'] = pygame.Rect(0, cur_y, panel_rect.w, 3 * 20)
+
+        # Help button abajo
+        bh2 = 40
+        b_help = pygame.Rect(margin_x, panel_rect.h - bh2 - 20, bw, bh2)
+        self.draw_button(surf, b_help, "Ver explicación y reglas")
+        buttons['help'] = b_help
+
+        # registrar botones para manejo de clics
+        self.buttons = {name: rect.move(panel_rect.x, panel_rect.y) for name, rect in buttons.items()}
+        self.panel_static = surf
+        self.panel_surf = surf.copy()
+        self.panel_layout = layout
+
+    def draw_panel_group(self, group, values):
+        surf = self.panel_surf
+        text = self.text_cache.render
+        layout = self.panel_layout
+        if group == 'zoom':
+            zoom = values[0]
+            label = f"Zoom: {zoom:.2f}x" if zoom >= 0.1 else f"Zoom: 1/{1 / zoom:.0f}x"
+            surf.blit(text(MED_FONT, label, PANEL_ACCENT), layout['zoom'])
+        elif group == 'stats':
+            steps, speed_str = values
+            for box, value in zip(layout['boxes'], (f"{steps:,}", speed_str)):
+                value_surf = text(MED_FONT, value, ACCENT)
+                surf.blit(value_surf, (box.x + (box.w - value_surf.get_width()) // 2, box.y + 10))
+        elif group == 'timeline':
+            scrub = layout['scrub']
+            label = text(SMALL_FONT, f"Línea temporal (0 - {values[1]:,})", WHITE)
+            surf.blit(label, (scrub.x, scrub.y - 22))
+            self.draw_scrubber(surf, scrub)
+        elif group == 'info':
+            state, dir_text, sps, rule, phase, status = values
+            x, y = layout['scrub'].x, layout['info'].y
+            for i, line in enumerate(("Estado: " + state, dir_text, f"Pasos/s: {sps:,}", "Regla: " + rule)):
+                surf.blit(text(SMALL_FONT, line, WHITE), (x, y + 20 * i))
+            y += 88
+            surf.blit(text(SMALL_FONT, "Fase: " + phase, ACCENT), (x, y))
+            y += 24
+            if status:
+                surf.blit(text(SMALL_FONT, status, WHITE), (x, y))
+        elif group == 'metrics' and values is not None:
+            pop, distinct, box, dirs, heat = values
+            total = sum(dirs) or 1
+            area = f"{box[2] - box[0]}x{box[3] - box[1]}" if box is not None else "-"
+            lines = (f"Población: {pop:,}   Visitadas: {distinct:,}",
+                     f"Área visitada: {area}" + ("   (mapa de calor)" if heat else ""),
+                     "Movimientos N/E/S/O: " + "/".join(f"{100 * v // total}" for v in dirs) + " %")
+            x, y = layout['scrub'].x, layout['metrics'].y
+            for i, line in enumerate(lines):
+                surf.blit(text(SMALL_FONT, line, WHITE), (x, y + 20 * i))
+
+    def metrics_key(self):
+        # lectura O(1) de las métricas del motor (ver langton.stats); None si no las tiene
+        st = self.engine.stats
+        if st is None:
+            return None
+        return st.population(), st.distinct(), st.bounding_box(), st.directions(), self.show_heat
+
+    def draw_scrubber(self, surface, rect):
+        pygame.draw.rect(surface, BTN_BG, rect, border_radius=7)
+        pygame.draw.rect(surface, BTN_BORDER, rect, 1, border_radius=7)
+        if self.max_seen <= 0:
+            return
+        frac = min(1.0, self.engine.steps / self.max_seen)
+        fill = pygame.Rect(rect.x, rect.y, max(rect.h, int(rect.w * frac)), rect.h)
+        pygame.draw.rect(surface, PANEL_ACCENT, fill, border_radius=7)
+        if self.seek_target is not None:
+            tx = rect.x + int(rect.w * self.seek_target / self.max_seen)
+            pygame.draw.line(surface, WHITE, (tx, rect.y - 3), (tx, rect.bottom + 2), 2)
+        pygame.draw.circle(surface, ACCENT, (rect.x + int(rect.w * frac), rect.centery), rect.h // 2 + 2)
+
+    def draw_button(self, surface, rect, label, icon_type=None):
+        pygame.draw.rect(surface, BTN_BG, rect, border_radius=8)
+        pygame.draw.rect(surface, BTN_BORDER, rect, 2, border_radius=8)
+        if icon_type:
+            ix = rect.x + 10
+            cy = rect.y + rect.h // 2
+            if icon_type == 'play':
+                pts = [(ix, cy - 8), (ix, cy + 8), (ix + 14, cy)]
+                pygame.draw.polygon(surface, ACCENT, pts)
+            elif icon_type == 'pause':
+                pygame.draw.rect(surface, ACCENT, (ix, cy - 8, 5, 16))
+                pygame.draw.rect(surface, ACCENT, (ix + 8, cy - 8, 5, 16))
+            elif icon_type == 'step':
+                pygame.draw.polygon(surface, ACCENT, [(ix, cy - 8), (ix, cy + 8), (ix + 10, cy)])
+                pygame.draw.rect(surface, ACCENT, (ix + 12, cy - 10, 2, 20))
+            elif icon_type == 'reset':
+                pygame.draw.circle(surface, ACCENT, (ix + 8, cy), 9, 2)
+                pygame.draw.polygon(surface, ACCENT, [(ix + 8, cy - 9), (ix + 8, cy - 3), (ix + 12, cy - 3)])
+            elif icon_type == 'zoom_in':
+                pygame.draw.circle(surface, ACCENT, (ix + 8, cy), 7, 2)
+                pygame.draw.line(surface, ACCENT, (ix + 8, cy - 3), (ix + 8, cy + 3), 2)
+                pygame.draw.line(surface, ACCENT, (ix + 5, cy), (ix + 11, cy), 2)
+            elif icon_type == 'zoom_out':
+                pygame.draw.circle(surface, ACCENT, (ix + 8, cy), 7, 2)
+                pygame.draw.line(surface, ACCENT, (ix + 5, cy), (ix + 11, cy), 2)
+            elif icon_type == 'faster':
+                pygame.draw.polygon(surface, ACCENT, [(ix, cy+8), (ix+10, cy), (ix, cy-8)])
+                pygame.draw.polygon(surface, ACCENT, [(ix+8, cy+8), (ix+18, cy), (ix+8, cy-8)])
+            elif icon_type == 'slower':
+                pygame.draw.polygon(surface, ACCENT, [(ix+18, cy+8), (ix+8, cy), (ix+18, cy-8)])
+            elif icon_type == 'step_back':
+                pygame.draw.polygon(surface, ACCENT, [(ix + 14, cy - 8), (ix + 14, cy + 8), (ix + 4, cy)])
+                pygame.draw.rect(surface, ACCENT, (ix, cy - 10, 2, 20))
+            elif icon_type == 'reverse':
+                pygame.draw.polygon(surface, ACCENT, [(ix + 14, cy - 8), (ix + 14, cy + 8), (ix, cy)])
+            elif icon_type == 'save':
+                pygame.draw.rect(surface, ACCENT, (ix, cy - 8, 16, 16), 2)
+                pygame.draw.rect(surface, ACCENT, (ix + 4, cy - 8, 8, 5))
+            elif icon_type == 'load':
+                pygame.draw.rect(surface, ACCENT, (ix, cy - 4, 16, 12), 2)
+                pygame.draw.polygon(surface, ACCENT, [(ix + 8, cy - 10), (ix + 3, cy - 4), (ix + 13, cy - 4)])
+            text_surf = self.text_cache.render(SMALL_FONT, label, WHITE)
+            surface.blit(text_surf, (rect.x + 44, rect.y + (rect.h - text_surf.get_height()) // 2))
+        else:
+            text_surf = self.text_cache.render(SMALL_FONT, label, WHITE)
+            surface.blit(text_surf, (rect.x + (rect.w - text_surf.get_width()) // 2,
+                                     rect.y + (rect.h - text_surf.get_height()) // 2))
+
+    def track_trail(self, dirty):
+        # últimas DETECT_WINDOW celdas visitadas; una edición masiva rompe la trayectoria
+        if dirty is None or self.multi_ant:
+            self.trail = []
+            self.highway = None
+            return
+        self.trail.extend(dirty[-DETECT_WINDOW:])
+        del self.trail[:-DETECT_WINDOW]
+
+    def get_phase(self):
+        # fase real: autopista confirmada por periodicidad de la trayectoria, si no, caótica
+        if self.highway is not None:
+            return f"AUTOPISTA (periodo {self.highway[0]})"
+        return "CAÓTICA"
+
+    # ---------------- Eventos ----------------
+    def handle_event(self, event):
+        if event.type == pygame.QUIT:
+            self.stop_worker()
+            pygame.quit()
+            sys.exit()
+
+        # cualquier evento salvo mover el ratón sin arrastrar puede cambiar lo que se ve
+        if event.type != pygame.MOUSEMOTION or self.dragging or self.scrubbing or self.help_open:
+            self.frame_dirty = True
+        if self.help_open and self.handle_help_event(event):
+            return
+
+        if event.type == pygame.VIDEORESIZE:
+            self.window_w, self.window_h = event.w, event.h
+            self.screen = pygame.display.set_mode((self.window_w, self.window_h), pygame.RESIZABLE)
+            self.needs_full_redraw = True
+            self.limit_pan()
+
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button == 1:  # click izquierdo
+                mx, my = event.pos
+                if self.scrub_rect is not None and self.scrub_rect.inflate(0, 10).collidepoint(mx, my):
+                    self.scrubbing = True
+                    self.scrub_to(mx)
+                    return
+                # comprobar botones en panel
+                for name, rect in self.buttons.items():
+                    if rect.collidepoint(mx, my):
+                        self.handle_action(name)
+                        return
+                # si clic en canvas, alternar celda
+                if mx < self.window_w - self.controls_width():
+                    gx, gy = self.screen_to_grid(mx, my)
+                    self.engine.toggle_cell(gx, gy)
+            elif event.button == 3:  # click derecho -> comenzar drag pan
+                self.dragging = True
+                self.last_drag_pos = event.pos
+            # ruedas (compatibilidad)
+            elif event.button == 4:  # rueda arriba
+                self.zoom_at(event.pos, zoom_in=True)
+            elif event.button == 5:  # rueda abajo
+                self.zoom_at(event.pos, zoom_in=False)
+
+        elif event.type == pygame.MOUSEBUTTONUP:
+            if event.button == 3:
+                self.dragging = False
+                self.last_drag_pos = None
+            elif event.button == 1:
+                self.scrubbing = False
+
+        elif event.type == pygame.MOUSEMOTION and self.scrubbing:
+            self.scrub_to(event.pos[0])
+
+        elif event.type == pygame.MOUSEMOTION and self.dragging:
+            x, y = event.pos
+            lx, ly = self.last_drag_pos
+            dx, dy = x - lx, y - ly
+            self.pan_x += dx
+            self.pan_y += dy
+            self.limit_pan()
+            self.last_drag_pos = (x, y)
+
+        elif event.type == pygame.MOUSEWHEEL:
+            # evento moderno de rueda
+            mx, my = pygame.mouse.get_pos()
+            if mx < self.window_w - self.controls_width():
+                if event.y > 0:
+                    self.zoom_at((mx, my), zoom_in=True)
+                else:
+                    self.zoom_at((mx, my), zoom_in=False)
+
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_SPACE:
+                self.is_running = not self.is_running
+            elif event.key == pygame.K_RIGHT:
+                self.engine.step()
+            elif event.key == pygame.K_LEFT:
+                self.step_back()
+            elif event.key == pygame.K_b:
+                self.toggle_reverse()
+            elif event.key == pygame.K_r:
+                self.reset()
+            elif event.key == pygame.K_s:
+                self.save_checkpoint()
+            elif event.key == pygame.K_l:
+                self.load_checkpoint()
+            elif event.key == pygame.K_m:
+                self.toggle_heat()
+            elif event.key == pygame.K_F3:
+                self.show_hud = not self.show_hud
+                self.hud_surf = None
+            elif event.key == pygame.K_F4:
+                self.dump_profile()
+            elif event.key == pygame.K_h:
+                # mostrar la ayuda superpuesta (no bloquea la simulación)
+                self.toggle_help()
+            elif event.key == pygame.K_EQUALS or event.key == pygame.K_PLUS:
+                self.speed = min(TURBO_SPEED, self.speed + 1)
+            elif event.key == pygame.K_MINUS or event.key == pygame.K_UNDERSCORE:
+                self.speed = max(1, self.speed - 1)
+
+    def handle_action(self, name):
+        if name == 'play':
+            self.is_running = True
+        elif name == 'pause':
+            self.is_running = False
+        elif name == 'step':
+            self.engine.step()
+        elif name == 'reset':
+            self.reset()
+        elif name == 'step_back':
+            self.step_back()
+        elif name == 'reverse':
+            self.toggle_reverse()
+        elif name == 'save':
+            self.save_checkpoint()
+        elif name == 'load':
+            self.load_checkpoint()
+        elif name == 'zoom_in':
+            self.zoom_at((self.window_w // 2, self.window_h // 2), zoom_in=True)
+        elif name == 'zoom_out':
+            self.zoom_at((self.window_w // 2, self.window_h // 2), zoom_in=False)
+        elif name == 'faster':
+            self.speed = min(TURBO_SPEED, self.speed + 1)
+        elif name == 'slower':
+            self.speed = max(1, self.speed - 1)
+        elif name == 'help':
+            self.toggle_help()
+
+    # ---------------- Ayuda (capa superpuesta, no bloqueante) ----------------
+    def toggle_help(self):
+        self.help_open = not self.help_open
+        self.help_scroll = 0
+        self.frame_dirty = True
+
+    def help_layer(self):
+        # velo, marco y texto de la ayuda renderizados una sola vez por tamaño de ventana: con la ayuda
+        # abierta cada frame cuesta tres blits y la simulación sigue corriendo debajo
+        key = (self.window_w, self.window_h)
+        if self.help_cache is not None and self.help_cache[0] == key:
+            return self.help_cache[1]
+        modal_w = min(self.window_w - 160, 820)
+        modal_h = min(self.window_h - 160, 640)
+
+        # Fondo oscuro semitransparente
+        overlay = pygame.Surface((self.window_w, self.window_h), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 180))
+
+        # Marco del modal
+        modal = pygame.Surface((modal_w, modal_h))
+        modal.fill(HELP_MODAL_COLOR)
+        pygame.draw.rect(modal, HELP_BORDER_COLOR, modal.get_rect(), 3, border_radius=12)
+
+        padding = 24
+        inner_w = modal_w - padding * 2
+        inner_h = modal_h - padding * 2
+
+        # Texto sobre el área scrollable, ajustada al alto real del contenido. Las líneas se renderizan
+        # una sola vez: al cambiar el tamaño de la ventana sólo se recompone el modal
+        if self.help_text is None:
+            title, body = FONTS.get(HELP_TITLE_FONT), FONTS.get(HELP_BODY_FONT)
+            self.help_text = [(title if i == 0 else body).render(ln, True, (230, 230, 240))
+                              for i, ln in enumerate(HELP_LINES)]
+        rendered = self.help_text
+        real_h = sum(txt.get_height() + 10 for txt in rendered) + 20
+        content = pygame.Surface((inner_w, real_h))
+        content.fill(HELP_CONTENT_COLOR)
+        y = 0
+        for txt in rendered:
+            content.blit(txt, (10, y))
+            y += txt.get_height() + 10
+
+        modal_rect = modal.get_rect(center=(self.window_w // 2, self.window_h // 2))
+        view = pygame.Rect(modal_rect.x + padding, modal_rect.y + padding, inner_w, inner_h)
+        layer = (overlay, modal, modal_rect, content, view, max(0, real_h - inner_h))
+        self.help_cache = (key, layer)
+        return layer
+
+    def draw_help(self):
+        overlay, modal, modal_rect, content, view, max_scroll = self.help_layer()
+        self.help_scroll = min(self.help_scroll, max_scroll)
+        self.screen.blit(overlay, (0, 0))
+        self.screen.blit(modal, modal_rect.topleft)
+        self.screen.blit(content, view.topleft, pygame.Rect(0, self.help_scroll, view.w, view.h))
+
+    def handle_help_event(self, event):
+        # con la ayuda abierta el ratón es suyo (rueda: desplazar; clic: cerrar) y H / ESC la cierran;
+        # el resto del teclado sigue controlando la simulación. Devuelve True si consume el evento
+        max_scroll = self.help_layer()[-1]
+        if event.type == pygame.KEYDOWN and event.key in (pygame.K_h, pygame.K_ESCAPE):
+            self.toggle_help()
+            return True
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button == 1:
+                self.toggle_help()
+            elif event.button == 4:
+                self.help_scroll = max(0, self.help_scroll - 40)
+            elif event.button == 5:
+                self.help_scroll = min(max_scroll, self.help_scroll + 40)
+            return True
+        if event.type == pygame.MOUSEWHEEL:
+            step = -40 if event.y > 0 else 40
+            self.help_scroll = max(0, min(max_scroll, self.help_scroll + step))
+            return True
+        return event.type in (pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION)
+
+    def enable_stats(self):
+        # RunStats rechaza colonias y mundo sin bordes; en rejillas de más de HEATMAP_MAX_CELLS celdas
+        # sólo lleva los contadores, sin mapa de visitas. El proceso de simulación se cierra antes para
+        # que el siguiente turbo aloje las métricas en su memoria compartida. Cuentan desde el paso actual
+        self.stop_worker()
+        try:
+            self.engine.enable_stats()
+        except ValueError as exc:
+            self.status = f"Sin mapa de calor: {exc}"
+            return False
+        return True
+
+    def toggle_heat(self):
+        if self.engine.stats is None and not self.enable_stats():
+            return
+        if self.engine.stats.visits is None:
+            # las métricas quedan activas (panel), pero la rejilla es demasiado grande para el mapa
+            self.status = (f"Sin mapa de calor: más de {HEATMAP_MAX_CELLS:,} celdas "
+                           f"(el panel sí muestra las métricas)")
+            return
+        self.show_heat = not self.show_heat
+        self.needs_full_redraw = True
+
+    def reset(self):
+        self.engine.reset()
+        self.engine.take_dirty()
+        self.needs_full_redraw = True
+        self.is_running = False
+        self.reverse = False
+        self.seek_target = None
+        self.max_seen = 0
+        self.zoom_idx = 2
+        self.lod_zoom = None
+        self.pyramid = None
+        self.pan_x = 0
+        self.pan_y = 0
+        self.update_sizes()
+
+    # ---------------- Checkpoints ----------------
+    def save_checkpoint(self):
+        try:
+            save(self.engine, CHECKPOINT_PATH)
+            self.status = f"Guardado: {self.engine.steps:,} pasos"
+        except (OSError, ValueError) as exc:
+            self.status = f"Error al guardar: {exc}"
+
+    def load_checkpoint(self):
+        try:
+            engine = load(CHECKPOINT_PATH)
+        except (OSError, ValueError) as exc:
+            self.status = f"Error al cargar: {exc}"
+            return
+        # el motor cargado sustituye al actual (puede cambiar regla, tamaño o número de hormigas); las
+        # métricas siguen activas si lo estaban
+        self.stop_worker()
+        self.lost_rect = None  # eran del motor anterior
+        had_stats = self.engine.stats is not None
+        self.engine = engine
+        self.engine.enable_dirty_log()
+        if not had_stats or not self.enable_stats() or self.engine.stats.visits is None:
+            self.show_heat = False
+        self.palette = color_ramp(engine.rule.n_colors, GRID_BG, CELL_COLOR)
+        self.pyramid = None
+        if not engine.bounded:
+            self.lod_zoom = None  # sin pirámide de densidad
+        self.multi_ant = len(engine.ants()[0]) > 1
+        self.trail = []
+        self.highway = None
+        self.sps_steps = engine.steps
+        self.max_seen = engine.steps
+        self.reverse = False
+        self.seek_target = None
+        self.is_running = False
+        self.needs_full_redraw = True
+        self.update_sizes()
+        self.status = f"Cargado: {engine.steps:,} pasos"
+
+    # ---------------- Retroceso ----------------
+    def can_reverse(self):
+        if not self.engine.reversible:
+            self.status = f"La regla {self.engine.rule.name} no es reversible"
+            return False
+        return True
+
+    def step_back(self):
+        if self.can_reverse():
+            self.engine.step_back()
+
+    def toggle_reverse(self):
+        if self.reverse or self.can_reverse():
+            self.reverse = not self.reverse
+
+    def scrub_to(self, mx):
+        # fija el paso objetivo según la posición del ratón; run_seek lo alcanza en varios frames
+        if self.max_seen <= 0 or not self.can_reverse():
+            return
+        frac = min(1.0, max(0.0, (mx - self.scrub_rect.x) / self.scrub_rect.w))
+        self.seek_target = int(round(frac * self.max_seen))
+
+    def run_seek(self):
+        deadline = time.perf_counter() + TURBO_BUDGET
+        while self.engine.steps != self.seek_target and time.perf_counter() < deadline:
+            delta = max(-TURBO_CHUNK, min(TURBO_CHUNK, self.seek_target - self.engine.steps))
+            self.engine.seek(self.engine.steps + delta)
+        if self.engine.steps == self.seek_target:
+            self.seek_target = None
+
+    # ---------------- Simulación ----------------
+    def sim_step(self):
+        # un paso en el sentido de reproducción actual; hacia atrás se detiene al llegar al paso 0
+        if not self.reverse:
+            self.engine.step()
+        elif self.engine.steps > 0:
+            self.engine.step_back()
+        else:
+            self.is_running = False
+
+    def run_turbo(self):
+        worker = self.start_worker()
+        if worker is not None:
+            # el proceso simula a su ritmo: aquí sólo se recoge el último estado publicado
+            worker.play(self.reverse)
+            if not worker.sync():
+                self.is_running = False  # hacia atrás llegó al paso 0
+            return
+        # meter tantos lotes de pasos como quepan en el presupuesto del frame
+        deadline = time.perf_counter() + TURBO_BUDGET
+        move = self.engine.retreat if self.reverse else self.engine.advance
+        while time.perf_counter() < deadline:
+            if self.reverse and self.engine.steps == 0:
+                self.is_running = False
+                break
+            move(TURBO_CHUNK)
+
+    def update_sps(self):
+        now = time.perf_counter()
+        elapsed = now - self.sps_time
+        if elapsed >= 0.5:
+            self.sps = abs(self.engine.steps - self.sps_steps) / elapsed
+            self.sps_time = now
+            self.sps_steps = self.engine.steps
+            self.highway = trajectory_period(self.engine, self.trail)
+
+    # ---------------- Proceso de simulación ----------------
+    def start_worker(self):
+        if self.worker is None and self.use_worker and SimWorker.supports(self.engine):
+            self.worker = SimWorker(self.engine)
+        return self.worker
+
+    def pause_worker(self):
+        # el proceso devuelve el estado de la hormiga: a partir de aquí el visor puede tocar el motor
+        if self.worker is not None:
+            self.worker.pause()
+
+    def stop_worker(self):
+        if self.worker is not None:
+            self.worker.close()
+            self.lost_rect = merge_rect(self.lost_rect, self.worker.take_lost())
+            self.worker = None
+
+    def take_lost(self):
+        # rectángulo (x0, y0, x1, y1) con celdas que el proceso cambió sin que cupieran en su anillo de
+        # celdas sucias (ver SimWorker.take_lost), o None; el resto de la trayectoria sigue en el registro
+        rect, self.lost_rect = self.lost_rect, None
+        if self.worker is not None:
+            rect = merge_rect(rect, self.worker.take_lost())
+        return rect
+
+    # ---------------- Loop principal ----------------
+    def idle_timeout(self):
+        # None si hay que animar a FPS; si no, ms que se puede dormir esperando eventos: hasta el
+        # siguiente paso a velocidad lenta, o IDLE_TIMEOUT en pausa
+        if self.frame_dirty or self.seek_target is not None:
+            return None
+        if self.is_running:
+            if self.speed == TURBO_SPEED:
+                return None
+            wait = self.last_update + self.step_period() - time.time()
+            return None if wait * 1000 < 1000 / FPS else int(wait * 1000)
+        return IDLE_TIMEOUT
+
+    def step_period(self):
+        return max(0.02, 1.1 - self.speed * 0.1)
+
+    def run(self):
+        clock = pygame.time.Clock()
+        prof = self.profiler
+        while True:
+            prof.start()
+            timeout = self.idle_timeout()
+            if timeout is None:
+                clock.tick(FPS)
+                events = pygame.event.get()
+            else:
+                # nada que animar: el proceso duerme en event.wait hasta una entrada o hasta timeout
+                first = pygame.event.wait(timeout)
+                events = pygame.event.get()
+                if first.type != pygame.NOEVENT:
+                    events.insert(0, first)
+            prof.mark("wait")
+            if any(event.type not in VIEW_EVENTS for event in events):
+                self.pause_worker()
+            for event in events:
+                self.handle_event(event)
+            prof.mark("events")
+
+            # actualizar simulación segun velocidad (el turbo puede ir en el proceso de simulación)
+            if not (self.is_running and self.speed == TURBO_SPEED and self.seek_target is None):
+                self.pause_worker()
+            steps = self.engine.steps
+            now = time.time()
+            if self.seek_target is not None:
+                self.run_seek()
+            elif self.is_running and self.speed == TURBO_SPEED:
+                self.run_turbo()
+                self.last_update = now
+            elif self.is_running and (now - self.last_update) >= self.step_period():
+                self.sim_step()
+                self.last_update = now
+            sps = self.sps
+            self.update_sps()
+            if (self.engine.steps != steps or self.engine.dirty or self.engine.dirty_all
+                    or self.sps != sps or self.seek_target is not None):
+                self.frame_dirty = True
+            prof.mark("sim")
+
+            # dibujar sólo si algo cambió
+            if self.frame_dirty:
+                self.frame_dirty = False
+                self.draw()
+                prof.end(self.engine.steps)
+
+# ---------------- Ejecutar ----------------
+if __name__ == "__main__":
+    app = LangtonsAntApp((1300, 820))
+    app.run()
+
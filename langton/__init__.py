@@ -0,0 +1,10 @@
+from .bitpacked import BitPackedEngine
+from .chunked import ChunkedGrid, UnboundedEngine
+from .colony import Colony
+from .engine import DIR_NAMES, GRID_H, GRID_W, LangtonEngine
+from .ensemble import Ensemble
+from .macro import MacroStepper
+from .rules import CLASSIC, Rule, parse_rule
+
+__all__ = ["BitPackedEngine", "CLASSIC", "ChunkedGrid", "Colony", "DIR_NAMES", "Ensemble", "GRID_H",
+           "GRID_W", "LangtonEngine", "MacroStepper", "Rule", "UnboundedEngine", "parse_rule"]
@@ -0,0 +1,266 @@
+import argparse
+import contextlib
+import sys
+import time
+
+from .bitpacked import BitPackedEngine
+from .checkpoint import load, save
+from .chunked import UnboundedEngine
+from .colony import ORDERS, Colony
+from .engine import DIR_NAMES, GRID_H, GRID_W, LangtonEngine
+from .ensemble import Ensemble
+from .frames import export_frames
+from .macro import MacroStepper
+from .stats import HEATMAP_MAX_CELLS
+from .trajectory import export_trajectory
+
+# ---------------- Config ----------------
+# presupuesto de --startup-time: ms desde importar el visor hasta el primer frame dibujado
+STARTUP_BUDGET = 1000.0
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(prog="python -m langton",
+                                description="Hormiga de Langton: visor pygame o simulación sin pantalla")
+    p.add_argument("--steps", type=float, default=0,
+                   help="pasos a simular en modo headless (admite notación 1e8)")
+    p.add_argument("--headless", action="store_true",
+                   help="simular sin abrir ventana (no importa pygame)")
+    p.add_argument("--width", type=int, default=GRID_W)
+    p.add_argument("--height", type=int, default=GRID_H)
+    p.add_argument("--rule", default="RL",
+                   help="regla de giros (RL, RLR, LLRR...) o tabla de turmite {{{escribe,giro,estado},...}}")
+    p.add_argument("--fast-forward", action="store_true",
+                   help="detectar la autopista y saltarla analíticamente en lugar de simular cada paso. "
+                        "Aún estampa cada celda de la estela: con --unbounded, ~1 GB a 1e8 pasos y 1e9 no "
+                        "cabe en memoria")
+    p.add_argument("--macro", type=int, default=0, metavar="K",
+                   help="avanzar con macro-pasos memoizados sobre bloques K x K (caché LRU). Sólo compensa "
+                        "en autopistas largas de RL con --unbounded; en rejilla fija o durante el "
+                        "transitorio es 2-4 veces más lento que el avance normal")
+    p.add_argument("--ensemble", type=int, default=0, metavar="N",
+                   help="simular N réplicas independientes en lote y resumir los pasos hasta la autopista")
+    p.add_argument("--density", type=float, default=0.0,
+                   help="densidad del ruido inicial aleatorio (modo --ensemble)")
+    p.add_argument("--noise-box", type=int, default=None,
+                   help="lado del cuadrado central con ruido (por defecto toda la rejilla)")
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--unbounded", action="store_true",
+                   help="mundo sin bordes por teselas en lugar de rejilla fija con wrap-around")
+    p.add_argument("--bitpacked", action="store_true",
+                   help="rejilla fija a 1 bit por celda (8 veces menos memoria; sólo reglas de 2 colores)")
+    p.add_argument("--ants", type=int, default=1, metavar="N",
+                   help="número de hormigas (la primera en el centro, el resto al azar según --seed)")
+    p.add_argument("--order", choices=ORDERS, default="sequential",
+                   help="orden de actualización de una colonia de hormigas")
+    p.add_argument("--resume", metavar="FICHERO",
+                   help="continuar desde un checkpoint (las rejillas grandes se mapean con mmap)")
+    p.add_argument("--autosave", metavar="FICHERO",
+                   help="guardar un checkpoint periódico en modo headless")
+    p.add_argument("--autosave-every", type=float, default=1e6, metavar="N",
+                   help="pasos entre autosaves (por defecto 1e6)")
+    p.add_argument("--trace", metavar="FICHERO",
+                   help="exportar la trayectoria (paso, x, y, dirección, color) en modo headless")
+    p.add_argument("--stats", action="store_true",
+                   help="mantener métricas incrementales (población, área y celdas visitadas, "
+                        "direcciones) y mostrarlas en el resumen o en el panel del visor (sin --stats el "
+                        "visor las activa al pulsar M). Valen para cualquier rejilla fija, también "
+                        "--bitpacked; el mapa de visitas por celda (mapa de calor del visor) sólo existe "
+                        f"hasta {HEATMAP_MAX_CELLS:,} celdas")
+    p.add_argument("--frames", metavar="DESTINO",
+                   help="exportar fotogramas en modo headless: directorio de PNG, o fichero .rgb / '-' "
+                        "(stdout) con RGB crudo para un codificador (ffmpeg -f rawvideo -pix_fmt rgb24)")
+    p.add_argument("--frame-every", type=float, default=0, metavar="K",
+                   help="un fotograma cada K pasos")
+    p.add_argument("--frame-count", type=int, default=100, metavar="N",
+                   help="fotogramas repartidos a lo largo de la simulación si no se da --frame-every")
+    p.add_argument("--no-worker", action="store_true",
+                   help="en el visor, simular el turbo en el mismo bucle que el dibujo (sin proceso aparte)")
+    p.add_argument("--startup-time", action="store_true",
+                   help="medir el arranque del visor (importación, creación, primer frame y primera "
+                        "apertura de la ayuda) y salir; código 1 si supera --startup-budget")
+    p.add_argument("--startup-budget", type=float, default=STARTUP_BUDGET, metavar="MS",
+                   help="presupuesto de arranque en ms para --startup-time (por defecto 1000)")
+    p.add_argument("--zoom", type=float, default=1.0,
+                   help="zoom de los fotogramas, como en el visor (1.0 = 8 px por celda; <1 reduce)")
+    args = p.parse_args(argv)
+    if args.ants > 1 and (args.unbounded or args.macro or args.fast_forward or args.ensemble):
+        p.error("--ants sólo admite la rejilla fija sin --unbounded, --macro, --fast-forward ni --ensemble")
+    if args.bitpacked and (args.unbounded or args.macro or args.ants > 1 or args.ensemble):
+        p.error("--bitpacked no se combina con --unbounded, --macro, --ants ni --ensemble")
+    if args.trace and (args.ants > 1 or args.macro or args.fast_forward or args.ensemble or args.autosave):
+        p.error("--trace registra cada paso de una sola hormiga: no se combina con --ants, --macro, "
+                "--fast-forward, --ensemble ni --autosave")
+    if args.stats and (args.ants > 1 or args.unbounded or args.macro or args.fast_forward or args.ensemble):
+        p.error("--stats cuenta cada paso de una sola hormiga en rejilla fija: no se combina con --ants, "
+                "--unbounded, --macro, --fast-forward ni --ensemble")
+    if args.startup_time and (args.headless or args.ensemble):
+        p.error("--startup-time mide el arranque del visor: no se combina con --headless ni --ensemble")
+    if args.frames and (args.trace or args.macro or args.ensemble or args.autosave):
+        p.error("--frames no se combina con --trace, --macro, --ensemble ni --autosave")
+    return args
+
+
+def make_engine(args):
+    if args.resume:
+        try:
+            return load(args.resume, kind='bitpacked' if args.bitpacked else None)
+        except (OSError, ValueError) as exc:
+            sys.exit(f"error: {exc}")
+    if args.ants > 1:
+        return Colony(args.width, args.height, rule=args.rule, n_ants=args.ants, order=args.order,
+                      seed=args.seed)
+    if args.bitpacked:
+        try:
+            return BitPackedEngine(args.width, args.height, rule=args.rule)
+        except ValueError as exc:
+            sys.exit(f"error: {exc}")
+    cls = UnboundedEngine if args.unbounded else LangtonEngine
+    return cls(args.width, args.height, rule=args.rule)
+
+
+def enable_stats(engine):
+    # --stats: RunStats rechaza las reglas con más de 256 transiciones
+    try:
+        engine.enable_stats()
+    except ValueError as exc:
+        sys.exit(f"error: {exc}")
+
+
+def run_headless(args, frame_stream=None):
+    engine = make_engine(args)
+    if args.stats:
+        enable_stats(engine)
+    n = int(args.steps)
+    t0 = time.perf_counter()
+    stepper = MacroStepper(engine, block=args.macro) if args.macro else None
+    # con --autosave se avanza por tramos y se guarda el checkpoint al final de cada uno
+    chunk = max(1, int(args.autosave_every)) if args.autosave else n
+    target = engine.steps + n
+    writer = exporter = None
+    if args.trace:
+        writer = export_trajectory(engine, n, args.trace)
+    elif args.frames:
+        raw = args.frames == "-" or args.frames.endswith((".rgb", ".raw"))
+        out = frame_stream if args.frames == "-" else args.frames
+        exporter = export_frames(engine, n, out, every=int(args.frame_every), frames=args.frame_count,
+                                 fmt="raw" if raw else "png", zoom=args.zoom,
+                                 fast_forward=args.fast_forward)
+    else:
+        while True:
+            todo = min(chunk, target - engine.steps)
+            if stepper is not None:
+                stepper.run(todo)
+            else:
+                engine.run(todo, fast_forward=args.fast_forward)
+            if args.autosave:
+                save(engine, args.autosave)
+            if engine.steps >= target:
+                break
+    elapsed = time.perf_counter() - t0
+    rate = n / elapsed if elapsed > 0 else float("inf")
+    print(f"pasos: {engine.steps:,}")
+    print(f"regla: {engine.rule.name}")
+    print(f"hormiga: x={engine.ant_x} y={engine.ant_y} dir={DIR_NAMES[engine.ant_dir]} estado={engine.ant_state}")
+    if isinstance(engine, Colony):
+        print(f"hormigas: {engine.n_ants:,} ({engine.order})")
+    population = engine.stats.population() if engine.stats is not None else engine.population()
+    print(f"población: {population:,}")
+    if engine.stats is not None:
+        st = engine.stats
+        box = st.bounding_box()
+        area = f"{box[2] - box[0]}x{box[3] - box[1]} en ({box[0]}, {box[1]})" if box is not None else "-"
+        dirs = " ".join(f"{name}={v:,}" for name, v in zip("NESO", st.directions()))
+        print(f"visitadas: {st.distinct():,} celdas distintas, área {area}")
+        print(f"movimientos: {dirs}")
+    if isinstance(engine, BitPackedEngine):
+        print(f"rejilla: {engine.nbytes() / 2**20:.1f} MiB (1 bit por celda)")
+    if not engine.bounded:
+        print(f"teselas: {len(engine.world.tiles)} ({engine.world.nbytes() / 2**20:.1f} MiB)")
+    if stepper is not None:
+        st = stepper.stats()
+        print(f"caché macro: {st['entries']:,} entradas, {st['hits']:,} aciertos, {st['misses']:,} fallos, "
+              f"{st['evictions']:,} desalojos ({st['hit_rate']:.1%})")
+    if args.autosave:
+        print(f"checkpoint: {args.autosave}")
+    if writer is not None:
+        print(f"trayectoria: {args.trace} ({writer.steps:,} pasos, {len(writer.index)} bloques)")
+    if exporter is not None:
+        h, w = exporter.shape
+        print(f"fotogramas: {exporter.count:,} de {w}x{h} en {args.frames} "
+              f"({exporter.bytes / 2**20:.1f} MiB)")
+    print(f"tiempo: {elapsed:.3f} s ({rate:,.0f} pasos/s)")
+    return engine
+
+
+def run_ensemble(args):
+    ens = Ensemble(args.ensemble, args.width, args.height, rule=args.rule, density=args.density,
+                   noise_box=args.noise_box, seed=args.seed)
+    t0 = time.perf_counter()
+    summary = ens.run(int(args.steps))
+    elapsed = time.perf_counter() - t0
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+    print(f"tiempo: {elapsed:.3f} s ({ens.steps.sum() / max(elapsed, 1e-9):,.0f} pasos-réplica/s)")
+    return ens
+
+
+def measure_startup(args):
+    # tiempos del arranque en frío del visor, cada fase por separado. La importación incluye pygame y
+    # SDL; las fuentes se abren al dibujar el primer frame (ver hormiga_langton.FontCache)
+    clock = time.perf_counter
+    t0 = clock()
+    import hormiga_langton
+    t1 = clock()
+    app = hormiga_langton.LangtonsAntApp((1300, 820), engine=make_engine(args), worker=not args.no_worker)
+    t2 = clock()
+    app.draw()
+    t3 = clock()
+    app.toggle_help()
+    app.draw()
+    t4 = clock()
+    phases = {'importación': t1 - t0, 'creación': t2 - t1, 'primer frame': t3 - t2, 'ayuda': t4 - t3}
+    for name, t in phases.items():
+        print(f"{name:<13} {t * 1e3:8.1f} ms")
+    total = (t3 - t0) * 1e3
+    print(f"{'total':<13} {total:8.1f} ms (presupuesto {args.startup_budget:,.0f} ms, sin la ayuda)")
+    fonts = hormiga_langton.FONTS
+    origin = "búsqueda en las fuentes del sistema" if fonts.scanned else f"caché {fonts.path}"
+    print(f"fuentes: {len(fonts.fonts)} en {fonts.load_time * 1e3:.1f} ms ({origin})")
+    app.stop_worker()
+    return 0 if total <= args.startup_budget else 1
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.ensemble:
+        run_ensemble(args)
+        return 0
+    if args.headless:
+        # con --frames - el flujo RGB ocupa stdout: el resumen va a stderr
+        stream = sys.stdout.buffer
+        with contextlib.redirect_stdout(sys.stderr if args.frames == "-" else sys.stdout):
+            run_headless(args, frame_stream=stream)
+        return 0
+
+    if args.startup_time:
+        return measure_startup(args)
+
+    # El visor sólo se importa aquí para que el modo headless no arranque SDL
+    from hormiga_langton import LangtonsAntApp
+    # los pasos previos antes de crear el visor: con su registro de celdas sucias activo cada paso
+    # quedaría anotado hasta el primer frame
+    engine = make_engine(args)
+    if args.stats:
+        enable_stats(engine)  # antes de los pasos previos, que así también cuentan
+    if args.macro:
+        MacroStepper(engine, block=args.macro).run(int(args.steps))
+    else:
+        engine.run(int(args.steps), fast_forward=args.fast_forward)
+    app = LangtonsAntApp((1300, 820), engine=engine, worker=not args.no_worker)
+    app.run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+from .bitpacked import BitPackedEngine
+from .chunked import UnboundedEngine
+from .engine import LangtonEngine
+from .raster import ZOOM_LEVELS
+from .rules import parse_rule
+
+# ---------------- Config ----------------
+STEP_COUNTS = (1, 100, 10_000, 1_000_000)       # pasos por llamada a advance()
+STEP_ENGINES = ("grid", "grid+dirty", "grid+stats", "bitpacked", "unbounded")
+STEP_RULES = ("RL", "LLRR")
+DENSITIES = {'empty': 0.0, 'half': 0.5, 'dense': 0.9}
+WINDOW = (1300, 820)
+LOD_WORLD = 2048      # lado del mundo para el dibujo alejado (nivel de detalle): 4M celdas
+MIN_TIME = 0.2        # segundos mínimos de medida por caso (se repite la llamada hasta cubrirlos)
+MIN_CALLS = 5
+THRESHOLD = 0.10      # margen para considerar una regresión al comparar (--compare)
+
+
+# ---------------- Medida ----------------
+def measure(fn, batch=1, min_time=MIN_TIME, min_calls=MIN_CALLS):
+    # tiempos por llamada (segundos); con batch > 1 se cronometran `batch` llamadas seguidas para que
+    # el coste de perf_counter no pese en llamadas muy cortas
+    times = []
+    clock = time.perf_counter
+    start = clock()
+    while len(times) < min_calls or clock() - start < min_time:
+        t = clock()
+        for _ in range(batch):
+            fn()
+        times.append((clock() - t) / batch)
+    return np.asarray(times)
+
+
+def summarize(name, times, steps=None):
+    # con `steps` (pasos por llamada) se resume la velocidad en pasos/s; sin él, el tiempo por frame
+    if steps is not None:
+        rates = steps / times
+        return {'name': name, 'unit': "steps/s", 'better': "higher", 'value': float(np.median(rates)),
+                'best': float(rates.max()), 'calls': len(times)}
+    ms = times * 1e3
+    return {'name': name, 'unit': "ms", 'better': "lower", 'value': float(np.median(ms)),
+            'p90': float(np.percentile(ms, 90)), 'p99': float(np.percentile(ms, 99)),
+            'best': float(ms.min()), 'calls': len(times)}
+
+
+# ---------------- Simulación ----------------
+def make_step_engine(kind, rule):
+    if kind == "bitpacked":
+        return BitPackedEngine(1024, 1024, rule=rule)
+    if kind == "unbounded":
+        return UnboundedEngine(1024, 1024, rule=rule)
+    engine = LangtonEngine(1024, 1024, rule=rule)
+    if kind == "grid+dirty":
+        engine.dirty = []  # registro de celdas sucias, como en el visor
+    elif kind == "grid+stats":
+        engine.enable_stats()  # métricas incrementales (langton.stats)
+    return engine
+
+
+def bench_step(min_time):
+    results = []
+    for kind in STEP_ENGINES:
+        for rule in STEP_RULES:
+            if kind == "bitpacked" and parse_rule(rule).n_colors != 2:
+                continue
+            for n in STEP_COUNTS:
+                engine = make_step_engine(kind, rule)
+
+                def step():
+                    engine.advance(n)
+                    if engine.dirty is not None:
+                        engine.dirty.clear()
+
+                batch = max(1, 1000 // n)
+                times = measure(step, batch=batch, min_time=min_time)
+                results.append(summarize(f"step/{kind}/{rule}/n={n}", times, steps=n))
+    return results
+
+
+# ---------------- Visor ----------------
+def make_app(density, seed=0, engine=None, worker=False):
+    # visor real con el driver SDL "dummy": se mide el mismo draw() sin abrir ventana
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from hormiga_langton import LangtonsAntApp
+    app = LangtonsAntApp(WINDOW, engine=engine, worker=worker)
+    if density:
+        rng = np.random.default_rng(seed)
+        app.engine.grid[:] = rng.random(app.engine.grid.shape) < density
+        app.engine.dirty_all = True
+    return app
+
+
+def bench_draw(min_time):
+    import pygame
+    results = []
+    for label, density in DENSITIES.items():
+        app = make_app(density)
+        panel = pygame.Rect(app.window_w - app.controls_width(), 0, app.controls_width(), app.window_h)
+        for idx, zoom in enumerate(ZOOM_LEVELS):
+            app.zoom_idx = idx
+            app.update_sizes()
+            app.draw()
+
+            def full():
+                app.needs_full_redraw = True
+                app.draw()
+
+            def steady():
+                # frame típico: un paso de simulación y repintado incremental de la celda sucia
+                app.engine.advance(1)
+                app.draw()
+
+            results.append(summarize(f"draw/{label}/zoom={zoom}/full", measure(full, min_time=min_time)))
+            results.append(summarize(f"draw/{label}/zoom={zoom}/steady", measure(steady, min_time=min_time)))
+        results.append(summarize(f"draw_panel/{label}", measure(lambda: app.draw_panel(panel),
+                                                               min_time=min_time)))
+    return results
+
+
+def bench_lod(min_time):
+    # mundo grande entero en pantalla: zoom continuo hasta min_zoom, dibujado desde la pirámide de densidad
+    results = []
+    for label, density in DENSITIES.items():
+        app = make_app(density, engine=LangtonEngine(LOD_WORLD, LOD_WORLD), worker=True)
+        app.lod_zoom = app.min_zoom()
+        app.update_sizes()
+        t = time.perf_counter()
+        app.draw()  # construye la pirámide
+        results.append(summarize(f"lod/{label}/build", np.asarray([time.perf_counter() - t])))
+
+        def full():
+            app.needs_full_redraw = True
+            app.draw()
+
+        def steady():
+            app.engine.advance(1)
+            app.draw()
+
+        def turbo():
+            # un lote de turbo: miles de celdas sucias por frame
+            app.engine.advance(2048)
+            app.draw()
+
+        def worker():
+            # turbo en el proceso de simulación, como en el visor: si un frame tarda, el anillo de celdas
+            # sucias se desborda y el siguiente recibe además el rectángulo de las perdidas
+            app.run_turbo()
+            app.draw()
+
+        for name, fn in (("full", full), ("steady", steady), ("turbo", turbo)):
+            results.append(summarize(f"lod/{label}/{name}", measure(fn, min_time=min_time)))
+        app.is_running = True
+        results.append(summarize(f"lod/{label}/worker", measure(worker, min_time=min_time)))
+        app.stop_worker()
+    return results
+
+
+def bench_events(min_time):
+    # latencia de zoom / pan: handle_event más el draw() que pinta el resultado
+    import pygame
+    results = []
+    for label, density in DENSITIES.items():
+        app = make_app(density)
+        app.draw()
+        center = ((app.window_w - app.controls_width()) // 2, app.window_h // 2)
+        wheel = [pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=b, pos=center) for b in (4, 5)]
+        state = {'n': 0}
+
+        def zoom():
+            app.handle_event(wheel[state['n'] & 1])
+            state['n'] += 1
+            app.draw()
+
+        results.append(summarize(f"event/{label}/zoom", measure(zoom, min_time=min_time)))
+
+        # arrastre en vaivén desde el zoom inicial y lejos de los topes de limit_pan
+        app.zoom_idx = ZOOM_LEVELS.index(1.0)
+        app.update_sizes()
+        app.pan_x, app.pan_y = -200, -200
+        state['n'] = 0
+        app.handle_event(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=3, pos=center))
+
+        def pan():
+            dx = 12 if (state['n'] // 10) & 1 else -12
+            x, y = app.last_drag_pos
+            app.handle_event(pygame.event.Event(pygame.MOUSEMOTION, pos=(x + dx, y + dx), rel=(dx, dx),
+                                                buttons=(0, 0, 1)))
+            state['n'] += 1
+            app.draw()
+
+        results.append(summarize(f"event/{label}/pan", measure(pan, min_time=min_time)))
+    return results
+
+
+# ---------------- Comparación ----------------
+def compare(base, current, threshold=THRESHOLD):
+    # casos que empeoran más que `threshold` respecto a una ejecución anterior
+    old = {r['name']: r for r in base['results']}
+    regressions = []
+    for r in current['results']:
+        o = old.get(r['name'])
+        if o is None or not o['value']:
+            continue
+        ratio = r['value'] / o['value']
+        worse = ratio < 1 - threshold if r['better'] == "higher" else ratio > 1 + threshold
+        if worse:
+            regressions.append({'name': r['name'], 'unit': r['unit'], 'before': o['value'],
+                                'after': r['value'], 'ratio': ratio})
+    return regressions
+
+
+def metadata():
+    meta = {
+        'time': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+    try:
+        import pygame
+        meta['pygame'] = pygame.version.ver
+        meta['sdl'] = ".".join(map(str, pygame.get_sdl_version()))
+    except ImportError:
+        pass
+    return meta
+
+
+# ---------------- CLI ----------------
+SUITES = {'step': bench_step, 'draw': bench_draw, 'lod': bench_lod, 'events': bench_events}
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(prog="python -m langton.bench",
+                                description="Benchmarks de simulación y dibujo (resultados en JSON)")
+    p.add_argument("--out", default="-", help="fichero JSON de resultados ('-' = stdout)")
+    p.add_argument("--only", default=",".join(SUITES),
+                   help=f"partes a ejecutar, separadas por comas ({', '.join(SUITES)})")
+    p.add_argument("--min-time", type=float, default=MIN_TIME,
+                   help="segundos mínimos de medida por caso")
+    p.add_argument("--compare", metavar="BASE",
+                   help="JSON de una ejecución anterior: lista las regresiones y sale con código 1")
+    p.add_argument("--threshold", type=float, default=THRESHOLD,
+                   help="empeoramiento relativo que cuenta como regresión (por defecto 0.10)")
+    args = p.parse_args(argv)
+    unknown = set(args.only.split(",")) - set(SUITES)
+    if unknown:
+        p.error(f"partes desconocidas: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = {'meta': metadata(), 'results': []}
+    for name in args.only.split(","):
+        t0 = time.perf_counter()
+        report['results'].extend(SUITES[name](args.min_time))
+        print(f"{name}: {time.perf_counter() - t0:.1f} s", file=sys.stderr)
+    text = json.dumps(report, indent=1)
+    if args.out == "-":
+        print(text)
+    else:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        for r in regressions:
+            print(f"REGRESIÓN {r['name']}: {r['before']:,.3f} -> {r['after']:,.3f} {r['unit']} "
+                  f"({r['ratio']:.2f}x)", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+import numpy as np
+
+from .engine import DX, DY, GRID_H, GRID_W, LangtonEngine
+from .rules import CLASSIC, parse_rule
+
+# ---------------- Config ----------------
+POPCOUNT = np.array([bin(b).count("1") for b in range(256)], dtype=np.uint8)
+POP_ROWS = 1 << 12  # filas por bloque al contar población (limita la memoria temporal)
+
+
+# ---------------- Rejilla empaquetada a 1 bit por celda ----------------
+class BitPackedEngine(LangtonEngine):
+    # Misma rejilla con wrap-around que LangtonEngine, pero cada celda ocupa un bit: la fila y usa
+    # `stride` bytes y la celda x es el bit (x & 7) del byte y * stride + (x >> 3). Sólo vale para
+    # reglas de dos colores (RL, LR, turmites de 2 colores). 10^9 celdas caben en ~125 MB.
+    def __init__(self, width=GRID_W, height=GRID_H, rule=CLASSIC):
+        self.width = width
+        self.height = height
+        self.rule = self._check_rule(rule)
+        self.stride = (width + 7) >> 3
+        self._cells = bytearray(self.stride * height)
+        self.bits = np.frombuffer(self._cells, dtype=np.uint8).reshape(height, self.stride)
+        self.grid = None
+        self.ant_x = width // 2
+        self.ant_y = height // 2
+        self.ant_dir = 0
+        self.ant_state = 0
+        self.steps = 0
+        self.dirty = None
+        self.dirty_all = False
+        self.read_log = None
+        self.stats = None
+
+    @staticmethod
+    def _check_rule(rule):
+        rule = parse_rule(rule)
+        if rule.n_colors != 2:
+            raise ValueError(f"la rejilla empaquetada sólo admite reglas de 2 colores ({rule.name} tiene "
+                             f"{rule.n_colors})")
+        return rule
+
+    def reset(self):
+        self.bits.fill(0)
+        self.ant_x = self.width // 2
+        self.ant_y = self.height // 2
+        self.ant_dir = 0
+        self.ant_state = 0
+        self.steps = 0
+        self.dirty_all = True
+        if self.stats is not None:
+            self.stats.reset()
+
+    def set_rule(self, rule):
+        self.rule = self._check_rule(rule)
+        self.reset()
+
+    def attach_cells(self, buf):
+        # `buf` con las filas empaquetadas (height * stride bytes), p. ej. un mmap de un checkpoint
+        self._cells = buf
+        self.bits = np.frombuffer(buf, dtype=np.uint8).reshape(self.height, self.stride)
+
+    # ---------------- Reglas ----------------
+    def advance(self, n):
+        # como LangtonEngine.advance, pero leyendo y volteando bits: flip[k] es 0xFF si la transición
+        # cambia el color de la celda y 0 si lo deja igual, así la escritura es un XOR sin ramas
+        if self.stats is not None and self.read_log is None:
+            return self.stats.advance(n)
+        cells = self._cells
+        w, h = self.width, self.height
+        stride = self.stride
+        x, y, d = self.ant_x, self.ant_y, self.ant_dir
+        rule = self.rule
+        turn_dir, next_base = rule.turn_dir, rule.next_base
+        flip = [0xFF if rule.write[k] != (k & 1) else 0 for k in range(len(rule.write))]
+        base = self.ant_state * 2
+        dx, dy = DX, DY
+        if self.dirty is None and self.read_log is None:
+            for _ in range(n):
+                sh = x & 7
+                i = y * stride + (x >> 3)
+                b = cells[i]
+                k = base + ((b >> sh) & 1)
+                cells[i] = b ^ ((1 << sh) & flip[k])
+                d = turn_dir[(k << 2) | d]
+                base = next_base[k]
+                x = (x + dx[d]) % w
+                y = (y + dy[d]) % h
+        elif self.read_log is not None:
+            log = self.read_log
+            for t in range(n):
+                sh = x & 7
+                i = y * stride + (x >> 3)
+                b = cells[i]
+                k = base + ((b >> sh) & 1)
+                cells[i] = b ^ ((1 << sh) & flip[k])
+                log[t] = k
+                d = turn_dir[(k << 2) | d]
+                base = next_base[k]
+                x = (x + dx[d]) % w
+                y = (y + dy[d]) % h
+        else:
+            log = self.dirty.append
+            for _ in range(n):
+                sh = x & 7
+                i = y * stride + (x >> 3)
+                b = cells[i]
+                k = base + ((b >> sh) & 1)
+                cells[i] = b ^ ((1 << sh) & flip[k])
+                log(y * w + x)
+                d = turn_dir[(k << 2) | d]
+                base = next_base[k]
+                x = (x + dx[d]) % w
+                y = (y + dy[d]) % h
+        self.ant_x, self.ant_y, self.ant_dir = x, y, d
+        self.ant_state = base // 2
+        self.steps += n
+
+    def retreat(self, n):
+        # inversa de advance (ver LangtonEngine.retreat) con la misma escritura por XOR
+        if self.stats is not None and self.read_log is None:
+            return self.stats.retreat(n)
+        n = self._check_retreat(n)
+        cells = self._cells
+        w, h = self.width, self.height
+        stride = self.stride
+        x, y, d = self.ant_x, self.ant_y, self.ant_dir
+        rule = self.rule
+        back_dir, prev_base = rule.back_dir, rule.prev_base
+        flip = [0xFF if rule.unwrite[j] != (j & 1) else 0 for j in range(len(rule.unwrite))]
+        base = self.ant_state * 2
+        dx, dy = DX, DY
+        if self.read_log is not None:
+            log = self.read_log
+            for t in range(n):
+                x = (x - dx[d]) % w
+                y = (y - dy[d]) % h
+                sh = x & 7
+                i = y * stride + (x >> 3)
+                b = cells[i]
+                j = base + ((b >> sh) & 1)
+                cells[i] = b ^ ((1 << sh) & flip[j])
+                log[t] = j
+                d = back_dir[(j << 2) | d]
+                base = prev_base[j]
+        else:
+            log = self.dirty.append if self.dirty is not None else None
+            for _ in range(n):
+                x = (x - dx[d]) % w
+                y = (y - dy[d]) % h
+                sh = x & 7
+                i = y * stride + (x >> 3)
+                b = cells[i]
+                j = base + ((b >> sh) & 1)
+                cells[i] = b ^ ((1 << sh) & flip[j])
+                if log is not None:
+                    log(y * w + x)
+                d = back_dir[(j << 2) | d]
+                base = prev_base[j]
+        self.ant_x, self.ant_y, self.ant_dir = x, y, d
+        self.ant_state = base // 2
+        self.steps -= n
+
+    # ---------------- Edición / consultas ----------------
+    def toggle_cell(self, x, y):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self._cells[y * self.stride + (x >> 3)] ^= 1 << (x & 7)
+            if self.dirty is not None:
+                self.dirty.append(y * self.width + x)
+            if self.stats is not None:
+                new = self.cell(x, y)
+                self.stats.edit(1 - new, new)
+
+    def cell(self, x, y):
+        return (self._cells[y * self.stride + (x >> 3)] >> (x & 7)) & 1
+
+    def region(self, x0, y0, x1, y1):
+        # desempaqueta sólo los bytes que cubren [y0, y1) x [x0, x1) (copia uint8, 0/1)
+        packed = self.bits[y0:y1, x0 >> 3:(x1 + 7) >> 3]
+        cells = np.unpackbits(packed, axis=1, bitorder="little")
+        off = x0 & 7
+        return cells[:, off:off + max(0, x1 - x0)]
+
+    def block_view(self, bx, by, k):
+        return None  # sin vista byte a byte: MacroStepper no aplica a este motor
+
+    def gather(self, xs, ys):
+        xs, ys = np.mod(xs, self.width), np.mod(ys, self.height)
+        return (self.bits[ys, xs >> 3] >> (xs & 7).astype(np.uint8)) & 1
+
+    def scatter(self, xs, ys, values):
+        # ufunc.at acumula bien varios bits del mismo byte en una sola llamada. Con celdas repetidas
+        # gana la última, como en la asignación con índices de LangtonEngine
+        xs, ys = np.mod(xs, self.width), np.mod(ys, self.height)
+        values = np.broadcast_to(np.asarray(values) != 0, xs.shape)
+        _, last = np.unique((ys * self.width + xs)[::-1], return_index=True)
+        keep = len(xs) - 1 - last
+        xs, ys, values = xs[keep], ys[keep], values[keep]
+        idx = ys * self.stride + (xs >> 3)
+        masks = np.left_shift(1, xs & 7).astype(np.uint8)
+        flat = self.bits.reshape(-1)
+        np.bitwise_and.at(flat, idx, ~masks)
+        np.bitwise_or.at(flat, idx[values], masks[values])
+        self.dirty_all = True
+        if self.stats is not None:
+            self.stats.invalidate()
+
+    def population(self):
+        total = 0
+        for r in range(0, self.height, POP_ROWS):
+            total += int(POPCOUNT[self.bits[r:r + POP_ROWS]].sum(dtype=np.int64))
+        return total
+
+    def bounding_box(self):
+        rows = np.flatnonzero(self.bits.any(axis=1))
+        if len(rows) == 0:
+            return None
+        packed = np.bitwise_or.reduce(self.bits[rows[0]:rows[-1] + 1], axis=0)
+        cols = np.flatnonzero(np.unpackbits(packed, bitorder="little"))
+        return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+
+    def nbytes(self):
+        return len(self._cells)
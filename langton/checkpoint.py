@@ -0,0 +1,167 @@
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from .bitpacked import BitPackedEngine
+from .chunked import TILE, UnboundedEngine
+from .colony import Colony
+from .engine import LangtonEngine
+
+# ---------------- Formato ----------------
+# MAGIC (8 bytes) | longitud de la cabecera (uint32 little-endian) | cabecera JSON | relleno hasta ALIGN
+# | datos de la rejilla. Los datos son filas empaquetadas a 1 bit por celda (bitorder "little", como
+# BitPackedEngine) en reglas de 2 colores, o 1 byte por celda en el resto. En el mundo sin bordes
+# se guardan las teselas reservadas una detrás de otra, con sus coordenadas en la cabecera.
+MAGIC = b"LANGTCK1"
+VERSION = 1
+ALIGN = 64
+CHUNK_ROWS = 1 << 12   # filas por bloque al empaquetar / desempaquetar
+
+KINDS = {
+    'grid': LangtonEngine,
+    'bitpacked': BitPackedEngine,
+    'unbounded': UnboundedEngine,
+    'colony': Colony,
+}
+
+
+def engine_kind(engine):
+    for kind, cls in KINDS.items():
+        if type(engine) is cls:
+            return kind
+    raise ValueError(f"motor sin formato de checkpoint: {type(engine).__name__}")
+
+
+# ---------------- Guardar ----------------
+def _grid_chunks(engine, packed):
+    # bloques de filas ya codificados, para no duplicar en memoria una rejilla grande
+    if isinstance(engine, BitPackedEngine):
+        yield memoryview(engine._cells)
+        return
+    for r in range(0, engine.height, CHUNK_ROWS):
+        rows = engine.grid[r:r + CHUNK_ROWS]
+        yield np.packbits(rows, axis=1, bitorder="little") if packed else rows
+
+
+def save(engine, path):
+    # escribe a un temporal y lo renombra: un autosave interrumpido nunca deja el checkpoint a medias
+    kind = engine_kind(engine)
+    packed = engine.rule.n_colors == 2
+    header = {
+        'version': VERSION,
+        'kind': kind,
+        'width': engine.width,
+        'height': engine.height,
+        'rule': engine.rule.name,
+        'ant': [engine.ant_x, engine.ant_y, engine.ant_dir, engine.ant_state],
+        'steps': engine.steps,
+        'encoding': "bits" if packed else "bytes",
+    }
+    if kind == 'unbounded':
+        # en el orden de world.blocks(), que incluye las teselas aún pendientes de otro checkpoint
+        header['tiles'] = [list(c) for c in (*engine.world.tiles, *engine.world.pending)]
+    if kind == 'colony':
+        header['order'] = engine.order
+        header['ants'] = [a.tolist() for a in (engine.ants_x, engine.ants_y, engine.ants_dir,
+                                                engine.ants_state)]
+        header['start'] = [a.tolist() for a in engine._start]
+    raw = json.dumps(header).encode("utf-8")
+    prefix = len(MAGIC) + 4 + len(raw)
+    pad = -prefix % ALIGN
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(raw)))
+        f.write(raw)
+        f.write(b"\0" * pad)
+        if kind == 'unbounded':
+            for _, _, cells in engine.world.blocks():
+                f.write(np.packbits(cells, bitorder="little") if packed else cells)
+        else:
+            for chunk in _grid_chunks(engine, packed):
+                f.write(chunk)
+    os.replace(tmp, path)
+    return path
+
+
+# ---------------- Cargar ----------------
+def read_header(path):
+    # devuelve (cabecera, desplazamiento de los datos) sin leer la rejilla
+    with open(path, "rb") as f:
+        magic = f.read(len(MAGIC))
+        if magic != MAGIC:
+            raise ValueError(f"{path}: no es un checkpoint de la hormiga de Langton")
+        (n,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(n).decode("utf-8"))
+    if header.get('version') != VERSION:
+        raise ValueError(f"{path}: versión de checkpoint no soportada ({header.get('version')})")
+    prefix = len(MAGIC) + 4 + n
+    return header, prefix + (-prefix % ALIGN)
+
+
+def load(path, kind=None, use_mmap=True):
+    # Reconstruye el motor guardado. `kind` permite cambiar de almacenamiento ('grid' <-> 'bitpacked'
+    # en reglas de 2 colores). Con use_mmap, si los datos del fichero tienen ya el formato del motor
+    # (bits para BitPackedEngine, bytes para LangtonEngine), se mapean en copia-en-escritura: no se
+    # lee nada por adelantado, las páginas se cargan al tocarlas y el fichero nunca se modifica. En el
+    # mundo sin bordes cada tesela se copia del fichero la primera vez que el motor la toca.
+    header, offset = read_header(path)
+    kind = kind or header['kind']
+    if kind not in KINDS:
+        raise ValueError(f"tipo de motor desconocido: {kind!r}")
+    if kind != header['kind'] and {kind, header['kind']} != {'grid', 'bitpacked'}:
+        raise ValueError(f"no se puede cargar un checkpoint {header['kind']!r} como {kind!r}")
+    packed = header['encoding'] == "bits"
+    w, h = header['width'], header['height']
+
+    if kind == 'colony':
+        engine = Colony(w, h, rule=header['rule'], order=header['order'],
+                        positions=np.stack(header['start'][:2], axis=1), dirs=header['start'][2])
+    else:
+        engine = KINDS[kind](w, h, rule=header['rule'])
+
+    if kind == 'unbounded':
+        tile_bytes = TILE * TILE // 8 if packed else TILE * TILE
+        tiles = header['tiles']
+        if not tiles:
+            return _restore_ants(engine, header)
+        # las teselas se copian del mapeo cuando el motor las toca por primera vez (ChunkedGrid.map_tiles)
+        data = np.memmap(path, dtype=np.uint8, mode="r", offset=offset, shape=(len(tiles), tile_bytes))
+        engine.world.map_tiles(data, tiles, packed)
+        if not use_mmap:
+            for tx, ty in tiles:
+                engine.world.tile(tx, ty)
+    elif use_mmap and packed == (kind == 'bitpacked'):
+        size = engine.stride * h if packed else w * h
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        engine.attach_cells(memoryview(mm)[offset:offset + size])
+    else:
+        stride = (w + 7) >> 3
+        data = np.memmap(path, dtype=np.uint8, mode="r", offset=offset,
+                         shape=(h, stride) if packed else (h, w))
+        for r in range(0, h, CHUNK_ROWS):
+            rows = data[r:r + CHUNK_ROWS]
+            if kind == 'bitpacked':
+                engine.bits[r:r + CHUNK_ROWS] = rows
+            elif packed:
+                engine.grid[r:r + CHUNK_ROWS] = np.unpackbits(rows, axis=1, count=w, bitorder="little")
+            else:
+                engine.grid[r:r + CHUNK_ROWS] = rows
+        del data
+
+    return _restore_ants(engine, header)
+
+
+def _restore_ants(engine, header):
+    engine.ant_x, engine.ant_y, engine.ant_dir, engine.ant_state = header['ant']
+    engine.steps = header['steps']
+    if header['kind'] == 'colony':
+        xs, ys, ds, states = (np.asarray(a, dtype=np.int64) for a in header['ants'])
+        engine.ants_x, engine.ants_y, engine.ants_dir, engine.ants_state = xs, ys, ds, states
+    engine.dirty_all = True
+    return engine
@@ -0,0 +1,367 @@
+import numpy as np
+
+from .engine import DX, DY, GRID_H, GRID_W, LangtonEngine
+from .rules import CLASSIC, parse_rule
+
+# ---------------- Config ----------------
+TILE_SHIFT = 8
+TILE = 1 << TILE_SHIFT  # teselas de 256x256 celdas
+
+
+# ---------------- Rejilla sin límites por teselas ----------------
+class ChunkedGrid:
+    # Teselas TILE x TILE reservadas bajo demanda en un dict {(tx, ty): bytearray}.
+    # Cada tesela recibe un id secuencial para poder codificar celdas como enteros planos:
+    # clave = (id << 2*TILE_SHIFT) | (ly << TILE_SHIFT | lx)
+    # Las teselas de un checkpoint (map_tiles) quedan pendientes en el fichero mapeado y se copian a
+    # memoria la primera vez que se tocan; las consultas globales (población, caja, guardar) las leen
+    # del mapeo sin cargarlas.
+    def __init__(self):
+        self.tiles = {}
+        self.tile_ids = {}
+        self.tile_coords = []  # id -> (tx, ty)
+        self.pending = {}  # (tx, ty) -> fila de self.source aún sin copiar
+        self.source = None
+        self.source_packed = False
+
+    def clear(self):
+        self.tiles.clear()
+        self.tile_ids.clear()
+        self.tile_coords.clear()
+        self.pending.clear()
+        self.source = None
+
+    def map_tiles(self, data, coords, packed):
+        # data: (len(coords), bytes por tesela) mapeado del checkpoint, a 1 bit por celda si packed
+        self.source = data
+        self.source_packed = packed
+        self.pending.update((tuple(c), n) for n, c in enumerate(coords))
+
+    def _mapped(self, n):
+        row = self.source[n]
+        return np.unpackbits(row, bitorder="little") if self.source_packed else row
+
+    def tile(self, tx, ty):
+        # devuelve (bytearray, prefijo de clave), creando la tesela si no existe
+        t = self.tiles.get((tx, ty))
+        if t is None:
+            n = self.pending.pop((tx, ty), None)
+            if n is None:
+                t = bytearray(TILE * TILE)
+            else:
+                t = bytearray(self._mapped(n))
+                if not self.pending:
+                    self.source = None  # todo copiado: suelta el mapeo
+            self.tiles[(tx, ty)] = t
+            self.tile_ids[(tx, ty)] = len(self.tile_coords)
+            self.tile_coords.append((tx, ty))
+        return t, self.tile_ids[(tx, ty)] << (2 * TILE_SHIFT)
+
+    def _resident(self, tx, ty):
+        # tesela en memoria (cargándola si está pendiente) o None si no existe
+        t = self.tiles.get((tx, ty))
+        if t is None and (tx, ty) in self.pending:
+            t, _ = self.tile(tx, ty)
+        return t
+
+    def blocks(self):
+        # (tx, ty, celdas uint8 planas) de todas las teselas, las pendientes leídas del mapeo
+        for (tx, ty), t in self.tiles.items():
+            yield tx, ty, np.frombuffer(t, dtype=np.uint8)
+        for (tx, ty), n in self.pending.items():
+            yield tx, ty, self._mapped(n)
+
+    def get(self, x, y):
+        t = self._resident(x >> TILE_SHIFT, y >> TILE_SHIFT)
+        if t is None:
+            return 0
+        return t[((y & (TILE - 1)) << TILE_SHIFT) | (x & (TILE - 1))]
+
+    def region(self, x0, y0, x1, y1):
+        # copia densa de [y0, y1) x [x0, x1); las teselas no reservadas son ceros
+        out = np.zeros((max(0, y1 - y0), max(0, x1 - x0)), dtype=np.uint8)
+        if out.size == 0:
+            return out
+        for ty in range(y0 >> TILE_SHIFT, ((y1 - 1) >> TILE_SHIFT) + 1):
+            for tx in range(x0 >> TILE_SHIFT, ((x1 - 1) >> TILE_SHIFT) + 1):
+                t = self._resident(tx, ty)
+                if t is None:
+                    continue
+                bx, by = tx << TILE_SHIFT, ty << TILE_SHIFT
+                sx0, sy0 = max(x0, bx), max(y0, by)
+                sx1, sy1 = min(x1, bx + TILE), min(y1, by + TILE)
+                block = np.frombuffer(t, dtype=np.uint8).reshape(TILE, TILE)
+                out[sy0 - y0:sy1 - y0, sx0 - x0:sx1 - x0] = block[sy0 - by:sy1 - by, sx0 - bx:sx1 - bx]
+        return out
+
+    def _by_tile(self, xs, ys):
+        # agrupa coordenadas por tesela: genera (tx, ty, índices en xs/ys, índices locales)
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        keys = ((xs >> TILE_SHIFT) << 32) | ((ys >> TILE_SHIFT) & 0xFFFFFFFF)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        ends = np.r_[starts[1:], len(keys)]
+        local = ((ys & (TILE - 1)) << TILE_SHIFT) | (xs & (TILE - 1))
+        for a, b in zip(starts.tolist(), ends.tolist()):
+            k = int(sorted_keys[a])
+            ty = ((k & 0xFFFFFFFF) ^ 0x80000000) - 0x80000000
+            idx = order[a:b]
+            yield k >> 32, ty, idx, local[idx]
+
+    def gather(self, xs, ys):
+        out = np.zeros(len(xs), dtype=np.uint8)
+        if len(out) == 0:
+            return out
+        for tx, ty, idx, local in self._by_tile(xs, ys):
+            t = self._resident(tx, ty)
+            if t is not None:
+                out[idx] = np.frombuffer(t, dtype=np.uint8)[local]
+        return out
+
+    def scatter(self, xs, ys, values):
+        values = np.broadcast_to(np.asarray(values, dtype=np.uint8), (len(xs),))
+        if len(values) == 0:
+            return
+        for tx, ty, idx, local in self._by_tile(xs, ys):
+            t, _ = self.tile(tx, ty)
+            np.frombuffer(t, dtype=np.uint8)[local] = values[idx]
+
+    def population(self):
+        return sum(int(np.count_nonzero(cells)) for _, _, cells in self.blocks())
+
+    def bounding_box(self):
+        box = None
+        for tx, ty, cells in self.blocks():
+            block = cells.reshape(TILE, TILE)
+            cols = np.flatnonzero(block.any(axis=0))
+            if len(cols) == 0:
+                continue
+            rows = np.flatnonzero(block.any(axis=1))
+            bx, by = tx << TILE_SHIFT, ty << TILE_SHIFT
+            b = (bx + int(cols[0]), by + int(rows[0]), bx + int(cols[-1]) + 1, by + int(rows[-1]) + 1)
+            box = b if box is None else (min(box[0], b[0]), min(box[1], b[1]), max(box[2], b[2]), max(box[3], b[3]))
+        return box
+
+    def nbytes(self):
+        return len(self.tiles) * TILE * TILE
+
+
+class UnboundedEngine(LangtonEngine):
+    # Mundo sin bordes: la memoria crece con el área visitada, no con un rectángulo prefijado.
+    # width/height sólo definen la vista inicial; la hormiga arranca en su centro.
+    bounded = False
+
+    def __init__(self, width=GRID_W, height=GRID_H, rule=CLASSIC):
+        self.width = width
+        self.height = height
+        self.rule = parse_rule(rule)
+        self.world = ChunkedGrid()
+        self.grid = None
+        self.ant_x = width // 2
+        self.ant_y = height // 2
+        self.ant_dir = 0
+        self.ant_state = 0
+        self.steps = 0
+        self.dirty = None
+        self.dirty_all = False
+        self.read_log = None
+        self.stats = None  # sin RunStats: el mundo no tiene un mapa de visitas de tamaño fijo
+
+    def reset(self):
+        self.world.clear()
+        self.ant_x = self.width // 2
+        self.ant_y = self.height // 2
+        self.ant_dir = 0
+        self.ant_state = 0
+        self.steps = 0
+        self.dirty_all = True
+
+    # ---------------- Reglas ----------------
+    def advance(self, n):
+        # la tesela actual se guarda en variables locales: sólo se consulta el dict al cruzar un borde
+        mask = TILE - 1
+        out = ~mask
+        shift = TILE_SHIFT
+        rule = self.rule
+        write, turn_dir, next_base = rule.write, rule.turn_dir, rule.next_base
+        base = self.ant_state * rule.n_colors
+        dx, dy = DX, DY
+        x, y, d = self.ant_x, self.ant_y, self.ant_dir
+        tx, ty = x >> shift, y >> shift
+        lx, ly = x & mask, y & mask
+        tile, key = self.world.tile(tx, ty)
+        get_tile = self.world.tile
+        if self.dirty is None and self.read_log is None:
+            for _ in range(n):
+                i = (ly << shift) | lx
+                k = base + tile[i]
+                tile[i] = write[k]
+                d = turn_dir[(k << 2) | d]
+                base = next_base[k]
+                lx += dx[d]
+                ly += dy[d]
+                if (lx | ly) & out:
+                    tx += lx >> shift
+                    ty += ly >> shift
+                    lx &= mask
+                    ly &= mask
+                    tile, key = get_tile(tx, ty)
+        elif self.read_log is not None:
+            log = self.read_log
+            for t in range(n):
+                i = (ly << shift) | lx
+                k = base + tile[i]
+                tile[i] = write[k]
+                log[t] = k
+                d = turn_dir[(k << 2) | d]
+                base = next_base[k]
+                lx += dx[d]
+                ly += dy[d]
+                if (lx | ly) & out:
+                    tx += lx >> shift
+                    ty += ly >> shift
+                    lx &= mask
+                    ly &= mask
+                    tile, key = get_tile(tx, ty)
+        else:
+            log = self.dirty.append
+            for _ in range(n):
+                i = (ly << shift) | lx
+                k = base + tile[i]
+                tile[i] = write[k]
+                log(key | i)
+                d = turn_dir[(k << 2) | d]
+                base = next_base[k]
+                lx += dx[d]
+                ly += dy[d]
+                if (lx | ly) & out:
+                    tx += lx >> shift
+                    ty += ly >> shift
+                    lx &= mask
+                    ly &= mask
+                    tile, key = get_tile(tx, ty)
+        self.ant_x = (tx << shift) | lx
+        self.ant_y = (ty << shift) | ly
+        self.ant_dir = d
+        self.ant_state = base // rule.n_colors
+        self.steps += n
+
+    def retreat(self, n):
+        # inversa de advance (ver LangtonEngine.retreat): primero se retrocede y luego se lee la celda
+        n = self._check_retreat(n)
+        mask = TILE - 1
+        out = ~mask
+        shift = TILE_SHIFT
+        rule = self.rule
+        unwrite, back_dir, prev_base = rule.unwrite, rule.back_dir, rule.prev_base
+        base = self.ant_state * rule.n_colors
+        dx, dy = DX, DY
+        x, y, d = self.ant_x, self.ant_y, self.ant_dir
+        tx, ty = x >> shift, y >> shift
+        lx, ly = x & mask, y & mask
+        tile, key = self.world.tile(tx, ty)
+        get_tile = self.world.tile
+        if self.dirty is None and self.read_log is None:
+            for _ in range(n):
+                lx -= dx[d]
+                ly -= dy[d]
+                if (lx | ly) & out:
+                    tx += lx >> shift
+                    ty += ly >> shift
+                    lx &= mask
+                    ly &= mask
+                    tile, key = get_tile(tx, ty)
+                i = (ly << shift) | lx
+                j = base + tile[i]
+                tile[i] = unwrite[j]
+                d = back_dir[(j << 2) | d]
+                base = prev_base[j]
+        elif self.read_log is not None:
+            # como en advance, pero anotando j = base + color tras el paso que se deshace
+            log = self.read_log
+            for t in range(n):
+                lx -= dx[d]
+                ly -= dy[d]
+                if (lx | ly) & out:
+                    tx += lx >> shift
+                    ty += ly >> shift
+                    lx &= mask
+                    ly &= mask
+                    tile, key = get_tile(tx, ty)
+                i = (ly << shift) | lx
+                j = base + tile[i]
+                tile[i] = unwrite[j]
+                log[t] = j
+                d = back_dir[(j << 2) | d]
+                base = prev_base[j]
+        else:
+            log = self.dirty.append
+            for _ in range(n):
+                lx -= dx[d]
+                ly -= dy[d]
+                if (lx | ly) & out:
+                    tx += lx >> shift
+                    ty += ly >> shift
+                    lx &= mask
+                    ly &= mask
+                    tile, key = get_tile(tx, ty)
+                i = (ly << shift) | lx
+                j = base + tile[i]
+                tile[i] = unwrite[j]
+                log(key | i)
+                d = back_dir[(j << 2) | d]
+                base = prev_base[j]
+        self.ant_x = (tx << shift) | lx
+        self.ant_y = (ty << shift) | ly
+        self.ant_dir = d
+        self.ant_state = base // rule.n_colors
+        self.steps -= n
+
+    # ---------------- Registro de celdas modificadas ----------------
+    def dirty_coords(self, log):
+        keys = np.asarray(log, dtype=np.int64)
+        coords = np.asarray(self.world.tile_coords, dtype=np.int64).reshape(-1, 2)
+        tid = keys >> (2 * TILE_SHIFT)
+        i = keys & (TILE * TILE - 1)
+        xs = (coords[tid, 0] << TILE_SHIFT) | (i & (TILE - 1))
+        ys = (coords[tid, 1] << TILE_SHIFT) | (i >> TILE_SHIFT)
+        return xs, ys
+
+    # ---------------- Edición / consultas ----------------
+    def toggle_cell(self, x, y):
+        tile, key = self.world.tile(x >> TILE_SHIFT, y >> TILE_SHIFT)
+        i = ((y & (TILE - 1)) << TILE_SHIFT) | (x & (TILE - 1))
+        tile[i] = (tile[i] + 1) % self.rule.n_colors
+        if self.dirty is not None:
+            self.dirty.append(key | i)
+
+    def cell(self, x, y):
+        return self.world.get(x, y)
+
+    def region(self, x0, y0, x1, y1):
+        return self.world.region(x0, y0, x1, y1)
+
+    def block_view(self, bx, by, k):
+        # vista del bloque k x k dentro de su tesela; None si cruza el borde de una tesela (sólo pasa
+        # si k no divide a TILE)
+        x0, y0 = bx * k, by * k
+        lx, ly = x0 & (TILE - 1), y0 & (TILE - 1)
+        if lx + k > TILE or ly + k > TILE:
+            return None
+        tile, _ = self.world.tile(x0 >> TILE_SHIFT, y0 >> TILE_SHIFT)
+        return np.frombuffer(tile, dtype=np.uint8).reshape(TILE, TILE)[ly:ly + k, lx:lx + k]
+
+    def gather(self, xs, ys):
+        return self.world.gather(xs, ys)
+
+    def scatter(self, xs, ys, values):
+        self.world.scatter(xs, ys, values)
+        self.dirty_all = True
+
+    def population(self):
+        return self.world.population()
+
+    def bounding_box(self):
+        return self.world.bounding_box()
@@ -0,0 +1,191 @@
+import numpy as np
+
+from .engine import DX, DY, GRID_H, GRID_W, LangtonEngine
+from .rules import CLASSIC
+
+# ---------------- Config ----------------
+ORDERS = ("sequential", "simultaneous")
+
+
+# ---------------- Colonia de hormigas ----------------
+class Colony(LangtonEngine):
+    # Varias hormigas sobre la misma rejilla, guardadas como estructura de arrays (x, y, dir, estado).
+    # Un paso mueve a todas las hormigas una vez, en uno de dos órdenes:
+    #   sequential:   en orden de índice; cada hormiga ve lo que escribieron las anteriores en ese paso.
+    #   simultaneous: todas leen la rejilla a la vez; si varias comparten celda, ésta se escribe una
+    #                 sola vez con el resultado de la hormiga de menor índice, y cada una gira según
+    #                 su propia lectura. Se calcula con indexado vectorizado sobre todas las hormigas.
+    # La hormiga 0 se refleja en ant_x / ant_y / ant_dir / ant_state para el panel y el modo headless.
+    def __init__(self, width=GRID_W, height=GRID_H, rule=CLASSIC, n_ants=1, order="sequential",
+                 seed=None, positions=None, dirs=None):
+        if order not in ORDERS:
+            raise ValueError(f"orden desconocido: {order!r} (use {' o '.join(ORDERS)})")
+        super().__init__(width, height, rule)
+        self.order = order
+        if positions is None:
+            # hormiga 0 en el centro, el resto repartidas al azar
+            rng = np.random.default_rng(seed)
+            xs = rng.integers(0, width, size=n_ants)
+            ys = rng.integers(0, height, size=n_ants)
+            xs[0], ys[0] = width // 2, height // 2
+            if dirs is None:
+                dirs = rng.integers(0, 4, size=n_ants)
+                dirs[0] = 0
+        else:
+            xs, ys = np.asarray(positions, dtype=np.int64).reshape(-1, 2).T
+        n_ants = len(xs)
+        if dirs is None:
+            dirs = np.zeros(n_ants, dtype=np.int64)
+        self._start = (np.mod(xs, width).astype(np.int64), np.mod(ys, height).astype(np.int64),
+                       np.asarray(dirs, dtype=np.int64) % 4)
+        self.reset()
+        self.dirty_all = False
+
+    @property
+    def n_ants(self):
+        return len(self.ants_x)
+
+    def reset(self):
+        super().reset()
+        xs, ys, ds = self._start
+        self.ants_x, self.ants_y, self.ants_dir = xs.copy(), ys.copy(), ds.copy()
+        self.ants_state = np.zeros(len(xs), dtype=np.int64)
+        self._sync_first()
+
+    def _sync_first(self):
+        self.ant_x, self.ant_y = int(self.ants_x[0]), int(self.ants_y[0])
+        self.ant_dir, self.ant_state = int(self.ants_dir[0]), int(self.ants_state[0])
+
+    def ants(self):
+        return self.ants_x, self.ants_y, self.ants_dir
+
+    @property
+    def reversible(self):
+        return self.rule.reversible and (self.order == "sequential" or self.rule.n_states == 1)
+
+    # ---------------- Reglas ----------------
+    def advance(self, n):
+        if self.order == "sequential":
+            self._advance_sequential(n)
+        else:
+            self._advance_simultaneous(n)
+        self._sync_first()
+        self.steps += n
+
+    def _advance_sequential(self, n):
+        # mismo kernel escalar que LangtonEngine.advance, con un bucle interno sobre las hormigas
+        cells = self._cells
+        w, h = self.width, self.height
+        rule = self.rule
+        write, turn_dir, next_base = rule.write, rule.turn_dir, rule.next_base
+        nc = rule.n_colors
+        dx, dy = DX, DY
+        xs, ys, ds = self.ants_x.tolist(), self.ants_y.tolist(), self.ants_dir.tolist()
+        bases = [s * nc for s in self.ants_state.tolist()]
+        log = self.dirty.append if self.dirty is not None else None
+        ants = range(len(xs))
+        for _ in range(n):
+            for a in ants:
+                x, y = xs[a], ys[a]
+                i = y * w + x
+                k = bases[a] + cells[i]
+                cells[i] = write[k]
+                if log is not None:
+                    log(i)
+                d = turn_dir[(k << 2) | ds[a]]
+                bases[a] = next_base[k]
+                ds[a] = d
+                xs[a] = (x + dx[d]) % w
+                ys[a] = (y + dy[d]) % h
+        self.ants_x[:], self.ants_y[:], self.ants_dir[:] = xs, ys, ds
+        self.ants_state[:] = [b // nc for b in bases]
+
+    def _advance_simultaneous(self, n):
+        cells = self.grid.reshape(-1)
+        w, h = self.width, self.height
+        rule = self.rule
+        write = np.frombuffer(rule.write, dtype=np.uint8)
+        turn_dir = np.asarray(rule.turn_dir, dtype=np.int64)
+        next_base = np.asarray(rule.next_base, dtype=np.int64)
+        dx, dy = np.asarray(DX, dtype=np.int64), np.asarray(DY, dtype=np.int64)
+        x, y, d = self.ants_x, self.ants_y, self.ants_dir
+        base = self.ants_state * rule.n_colors
+        for _ in range(n):
+            i = y * w + x
+            k = base + cells[i]
+            # conflictos: una escritura por celda, la de la primera hormiga que la ocupa
+            cell_ids, first = np.unique(i, return_index=True)
+            cells[cell_ids] = write[k[first]]
+            if self.dirty is not None:
+                self.dirty.extend(cell_ids.tolist())
+            d = turn_dir[(k << 2) | d]
+            base = next_base[k]
+            x = (x + dx[d]) % w
+            y = (y + dy[d]) % h
+        self.ants_x, self.ants_y, self.ants_dir = x, y, d
+        self.ants_state = base // rule.n_colors
+
+    # ---------------- Retroceso ----------------
+    def retreat(self, n):
+        # inversa de advance. En orden secuencial se deshace cada paso recorriendo las hormigas al revés.
+        # En simultáneo todas retroceden y leen a la vez: con un solo estado las hormigas que comparten
+        # celda escribieron lo mismo y la inversa es exacta; con turmites de varios estados el conflicto
+        # pudo descartar escrituras distintas, así que no se permite (ver reversible)
+        n = self._check_retreat(n)
+        if self.order == "sequential":
+            self._retreat_sequential(n)
+        else:
+            self._retreat_simultaneous(n)
+        self._sync_first()
+        self.steps -= n
+
+    def _retreat_sequential(self, n):
+        cells = self._cells
+        w, h = self.width, self.height
+        rule = self.rule
+        unwrite, back_dir, prev_base = rule.unwrite, rule.back_dir, rule.prev_base
+        nc = rule.n_colors
+        dx, dy = DX, DY
+        xs, ys, ds = self.ants_x.tolist(), self.ants_y.tolist(), self.ants_dir.tolist()
+        bases = [s * nc for s in self.ants_state.tolist()]
+        log = self.dirty.append if self.dirty is not None else None
+        ants = range(len(xs) - 1, -1, -1)
+        for _ in range(n):
+            for a in ants:
+                d = ds[a]
+                x = (xs[a] - dx[d]) % w
+                y = (ys[a] - dy[d]) % h
+                i = y * w + x
+                j = bases[a] + cells[i]
+                cells[i] = unwrite[j]
+                if log is not None:
+                    log(i)
+                ds[a] = back_dir[(j << 2) | d]
+                bases[a] = prev_base[j]
+                xs[a], ys[a] = x, y
+        self.ants_x[:], self.ants_y[:], self.ants_dir[:] = xs, ys, ds
+        self.ants_state[:] = [b // nc for b in bases]
+
+    def _retreat_simultaneous(self, n):
+        cells = self.grid.reshape(-1)
+        w, h = self.width, self.height
+        rule = self.rule
+        unwrite = np.frombuffer(rule.unwrite, dtype=np.uint8)
+        back_dir = np.asarray(rule.back_dir, dtype=np.int64)
+        prev_base = np.asarray(rule.prev_base, dtype=np.int64)
+        dx, dy = np.asarray(DX, dtype=np.int64), np.asarray(DY, dtype=np.int64)
+        x, y, d = self.ants_x, self.ants_y, self.ants_dir
+        base = self.ants_state * rule.n_colors
+        for _ in range(n):
+            x = (x - dx[d]) % w
+            y = (y - dy[d]) % h
+            i = y * w + x
+            j = base + cells[i]
+            cell_ids, first = np.unique(i, return_index=True)
+            cells[cell_ids] = unwrite[j[first]]
+            if self.dirty is not None:
+                self.dirty.extend(cell_ids.tolist())
+            d = back_dir[(j << 2) | d]
+            base = prev_base[j]
+        self.ants_x, self.ants_y, self.ants_dir = x, y, d
+        self.ants_state = base // rule.n_colors
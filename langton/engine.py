@@ -0,0 +1,271 @@
+import numpy as np
+
+from .rules import CLASSIC, parse_rule
+
+# ---------------- Config ----------------
+GRID_W = 120
+GRID_H = 100
+
+# Direcciones: 0 = norte, 1 = este, 2 = sur, 3 = oeste
+DIR_NAMES = ["NORTE", "ESTE", "SUR", "OESTE"]
+DX = (0, 1, 0, -1)
+DY = (-1, 0, 1, 0)
+
+
+# ---------------- Motor de simulación (sin pygame) ----------------
+class LangtonEngine:
+    bounded = True  # rejilla fija con wrap-around
+
+    def __init__(self, width=GRID_W, height=GRID_H, rule=CLASSIC):
+        self.width = width
+        self.height = height
+        self.rule = parse_rule(rule)
+        # bytearray como almacenamiento: el kernel lo indexa sin pasar por escalares de NumPy,
+        # y self.grid es una vista NumPy sobre la misma memoria para el visor
+        self._cells = bytearray(width * height)
+        self.grid = np.frombuffer(self._cells, dtype=np.uint8).reshape(height, width)
+        self.ant_x = width // 2
+        self.ant_y = height // 2
+        self.ant_dir = 0
+        self.ant_state = 0  # estado interno (turmites); 0 en reglas de un solo estado
+        self.steps = 0
+        # registro de celdas modificadas (índices planos y * width + x); None = desactivado.
+        # dirty_all marca ediciones masivas (reset, avance analítico...) que invalidan todo
+        self.dirty = None
+        self.dirty_all = False
+        # registro de transiciones: bytearray de al menos n bytes donde advance(n) deja k = base + color
+        # leído de cada paso (ver trajectory.trace); mientras está activo no se registran celdas sucias.
+        # None = desactivado
+        self.read_log = None
+        # métricas incrementales (stats.RunStats, ver enable_stats); None = desactivadas
+        self.stats = None
+
+    def reset(self):
+        self.grid.fill(0)
+        self.ant_x = self.width // 2
+        self.ant_y = self.height // 2
+        self.ant_dir = 0
+        self.ant_state = 0
+        self.steps = 0
+        self.dirty_all = True
+        if self.stats is not None:
+            self.stats.reset()
+
+    def set_rule(self, rule):
+        self.rule = parse_rule(rule)
+        self.reset()
+
+    def attach_cells(self, buf):
+        # sustituye el almacenamiento por `buf` (bytearray, mmap...) de width * height bytes
+        self._cells = buf
+        self.grid = np.frombuffer(buf, dtype=np.uint8).reshape(self.height, self.width)
+
+    # ---------------- Reglas ----------------
+    def advance(self, n):
+        # kernel por lotes sin ramas: todo el estado en variables locales y las tablas de la regla
+        # compilada (ver rules.Rule), así cualquier regla cuesta lo mismo que la RL clásica
+        if self.stats is not None and self.read_log is None:
+            return self.stats.advance(n)  # por bloques con read_log (ver stats.RunStats)
+        cells = self._cells
+        w, h = self.width, self.height
+        x, y, d = self.ant_x, self.ant_y, self.ant_dir
+        rule = self.rule
+        write, turn_dir, next_base = rule.write, rule.turn_dir, rule.next_base
+        base = self.ant_state * rule.n_colors
+        dx, dy = DX, DY
+        if self.dirty is None and self.read_log is None:
+            for _ in range(n):
+                i = y * w + x
+                k = base + cells[i]
+                cells[i] = write[k]
+                d = turn_dir[(k << 2) | d]
+                base = next_base[k]
+                x = (x + dx[d]) % w
+                y = (y + dy[d]) % h
+        elif self.read_log is not None:
+            log = self.read_log
+            for t in range(n):
+                i = y * w + x
+                k = base + cells[i]
+                cells[i] = write[k]
+                log[t] = k
+                d = turn_dir[(k << 2) | d]
+                base = next_base[k]
+                x = (x + dx[d]) % w
+                y = (y + dy[d]) % h
+        else:
+            log = self.dirty.append
+            for _ in range(n):
+                i = y * w + x
+                k = base + cells[i]
+                cells[i] = write[k]
+                log(i)
+                d = turn_dir[(k << 2) | d]
+                base = next_base[k]
+                x = (x + dx[d]) % w
+                y = (y + dy[d]) % h
+        self.ant_x, self.ant_y, self.ant_dir = x, y, d
+        self.ant_state = base // rule.n_colors
+        self.steps += n
+
+    def retreat(self, n):
+        # deshace los últimos n pasos (sin pasar del paso 0) invirtiendo la regla en lugar de guardar
+        # historial: la hormiga retrocede por su dirección actual y la celda recupera su color previo
+        if self.stats is not None and self.read_log is None:
+            return self.stats.retreat(n)
+        n = self._check_retreat(n)
+        cells = self._cells
+        w, h = self.width, self.height
+        x, y, d = self.ant_x, self.ant_y, self.ant_dir
+        rule = self.rule
+        unwrite, back_dir, prev_base = rule.unwrite, rule.back_dir, rule.prev_base
+        base = self.ant_state * rule.n_colors
+        dx, dy = DX, DY
+        if self.dirty is None and self.read_log is None:
+            for _ in range(n):
+                x = (x - dx[d]) % w
+                y = (y - dy[d]) % h
+                i = y * w + x
+                j = base + cells[i]
+                cells[i] = unwrite[j]
+                d = back_dir[(j << 2) | d]
+                base = prev_base[j]
+        elif self.read_log is not None:
+            # como en advance, pero anotando j = base + color tras el paso que se deshace
+            log = self.read_log
+            for t in range(n):
+                x = (x - dx[d]) % w
+                y = (y - dy[d]) % h
+                i = y * w + x
+                j = base + cells[i]
+                cells[i] = unwrite[j]
+                log[t] = j
+                d = back_dir[(j << 2) | d]
+                base = prev_base[j]
+        else:
+            log = self.dirty.append
+            for _ in range(n):
+                x = (x - dx[d]) % w
+                y = (y - dy[d]) % h
+                i = y * w + x
+                j = base + cells[i]
+                cells[i] = unwrite[j]
+                log(i)
+                d = back_dir[(j << 2) | d]
+                base = prev_base[j]
+        self.ant_x, self.ant_y, self.ant_dir = x, y, d
+        self.ant_state = base // rule.n_colors
+        self.steps -= n
+
+    @property
+    def reversible(self):
+        return self.rule.reversible
+
+    def _check_retreat(self, n):
+        if not self.reversible:
+            raise ValueError(f"la regla {self.rule.name} no es reversible en este motor")
+        return max(0, min(int(n), self.steps))
+
+    def step(self):
+        self.advance(1)
+
+    def step_back(self):
+        self.retreat(1)
+
+    def seek(self, step):
+        # ir al paso `step` avanzando o retrocediendo desde el actual
+        if step < self.steps:
+            self.retreat(self.steps - step)
+        elif step > self.steps:
+            self.advance(step - self.steps)
+        return self.steps
+
+    def run(self, n_steps, fast_forward=False):
+        # fast_forward: detectar la autopista y saltarla analíticamente (ver highway.py)
+        if fast_forward:
+            from .highway import run_fast
+            run_fast(self, int(n_steps))
+        else:
+            self.advance(int(n_steps))
+        return self.steps
+
+    # ---------------- Métricas ----------------
+    def enable_stats(self, buf=None, heatmap=None):
+        # población, área visitada, mapa de visitas e histograma de direcciones mantenidos al avanzar
+        # (ver stats.RunStats); `buf` permite alojarlas en memoria externa y heatmap=None deja el mapa
+        # de visitas sólo para las rejillas que caben (stats.HEATMAP_MAX_CELLS)
+        from .stats import RunStats
+        self.stats = RunStats(self, buf, heatmap)
+        return self.stats
+
+    # ---------------- Registro de celdas modificadas ----------------
+    def enable_dirty_log(self):
+        self.dirty = []
+
+    def take_dirty(self):
+        # devuelve las celdas modificadas desde la última llamada y vacía el registro;
+        # None si hubo una edición masiva y hay que redibujar todo
+        log = self.dirty
+        self.dirty = []
+        if self.dirty_all:
+            self.dirty_all = False
+            return None
+        return log
+
+    def dirty_coords(self, log):
+        # índices del registro -> arrays (xs, ys)
+        ys, xs = np.divmod(np.asarray(log, dtype=np.int64), self.width)
+        return xs, ys
+
+    # ---------------- Edición / consultas ----------------
+    def toggle_cell(self, x, y):
+        # avanza el color de la celda de forma cíclica (0 <-> 1 en la regla clásica)
+        if 0 <= x < self.width and 0 <= y < self.height:
+            i = y * self.width + x
+            old = self._cells[i]
+            self._cells[i] = (old + 1) % self.rule.n_colors
+            if self.dirty is not None:
+                self.dirty.append(i)
+            if self.stats is not None:
+                self.stats.edit(old, self._cells[i])
+
+    def cell(self, x, y):
+        return int(self._cells[y * self.width + x])
+
+    def ants(self):
+        # posiciones y direcciones de todas las hormigas como arrays (una sola aquí; ver colony.Colony)
+        return np.array([self.ant_x]), np.array([self.ant_y]), np.array([self.ant_dir])
+
+    def region(self, x0, y0, x1, y1):
+        # bloque [y0, y1) x [x0, x1) de la rejilla (vista, sin copia)
+        return self.grid[y0:y1, x0:x1]
+
+    def block_view(self, bx, by, k):
+        # vista escribible del bloque k x k (bx, by); None si el bloque no cabe entero en la rejilla
+        x0, y0 = bx * k, by * k
+        if x0 + k > self.width or y0 + k > self.height:
+            return None
+        if self.stats is not None:
+            self.stats.invalidate()
+        return self.grid[y0:y0 + k, x0:x0 + k]
+
+    def gather(self, xs, ys):
+        # lectura vectorizada de celdas (coordenadas con wrap-around)
+        return self.grid[np.mod(ys, self.height), np.mod(xs, self.width)]
+
+    def scatter(self, xs, ys, values):
+        self.grid[np.mod(ys, self.height), np.mod(xs, self.width)] = values
+        self.dirty_all = True
+        if self.stats is not None:
+            self.stats.invalidate()
+
+    def population(self):
+        return int(np.count_nonzero(self.grid))
+
+    def bounding_box(self):
+        # (x0, y0, x1, y1) exclusivo de las celdas no vacías, o None
+        cols = np.flatnonzero(self.grid.any(axis=0))
+        rows = np.flatnonzero(self.grid.any(axis=1))
+        if len(rows) == 0:
+            return None
+        return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
@@ -0,0 +1,172 @@
+import numpy as np
+
+from .engine import DX, DY, GRID_H, GRID_W
+from .rules import CLASSIC, parse_rule
+
+# ---------------- Config ----------------
+HIGHWAY_PERIODS = (104,)   # periodos buscados en cada réplica (104 = autopista de la regla RL)
+HIGHWAY_REPEATS = 4        # repeticiones exigidas para dar la autopista por confirmada
+
+
+# ---------------- Conjunto de réplicas en lote ----------------
+class Ensemble:
+    # N simulaciones independientes avanzando a la vez: las rejillas viven en un único array (N, H, W)
+    # y la hormiga de cada réplica en arrays de longitud N. Un paso de Python mueve a todas las
+    # hormigas activas con indexado vectorizado; las réplicas terminadas quedan enmascaradas.
+    def __init__(self, n, width=GRID_W, height=GRID_H, rule=CLASSIC, density=0.0, noise_box=None,
+                 seed=None, periods=HIGHWAY_PERIODS, repeats=HIGHWAY_REPEATS):
+        self.n = n
+        self.width = width
+        self.height = height
+        self.rule = parse_rule(rule)
+        self.periods = tuple(periods)
+        self.repeats = repeats
+        self.rng = np.random.default_rng(seed)
+
+        self.grids = np.zeros((n, height, width), dtype=np.uint8)
+        if density > 0:
+            self.add_noise(density, noise_box)
+
+        self.x = np.full(n, width // 2, dtype=np.int64)
+        self.y = np.full(n, height // 2, dtype=np.int64)
+        self.dir = np.zeros(n, dtype=np.int64)
+        self.base = np.zeros(n, dtype=np.int64)  # estado * n_colors, como en el kernel escalar
+        self.steps = np.zeros(n, dtype=np.int64)
+        self.active = np.ones(n, dtype=bool)
+        self.highway_step = np.full(n, -1, dtype=np.int64)  # paso en que se confirmó la autopista
+        self.t = 0  # pasos dados por el lote (todas las réplicas activas van a la par)
+
+        # tablas de la regla como arrays para indexado vectorizado
+        self._write = np.frombuffer(self.rule.write, dtype=np.uint8).astype(np.uint8)
+        self._turn_dir = np.asarray(self.rule.turn_dir, dtype=np.int64)
+        self._next_base = np.asarray(self.rule.next_base, dtype=np.int64)
+        self._dx = np.asarray(DX, dtype=np.int64)
+        self._dy = np.asarray(DY, dtype=np.int64)
+
+        # estado de trabajo compactado: sólo réplicas activas, en arrays contiguos (ver _retire)
+        self._ids = np.arange(n, dtype=np.int64)
+        self._off = self._ids * (height * width)
+        self._x, self._y = self.x.copy(), self.y.copy()
+        self._d, self._base = self.dir.copy(), self.base.copy()
+        # posiciones sin wrap y su historial circular (hist_len, réplicas), para detectar la autopista:
+        # la ventana más larga más el tramo entre comprobaciones, para fechar la confirmación exacta
+        self.window = (repeats + 1) * max(self.periods) if self.periods else 0
+        self.hist_len = self.window + min(self.periods) if self.periods else 0
+        self._ux, self._uy = self.x.copy(), self.y.copy()
+        self._hist_x = np.zeros((self.hist_len, n), dtype=np.int32)
+        self._hist_y = np.zeros((self.hist_len, n), dtype=np.int32)
+
+    def add_noise(self, density, box=None):
+        # celdas aleatorias de colores != 0 en un cuadrado de lado `box` centrado (toda la rejilla si None)
+        h, w = self.height, self.width
+        bh = h if box is None else min(box, h)
+        bw = w if box is None else min(box, w)
+        y0, x0 = (h - bh) // 2, (w - bw) // 2
+        shape = (self.n, bh, bw)
+        mask = self.rng.random(shape) < density
+        colors = self.rng.integers(1, self.rule.n_colors, size=shape, dtype=np.uint8)
+        self.grids[:, y0:y0 + bh, x0:x0 + bw] = np.where(mask, colors, 0)
+
+    # ---------------- Reglas ----------------
+    def advance(self, n_steps, max_steps=None):
+        cells = self.grids.reshape(-1)
+        w, h = self.width, self.height
+        write, turn_dir, next_base = self._write, self._turn_dir, self._next_base
+        dx, dy = self._dx, self._dy
+        check_every = min(self.periods) if self.periods else 0
+        if max_steps is not None:
+            n_steps = min(n_steps, max(0, max_steps - self.t))
+        for _ in range(n_steps):
+            if len(self._ids) == 0:
+                break
+            x, y, d = self._x, self._y, self._d
+            gi = self._off + y * w + x
+            k = self._base + cells[gi]
+            cells[gi] = write[k]
+            d = turn_dir[(k << 2) | d]
+            self._base = next_base[k]
+            self._d = d
+            mx, my = dx[d], dy[d]
+            self._x = (x + mx) % w
+            self._y = (y + my) % h
+            self._ux += mx
+            self._uy += my
+            if self.hist_len:
+                slot = self.t % self.hist_len
+                self._hist_x[slot] = self._ux
+                self._hist_y[slot] = self._uy
+            self.t += 1
+            if check_every and self.t >= self.window and self.t % check_every == 0:
+                self._check_highway()
+        self._sync()
+
+    def _sync(self):
+        # vuelca el estado de trabajo de las réplicas activas a los arrays públicos
+        ids = self._ids
+        self.x[ids], self.y[ids], self.dir[ids], self.base[ids] = self._x, self._y, self._d, self._base
+        self.steps[ids] = self.t
+
+    def _retire(self, done):
+        # saca del lote las réplicas marcadas en `done` (máscara sobre el estado compactado)
+        self._sync()
+        self.active[self._ids[done]] = False
+        keep = ~done
+        self._ids, self._off = self._ids[keep], self._off[keep]
+        self._x, self._y, self._d, self._base = self._x[keep], self._y[keep], self._d[keep], self._base[keep]
+        self._ux, self._uy = self._ux[keep], self._uy[keep]
+        self._hist_x, self._hist_y = self._hist_x[:, keep], self._hist_y[:, keep]
+
+    def _check_highway(self):
+        # autopista = los últimos `repeats` periodos con desplazamiento constante y no nulo
+        for p in self.periods:
+            n = (self.repeats + 1) * p
+            slots = (self.t - n + np.arange(n)) % self.hist_len
+            hx = self._hist_x[slots].T
+            hy = self._hist_y[slots].T
+            dxp = hx[:, p:] - hx[:, :-p]
+            dyp = hy[:, p:] - hy[:, :-p]
+            same = ((dxp == dxp[:, :1]) & (dyp == dyp[:, :1])).all(axis=1)
+            found = same & ((dxp[:, 0] != 0) | (dyp[:, 0] != 0))
+            if found.any():
+                self.highway_step[self._ids[found]] = self._confirmed(found, p)
+                self._retire(found)
+
+    def _confirmed(self, found, p):
+        # paso exacto en que se cumplió la condición para las réplicas `found`: como la comprobación
+        # anterior falló, la racha periódica empieza dentro del historial; la confirmación es el final
+        # de su primera ventana de repeats + 1 periodos (no el múltiplo de check_every en que se vio)
+        m = min(self.t, self.hist_len)
+        slots = (self.t - m + np.arange(m)) % self.hist_len
+        hx = self._hist_x[slots][:, found].T
+        hy = self._hist_y[slots][:, found].T
+        dxp = hx[:, p:] - hx[:, :-p]
+        dyp = hy[:, p:] - hy[:, :-p]
+        broken = (dxp != dxp[:, -1:]) | (dyp != dyp[:, -1:])
+        # índice (en el historial) de la primera posición de la racha: tras el último desplazamiento roto
+        last = broken.shape[1] - 1 - np.argmax(broken[:, ::-1], axis=1)
+        start = np.where(broken.any(axis=1), last + 1, 0)
+        # el historial guarda la posición tras el paso t - m + 1 + i
+        return self.t - m + start + (self.repeats + 1) * p
+
+    def run(self, max_steps, chunk=1024):
+        # avanza hasta que todas las réplicas terminen (autopista) o se llegue a max_steps
+        while len(self._ids) and self.t < max_steps:
+            self.advance(min(chunk, max_steps - self.t), max_steps=max_steps)
+        self._retire(np.ones(len(self._ids), dtype=bool))
+        return self.summary()
+
+    # ---------------- Resultados ----------------
+    def population(self):
+        return np.count_nonzero(self.grids.reshape(self.n, -1), axis=1)
+
+    def summary(self):
+        found = self.highway_step >= 0
+        steps = self.highway_step[found]
+        return {
+            'replicas': self.n,
+            'highways': int(found.sum()),
+            'steps_to_highway_mean': float(steps.mean()) if len(steps) else None,
+            'steps_to_highway_median': float(np.median(steps)) if len(steps) else None,
+            'steps_to_highway_min': int(steps.min()) if len(steps) else None,
+            'steps_to_highway_max': int(steps.max()) if len(steps) else None,
+        }
@@ -0,0 +1,177 @@
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .raster import ANT_COLOR, BASE_CELL_SIZE, CELL_COLOR, GRID_BG, ant_masks, color_ramp, rasterize
+
+# ---------------- Config ----------------
+PNG_LEVEL = 1             # compresión rápida: las imágenes de la hormiga son casi todo fondo liso
+MAX_WORKERS = 4
+IN_FLIGHT = 2             # fotogramas pendientes por hilo antes de frenar la simulación
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+# ---------------- Rasterizado de un fotograma (sin pygame) ----------------
+def _scale(cell_size):
+    # píxeles por celda tras rasterize (que reduce por bloques enteros cuando cell_size < 1)
+    return cell_size if cell_size >= 1 else 1 / int(round(1 / cell_size))
+
+
+def frame_shape(width, height, cell_size):
+    # (alto, ancho) en píxeles del fotograma de una vista width x height, igual que rasterize
+    if cell_size < 1:
+        f = int(round(1 / cell_size))
+        return -(-height // f), -(-width // f)
+    if cell_size == int(cell_size):
+        return height * int(cell_size), width * int(cell_size)
+    return int(height * cell_size), int(width * cell_size)
+
+
+def render_frame(cells, ants, cell_size, palette):
+    # cells: copia (filas, columnas) de la vista; ants: (xs, ys, dirs) relativos a su esquina.
+    # Devuelve (alto, ancho, 3) uint8 con la orientación de la imagen (filas = y)
+    rgb = rasterize(cells, cell_size, palette)
+    if not rgb.flags.writeable:
+        rgb = rgb.copy()
+    h, w, _ = rgb.shape
+    xs, ys, ds = ants
+    scale = _scale(cell_size)
+    px = np.floor(xs * scale).astype(np.int64)
+    py = np.floor(ys * scale).astype(np.int64)
+    cs = int(scale)
+    if cs < 2:
+        ok = (px >= 0) & (px < w) & (py >= 0) & (py < h)
+        rgb[py[ok], px[ok]] = ANT_COLOR
+        return rgb
+    for d, (mx, my) in enumerate(ant_masks(cs)):
+        sel = ds == d
+        X = (px[sel, None] + mx).ravel()
+        Y = (py[sel, None] + my).ravel()
+        ok = (X >= 0) & (X < w) & (Y >= 0) & (Y < h)
+        rgb[Y[ok], X[ok]] = ANT_COLOR
+    return rgb
+
+
+def encode_png(rgb):
+    # PNG RGB de 8 bits con el filtro "Up" (resta de la fila anterior): con el zoom las filas se
+    # repiten cell_size veces y quedan a cero, así zlib comprime antes y el fichero es ~2.5x menor.
+    # zlib libera el GIL, así que los hilos comprimen en paralelo
+    h, w, _ = rgb.shape
+    rows = rgb.reshape(h, 3 * w)
+    raw = np.empty((h, 1 + 3 * w), dtype=np.uint8)
+    raw[:, 0] = 2  # byte de filtro de cada fila
+    raw[0, 1:] = rows[0]
+    np.subtract(rows[1:], rows[:-1], out=raw[1:, 1:])
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    return (PNG_SIGNATURE + chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, PNG_LEVEL)) + chunk(b"IEND", b""))
+
+
+# ---------------- Exportación ----------------
+class FrameExporter:
+    # La simulación sólo copia la vista y las hormigas (snapshot); paleta, zoom, hormigas y
+    # codificación se hacen en un pool de hilos mientras el motor sigue avanzando. Con más de
+    # IN_FLIGHT fotogramas por hilo pendientes se espera al más antiguo: la memoria queda acotada.
+    # `out` es un directorio (PNG numerados) o un flujo binario / ruta para RGB crudo (rgb24), que
+    # se escribe en orden para poder encadenarlo a un codificador (ffmpeg -f rawvideo ...)
+    def __init__(self, engine, out, fmt="png", zoom=1.0, view=None, workers=None):
+        if fmt not in ("png", "raw"):
+            raise ValueError(f"formato de fotograma desconocido: {fmt!r}")
+        self.engine = engine
+        self.fmt = fmt
+        self.cell_size = BASE_CELL_SIZE * zoom
+        self.view = view or (0, 0, engine.width, engine.height)
+        x0, y0, x1, y1 = self.view
+        self.shape = frame_shape(x1 - x0, y1 - y0, self.cell_size)
+        self.palette = color_ramp(engine.rule.n_colors, GRID_BG, CELL_COLOR)
+        self.count = 0
+        self.bytes = 0
+        self.stream = None
+        self.owns_stream = False
+        if fmt == "png":
+            self.out = out
+            os.makedirs(out, exist_ok=True)
+        elif isinstance(out, (str, os.PathLike)):
+            self.stream = open(out, "wb")
+            self.owns_stream = True
+        else:
+            self.stream = out
+        workers = workers or min(MAX_WORKERS, os.cpu_count() or 1)
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.pending = deque()
+        self.max_pending = IN_FLIGHT * workers
+
+    def capture(self):
+        x0, y0, x1, y1 = self.view
+        cells = np.array(self.engine.region(x0, y0, x1, y1))  # copia: el motor sigue escribiendo
+        xs, ys, ds = self.engine.ants()
+        ants = (np.asarray(xs) - x0, np.asarray(ys) - y0, np.array(ds))
+        if len(self.pending) >= self.max_pending:
+            self._finish(self.pending.popleft())
+        self.pending.append(self.pool.submit(self._work, self.count, cells, ants))
+        self.count += 1
+
+    def _work(self, index, cells, ants):
+        rgb = render_frame(cells, ants, self.cell_size, self.palette)
+        if self.fmt == "raw":
+            return rgb
+        data = encode_png(rgb)
+        with open(os.path.join(self.out, f"frame_{index:06d}.png"), "wb") as f:
+            f.write(data)
+        return len(data)
+
+    def _finish(self, future):
+        result = future.result()
+        if self.fmt == "raw":
+            self.stream.write(memoryview(np.ascontiguousarray(result)).cast("B"))
+            result = result.nbytes
+        self.bytes += result
+
+    def close(self):
+        while self.pending:
+            self._finish(self.pending.popleft())
+        self.pool.shutdown()
+        if self.stream is not None:
+            self.stream.flush()
+            if self.owns_stream:
+                self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def frame_steps(n_steps, every=None, frames=None):
+    # generador de tramos de simulación entre fotogramas: cada `every` pasos o `frames` fotogramas
+    # repartidos; el último fotograma es siempre el estado final
+    if every:
+        for _ in range(n_steps // every):
+            yield every
+        if n_steps % every:
+            yield n_steps % every
+        return
+    frames = max(1, min(frames or 1, n_steps or 1))
+    prev = 0
+    for i in range(1, frames + 1):
+        edge = n_steps * i // frames
+        yield edge - prev
+        prev = edge
+
+
+def export_frames(engine, n_steps, out, every=None, frames=None, fmt="png", zoom=1.0, view=None,
+                  workers=None, fast_forward=False):
+    # simula n_steps pasos guardando un fotograma al final de cada tramo (ver frame_steps)
+    with FrameExporter(engine, out, fmt=fmt, zoom=zoom, view=view, workers=workers) as exporter:
+        for seg in frame_steps(n_steps, every, frames):
+            engine.run(seg, fast_forward=fast_forward)
+            exporter.capture()
+    return exporter
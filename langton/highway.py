@@ -0,0 +1,245 @@
+import numpy as np
+
+# ---------------- Config ----------------
+MAX_PERIOD = 512        # periodo más largo que se busca
+REPEATS = 4             # periodos idénticos consecutivos exigidos para confirmar
+DETECT_WINDOW = (REPEATS + 1) * MAX_PERIOD
+DETECT_INTERVAL = 1 << 14   # pasos normales entre intentos de detección (se duplica si falla)
+MAX_INTERVAL = 1 << 22
+STAMP_BATCH = 1 << 15   # periodos estampados por lote (limita la memoria temporal)
+
+
+# ---------------- Trayectoria ----------------
+def unwrap_path(engine, log):
+    # claves del registro de celdas -> trayectoria (N, 2) sin saltos de wrap-around, relativa al primer paso
+    xs, ys = engine.dirty_coords(log)
+    steps = np.stack([np.diff(xs), np.diff(ys)], axis=1)
+    if engine.bounded:
+        steps[:, 0] = (steps[:, 0] + 1) % engine.width - 1
+        steps[:, 1] = (steps[:, 1] + 1) % engine.height - 1
+    path = np.zeros((len(xs), 2), dtype=np.int64)
+    np.cumsum(steps, axis=0, out=path[1:])
+    return path
+
+
+def find_period(path, max_period=MAX_PERIOD, repeats=REPEATS):
+    # menor P tal que, en los últimos repeats periodos, pos[t + P] - pos[t] es un desplazamiento constante
+    # no nulo. Devuelve (P, (dx, dy)) o None.
+    max_period = min(max_period, len(path) // (repeats + 1))
+    if max_period < 1:
+        return None
+    # filtro barato: comparar sólo las posiciones en los bordes de cada periodo, para todos los P a la vez
+    periods = np.arange(1, max_period + 1)
+    marks = path[len(path) - 1 - periods[:, None] * np.arange(repeats + 1)[None, :]]
+    deltas = marks[:, :-1] - marks[:, 1:]
+    ok = (deltas == deltas[:, :1]).all(axis=(1, 2)) & deltas[:, 0].any(axis=1)
+    for p in periods[ok].tolist():
+        n = (repeats + 1) * p
+        tail = path[-n:]
+        delta = tail[p:] - tail[:-p]
+        d = delta[0]
+        if (d[0] or d[1]) and (delta == d).all():
+            return p, (int(d[0]), int(d[1]))
+    return None
+
+
+def trajectory_period(engine, log, max_period=MAX_PERIOD, repeats=REPEATS):
+    # detección pasiva a partir de un registro de celdas ya recogido (no avanza el motor)
+    if len(log) < 2:
+        return None
+    return find_period(unwrap_path(engine, log), max_period, repeats)
+
+
+def confirmation_step(engine, log, period, repeats=REPEATS):
+    # primer paso en que trajectory_period habría confirmado `period`: final de la primera ventana de
+    # repeats + 1 periodos con desplazamiento constante dentro de la racha periódica con que acaba el
+    # registro (la misma definición que Ensemble, sin redondear al siguiente múltiplo del periodo).
+    # log[m] es la celda que deja el paso engine.steps - len(log) + m + 1: la posición tras el paso
+    # engine.steps - len(log) + m. El registro debe empezar antes de la racha para que sea exacto
+    path = unwrap_path(engine, log)
+    delta = path[period:] - path[:-period]
+    broken = np.flatnonzero((delta != delta[-1]).any(axis=1))
+    start = int(broken[-1]) + 1 if len(broken) else 0
+    return engine.steps - len(log) + start + (repeats + 1) * period - 1
+
+
+# ---------------- Autopista ----------------
+class Highway:
+    # Motivo periódico: en cada periodo la hormiga recorre las celdas origen + offsets, que valían `pre`
+    # y quedan en `post`, y termina desplazada `shift` con la misma dirección y estado.
+    def __init__(self, period, shift, offsets, pre, post, origin, ant_dir, ant_state, steps):
+        self.period = period
+        self.shift = shift
+        self.offsets = offsets
+        self.pre = pre
+        self.post = post
+        self.origin = origin
+        self.ant_dir = ant_dir
+        self.ant_state = ant_state
+        self.steps = steps
+
+        # covered[o] = menor j >= 1 tal que o + j*shift pertenece a la huella (el periodo m - j ya tocó
+        # esa celda), 0 si la celda es nueva. leaving = celdas que ningún periodo posterior vuelve a tocar.
+        index = {tuple(o): n for n, o in enumerate(offsets.tolist())}
+        sx, sy = shift
+        span = int(np.ptp(offsets[:, 0]) + np.ptp(offsets[:, 1])) + 2
+        self.covered = np.zeros(len(offsets), dtype=np.int64)
+        self.leaving = np.ones(len(offsets), dtype=bool)
+        self.consistent = True
+        for n, (ox, oy) in enumerate(offsets.tolist()):
+            for j in range(1, span + 1):
+                m = index.get((ox + j * sx, oy + j * sy))
+                if m is not None:
+                    self.covered[n] = j
+                    # lo que dejó el periodo anterior debe ser lo que este periodo espera encontrar
+                    if post[m] != pre[n]:
+                        self.consistent = False
+                    break
+            for j in range(1, span + 1):
+                if (ox - j * sx, oy - j * sy) in index:
+                    self.leaving[n] = False
+                    break
+        self.max_cover = int(self.covered.max()) if len(offsets) else 0
+
+    def __repr__(self):
+        return f"Highway(period={self.period}, shift={self.shift})"
+
+    def _cells(self, engine, first, count, mask=None):
+        # coordenadas de la huella para los periodos first .. first + count - 1
+        offsets = self.offsets if mask is None else self.offsets[mask]
+        m = np.arange(first, first + count, dtype=np.int64)[:, None]
+        xs = self.origin[0] + m * self.shift[0] + offsets[None, :, 0]
+        ys = self.origin[1] + m * self.shift[1] + offsets[None, :, 1]
+        return xs.reshape(-1), ys.reshape(-1)
+
+    def max_periods(self, engine):
+        # en rejilla con wrap-around la autopista acaba alcanzando su propia estela: no estampar más allá
+        if not engine.bounded:
+            return None
+        limits = []
+        for size, d, ext in ((engine.width, self.shift[0], np.ptp(self.offsets[:, 0])),
+                             (engine.height, self.shift[1], np.ptp(self.offsets[:, 1]))):
+            if d:
+                limits.append(max(0, (size - int(ext) - 1) // abs(d) - 1))
+        return min(limits)
+
+    def fast_forward(self, engine, periods):
+        # avanza `periods` periodos estampando el motivo en O(longitud); devuelve los periodos aplicados
+        if (engine.steps != self.steps or not self.consistent
+                or (engine.ant_dir, engine.ant_state) != (self.ant_dir, self.ant_state)):
+            return 0
+        limit = self.max_periods(engine)
+        if limit is not None:
+            periods = min(periods, limit)
+        if periods <= 0:
+            return 0
+
+        # 1) comprobar que el terreno por delante es el que el motivo espera
+        fresh = self.covered == 0
+        for m in range(min(periods, self.max_cover)):
+            # celdas que tocó algún periodo anterior al avance: leer la rejilla real
+            mask = (self.covered > m) | fresh
+            xs, ys = self._cells(engine, m, 1, mask)
+            if (engine.gather(xs, ys) != self.pre[mask]).any():
+                periods = m
+                break
+        pre_fresh = self.pre[fresh]
+        first = self.max_cover
+        while first < periods:
+            count = min(STAMP_BATCH, periods - first)
+            xs, ys = self._cells(engine, first, count, fresh)
+            bad = (engine.gather(xs, ys) != np.tile(pre_fresh, count)).reshape(count, -1).any(axis=1)
+            if bad.any():
+                periods = first + int(np.argmax(bad))
+                break
+            first += count
+        if periods <= 0:
+            return 0
+
+        # 2) estampar: primero las celdas que ya no se vuelven a tocar, luego los últimos periodos en orden
+        post_leaving = self.post[self.leaving]
+        first = 0
+        while first < periods:
+            count = min(STAMP_BATCH, periods - first)
+            xs, ys = self._cells(engine, first, count, self.leaving)
+            engine.scatter(xs, ys, np.tile(post_leaving, count))
+            first += count
+        for m in range(max(0, periods - self.max_cover), periods):
+            xs, ys = self._cells(engine, m, 1)
+            engine.scatter(xs, ys, self.post)
+
+        # 3) mover la hormiga
+        x = self.origin[0] + periods * self.shift[0]
+        y = self.origin[1] + periods * self.shift[1]
+        if engine.bounded:
+            x, y = x % engine.width, y % engine.height
+        engine.ant_x, engine.ant_y = x, y
+        engine.steps += periods * self.period
+        self.origin = (x, y)
+        self.steps = engine.steps
+        return periods
+
+
+# ---------------- Detección activa ----------------
+def detect_highway(engine, window=DETECT_WINDOW, max_period=MAX_PERIOD, repeats=REPEATS):
+    # Simula `window` pasos registrando la trayectoria (son pasos reales, no se descartan), busca un periodo
+    # y lo confirma simulando un periodo más con la huella leída antes y después. Devuelve Highway o None.
+    saved = engine.dirty
+    logs = []
+    try:
+        engine.dirty = []
+        engine.advance(window)
+        logs.append(engine.dirty)
+        path = unwrap_path(engine, engine.dirty)
+        found = find_period(path, max_period, repeats)
+        if found is None:
+            return None
+        period, shift = found
+        rel = path[-period:] - path[-period]
+        offsets = np.unique(rel, axis=0)
+
+        ox, oy = engine.ant_x, engine.ant_y
+        ant_dir, ant_state = engine.ant_dir, engine.ant_state
+        pre = engine.gather(ox + offsets[:, 0], oy + offsets[:, 1])
+        engine.dirty = []
+        engine.advance(period)
+        logs.append(engine.dirty)
+        # el periodo de verificación debe repetir exactamente el recorrido y el estado de la hormiga
+        check = unwrap_path(engine, engine.dirty)
+        if len(check) != period or (check != rel).any():
+            return None
+        ex, ey = ox + shift[0], oy + shift[1]
+        if engine.bounded:
+            ex, ey = ex % engine.width, ey % engine.height
+        if (engine.ant_x, engine.ant_y, engine.ant_dir, engine.ant_state) != (ex, ey, ant_dir, ant_state):
+            return None
+        post = engine.gather(ox + offsets[:, 0], oy + offsets[:, 1])
+        hw = Highway(period, shift, offsets, pre, post, (engine.ant_x, engine.ant_y),
+                     ant_dir, ant_state, engine.steps)
+        return hw if hw.consistent else None
+    finally:
+        engine.dirty = saved
+        if saved is not None:
+            for log in logs:
+                saved.extend(log)
+
+
+def run_fast(engine, n_steps):
+    # como engine.advance(n_steps), pero saltando la autopista analíticamente cuando aparece. El salto
+    # no simula los pasos pero sí estampa cada celda de la estela, así que tiempo y memoria siguen
+    # creciendo con n_steps: en el mundo sin bordes (RL) cada ~6.700 pasos de autopista estrenan una
+    # tesela de 64 KiB, unos 0,3 s / 150 MB a 1e7 pasos y 3 s / 1 GB a 1e8; 1e9 no cabe en memoria.
+    # En rejilla fija la autopista se corta al alcanzar su propia estela (Highway.max_periods)
+    target = engine.steps + n_steps
+    interval = DETECT_INTERVAL
+    while engine.steps < target:
+        if target - engine.steps <= DETECT_WINDOW + MAX_PERIOD:
+            engine.advance(target - engine.steps)
+            break
+        hw = detect_highway(engine)
+        if hw is not None and hw.fast_forward(engine, (target - engine.steps) // hw.period):
+            interval = DETECT_INTERVAL
+            continue
+        engine.advance(min(interval, target - engine.steps))
+        interval = min(interval * 2, MAX_INTERVAL)
+    return engine.steps
@@ -0,0 +1,77 @@
+import json
+import time
+
+import numpy as np
+
+# ---------------- Config ----------------
+# fases de un frame del visor, en el orden en que ocurren (ver LangtonsAntApp.run / draw)
+PHASES = ("wait", "events", "sim", "canvas", "ants", "panel", "hud", "flip")
+PROFILE_FRAMES = 600   # frames en el buffer circular (~10 s a 60 FPS)
+
+
+# ---------------- Perfil por fases ----------------
+class FrameProfiler:
+    # Buffer circular de tamaño fijo con el tiempo de cada fase por frame. mark(fase) suma el tiempo
+    # transcurrido desde la marca anterior a esa fase: un perf_counter y una suma por fase, así
+    # que se puede dejar siempre activo y volcar el historial cuando el visor da tirones.
+    def __init__(self, size=PROFILE_FRAMES):
+        self.size = size
+        self.index = {name: i for i, name in enumerate(PHASES)}
+        self.phases = np.zeros((size, len(PHASES)))
+        self.frame = np.zeros(size)                 # duración total del frame (s)
+        self.steps = np.zeros(size, dtype=np.int64)  # pasos del motor al cerrar el frame
+        self.count = 0                               # frames registrados desde el inicio
+        self.current = [0.0] * len(PHASES)
+        self.t_frame = self.t_mark = time.perf_counter()
+
+    def start(self):
+        self.current = [0.0] * len(PHASES)
+        self.t_frame = self.t_mark = time.perf_counter()
+
+    def mark(self, phase):
+        t = time.perf_counter()
+        self.current[self.index[phase]] += t - self.t_mark
+        self.t_mark = t
+
+    def end(self, steps):
+        row = self.count % self.size
+        self.phases[row] = self.current
+        self.frame[row] = time.perf_counter() - self.t_frame
+        self.steps[row] = steps
+        self.count += 1
+
+    def recent(self):
+        # (fases, frames, pasos) de los frames guardados, del más antiguo al más reciente
+        n = min(self.count, self.size)
+        order = (np.arange(n) + self.count - n) % self.size
+        return self.phases[order], self.frame[order], self.steps[order]
+
+    def summary(self):
+        phases, frame, steps = self.recent()
+        if len(frame) == 0:
+            return None
+        total = frame.sum()
+        return {
+            'frames': len(frame),
+            'fps': len(frame) / total if total > 0 else 0.0,
+            'frame_p50_ms': float(np.percentile(frame, 50)) * 1e3,
+            'frame_p99_ms': float(np.percentile(frame, 99)) * 1e3,
+            'frame_max_ms': float(frame.max()) * 1e3,
+            # abs: con la reproducción hacia atrás los pasos disminuyen
+            'steps_per_s': abs(int(steps[-1]) - int(steps[0])) / total if total > 0 else 0.0,
+            'phase_ms': {name: float(phases[:, i].mean()) * 1e3 for i, name in enumerate(PHASES)},
+        }
+
+    def dump(self, path):
+        # resumen más el historial completo (ms por fase y frame), en JSON
+        phases, frame, steps = self.recent()
+        data = {
+            'summary': self.summary(),
+            'phases': list(PHASES),
+            'frames': [{'frame_ms': round(f * 1e3, 4), 'steps': int(s),
+                        'phase_ms': [round(p * 1e3, 4) for p in row]}
+                       for row, f, s in zip(phases.tolist(), frame.tolist(), steps.tolist())],
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+        return path
@@ -0,0 +1,115 @@
+import colorsys
+from functools import lru_cache
+
+import numpy as np
+
+# ---------------- Colores y zoom del canvas ----------------
+# compartidos por el visor (hormiga_langton.py) y la exportación de fotogramas (frames.py)
+GRID_BG = (18, 22, 30)
+CELL_COLOR = (100, 220, 160)
+ANT_COLOR = (255, 140, 60)
+BASE_CELL_SIZE = 8
+ZOOM_LEVELS = [0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 3.0]
+HEAT_COLORS = [(40, 60, 150), (230, 90, 60), (250, 220, 90), (255, 255, 255)]  # pocas -> muchas visitas
+HEAT_SCALE = 12   # niveles del mapa de calor por cada duplicación de visitas (satura en ~2^21)
+
+
+# ---------------- Rasterizado vectorizado (sin pygame) ----------------
+def make_palette(colors):
+    # lista de colores RGB -> tabla (K, 3) indexada por el valor de la celda
+    return np.asarray(colors, dtype=np.uint8).reshape(-1, 3)
+
+
+def color_ramp(n_colors, background, first):
+    # fondo para el color 0, `first` para el 1 y tonos repartidos por el círculo HSV para el resto
+    colors = [background, first][:n_colors]
+    if n_colors > 2:
+        h0, s0, v0 = colorsys.rgb_to_hsv(*(c / 255 for c in first))
+        for k in range(1, n_colors - 1):
+            r, g, b = colorsys.hsv_to_rgb((h0 + k / (n_colors - 1)) % 1.0, s0, v0)
+            colors.append((int(r * 255), int(g * 255), int(b * 255)))
+    return make_palette(colors)
+
+
+def heat_palette(background):
+    # 256 colores: el 0 (nunca visitada) es el fondo y 1..255 recorren HEAT_COLORS
+    stops = np.asarray(HEAT_COLORS, dtype=np.float64)
+    t = np.linspace(0, len(stops) - 1, 255)
+    i = np.minimum(t.astype(np.intp), len(stops) - 2)
+    frac = (t - i)[:, None]
+    ramp = stops[i] * (1 - frac) + stops[i + 1] * frac
+    return make_palette([background] + np.rint(ramp).astype(np.uint8).tolist())
+
+
+def density_palette(background, color):
+    # 256 tonos del fondo (0: bloque vacío) a `color` (255: bloque lleno), para lod.density_levels
+    t = np.linspace(0, 1, 256)[:, None]
+    ramp = np.asarray(background, dtype=np.float64) * (1 - t) + np.asarray(color, dtype=np.float64) * t
+    return make_palette(np.rint(ramp).astype(np.uint8))
+
+
+def heat_levels(counts):
+    # visitas -> índice de heat_palette en escala logarítmica fija (no depende del máximo): una celda
+    # sólo cambia de color cuando cambian sus propias visitas, así que basta repintar las sucias
+    counts = np.asarray(counts)
+    levels = np.zeros(counts.shape, dtype=np.uint8)
+    hit = counts > 0
+    levels[hit] = 1 + np.minimum(254, (np.log2(counts[hit]) * HEAT_SCALE).astype(np.int64))
+    return levels
+
+
+def downsample(cells, factor):
+    # reduce bloques factor x factor a su valor máximo para que las celdas vivas no desaparezcan
+    h, w = cells.shape
+    ph, pw = -h % factor, -w % factor
+    if ph or pw:
+        cells = np.pad(cells, ((0, ph), (0, pw)))
+    h2, w2 = cells.shape[0] // factor, cells.shape[1] // factor
+    return cells.reshape(h2, factor, w2, factor).max(axis=(1, 3))
+
+
+def rasterize(cells, cell_size, palette):
+    # cells: (filas, columnas) con índices de color. Devuelve (filas*cs, columnas*cs, 3) uint8.
+    # Para pygame.surfarray hay que pasar la rejilla traspuesta (x, y).
+    if cell_size < 1:
+        cells = downsample(cells, int(round(1 / cell_size)))
+        cell_size = 1
+    rgb = palette[cells]
+    h, w = cells.shape
+    if cell_size == int(cell_size):
+        cs = int(cell_size)
+        if cs == 1:
+            return rgb
+        # expandir primero las columnas y después repetir filas enteras: dos copias contiguas salen
+        # ~10 veces más rápidas que un solo broadcast (h, cs, w, cs, 3) con strides de 5 ejes
+        return np.repeat(rgb.repeat(cs, axis=1)[:, None], cs, axis=1).reshape(h * cs, w * cs, 3)
+    # tamaño fraccionario: muestreo por vecino más cercano
+    rows = (np.arange(int(h * cell_size)) / cell_size).astype(np.intp)
+    cols = (np.arange(int(w * cell_size)) / cell_size).astype(np.intp)
+    return rgb[rows[:, None], cols[None, :]]
+
+
+# ---------------- Marcador de la hormiga ----------------
+@lru_cache(maxsize=8)
+def ant_masks(cs):
+    # píxeles (dx, dy) del triángulo de cada dirección (N, E, S, O), relativos a la esquina de una celda
+    # de cs píxeles; rellenados con NumPy para que el visor y los fotogramas exportados pinten lo mismo
+    cs = int(cs)
+    size = max(2, cs // 2)
+    c = size
+    shapes = [
+        [(c, c - size), (c - size, c + size), (c + size, c + size)],
+        [(c + size, c), (c - size, c - size), (c - size, c + size)],
+        [(c, c + size), (c - size, c - size), (c + size, c - size)],
+        [(c - size, c), (c + size, c - size), (c + size, c + size)],
+    ]
+    py, px = np.mgrid[0:2 * size + 1, 0:2 * size + 1]
+    masks = []
+    for pts in shapes:
+        # dentro (bordes incluidos) si el píxel queda al mismo lado de las tres aristas
+        cross = [(bx - ax) * (py - ay) - (by - ay) * (px - ax)
+                 for (ax, ay), (bx, by) in zip(pts, pts[1:] + pts[:1])]
+        inside = np.all([e >= 0 for e in cross], axis=0) | np.all([e <= 0 for e in cross], axis=0)
+        my, mx = np.nonzero(inside)
+        masks.append((mx + cs // 2 - size, my + cs // 2 - size))
+    return masks
@@ -0,0 +1,97 @@
+import re
+
+# ---------------- Reglas de hormiga / turmite ----------------
+# Giros como incremento de dirección: N = sin giro, R = derecha, U = media vuelta, L = izquierda
+TURNS = {'N': 0, 'R': 1, 'U': 2, 'L': 3}
+# Notación de tablas de turmites ({{{escribe, giro, siguiente}, ...}, ...}): 1=N, 2=R, 4=U, 8=L
+TABLE_TURNS = {1: 0, 2: 1, 4: 2, 8: 3}
+
+
+class Rule:
+    # Regla compilada a tablas planas indexadas por k = estado * n_colors + color.
+    # El kernel guarda "estado * n_colors" directamente (base) para ahorrarse la multiplicación:
+    #   k = base + color; color' = write[k]; dir' = turn_dir[(k << 2) | dir]; base' = next_base[k]
+    def __init__(self, transitions, name):
+        # transitions[estado][color] = (color_escrito, giro 0..3, estado_siguiente)
+        self.name = name
+        self.n_states = len(transitions)
+        self.n_colors = len(transitions[0])
+        if any(len(row) != self.n_colors for row in transitions):
+            raise ValueError("todas las filas de la regla deben tener el mismo número de colores")
+        if self.n_colors > 256:
+            raise ValueError("como máximo 256 colores (celdas uint8)")
+        self.transitions = [list(row) for row in transitions]
+
+        write, turn, next_base = [], [], []
+        for row in transitions:
+            for color_w, t, s in row:
+                if not (0 <= color_w < self.n_colors and 0 <= s < self.n_states):
+                    raise ValueError(f"transición fuera de rango en la regla {name!r}")
+                write.append(color_w)
+                turn.append(t & 3)
+                next_base.append(s * self.n_colors)
+        self.write = bytes(write)
+        self.turn = tuple(turn)
+        self.next_base = tuple(next_base)
+        self.turn_dir = tuple((d + t) & 3 for t in turn for d in range(4))
+
+        # Inversa para retroceder, indexada por j = estado_siguiente * n_colors + color_escrito (lo que
+        # queda tras el paso): color previo unwrite[j], base previa prev_base[j] y dirección previa
+        # back_dir[(j << 2) | dir]. Sólo existe si cada j proviene de una única transición k.
+        n = len(write)
+        source = [-1] * n
+        for k in range(n):
+            j = next_base[k] + write[k]
+            if source[j] != -1:
+                break
+            source[j] = k
+        self.reversible = -1 not in source
+        if self.reversible:
+            self.unwrite = bytes(k % self.n_colors for k in source)
+            self.prev_base = tuple(k - k % self.n_colors for k in source)
+            self.back_dir = tuple((d - turn[k]) & 3 for k in source for d in range(4))
+        else:
+            self.unwrite = self.prev_base = self.back_dir = None
+
+    def __repr__(self):
+        return f"Rule({self.name!r})"
+
+    @classmethod
+    def from_string(cls, spec):
+        # "RL", "LLRR", "LRRRRRLLR"...: un estado; el color c gira según spec[c] y pasa a c + 1
+        spec = spec.upper()
+        if len(spec) < 2 or any(ch not in TURNS for ch in spec):
+            raise ValueError(f"regla no válida: {spec!r} (usa letras L, R, N, U)")
+        n = len(spec)
+        return cls([[((c + 1) % n, TURNS[ch], 0) for c, ch in enumerate(spec)]], spec)
+
+    @classmethod
+    def from_table(cls, spec):
+        # "{{{1,2,0},{0,8,0}}}" -> una fila por estado, una terna por color
+        nums = [int(v) for v in re.findall(r"-?\d+", spec)]
+        rows = re.findall(r"\{\s*(\{[^{}]*\}(?:\s*,\s*\{[^{}]*\})*)\s*\}", spec)
+        if not nums or len(nums) % 3 or not rows:
+            raise ValueError(f"tabla de turmite no válida: {spec!r}")
+        n_colors = rows[0].count("{")
+        triples = [tuple(nums[i:i + 3]) for i in range(0, len(nums), 3)]
+        transitions = []
+        for s in range(len(triples) // n_colors):
+            row = []
+            for w, t, nxt in triples[s * n_colors:(s + 1) * n_colors]:
+                if t not in TABLE_TURNS:
+                    raise ValueError(f"giro no válido en tabla de turmite: {t}")
+                row.append((w, TABLE_TURNS[t], nxt))
+            transitions.append(row)
+        return cls(transitions, re.sub(r"\s+", "", spec))
+
+
+def parse_rule(spec):
+    if isinstance(spec, Rule):
+        return spec
+    spec = spec.strip()
+    if spec.startswith("{"):
+        return Rule.from_table(spec)
+    return Rule.from_string(spec)
+
+
+CLASSIC = Rule.from_string("RL")
@@ -0,0 +1,271 @@
+import numpy as np
+
+from .colony import Colony
+from .engine import DX, DY
+
+# ---------------- Config ----------------
+STATS_CHUNK = 1 << 16   # pasos por bloque del registro de transiciones
+HEATMAP_MAX_CELLS = 1 << 25   # rejilla más grande con mapa de visitas (uint32 por celda: 128 MB)
+# contadores int64 al principio del bloque de memoria; después, el mapa de visitas uint32 (con mapa de
+# calor) o un bit por celda que marca las ya visitadas (sin él)
+FIELDS = ("population", "distinct", "x0", "y0", "x1", "y1", "dir_n", "dir_e", "dir_s", "dir_w",
+          "pop_stale", "box_stale", "origin", "heatmap")
+POP, DISTINCT, X0, Y0, X1, Y1 = range(6)
+DIRS = slice(6, 10)
+POP_STALE, BOX_STALE, ORIGIN, HEATMAP = 10, 11, 12, 13
+
+_DX = np.asarray(DX, dtype=np.int64)
+_DY = np.asarray(DY, dtype=np.int64)
+
+
+def heatmap_fits(width, height):
+    return width * height <= HEATMAP_MAX_CELLS
+
+
+def stats_nbytes(width, height, heatmap=True):
+    per_cell = 4 * width * height if heatmap else ((width + 7) >> 3) * height
+    return 8 * len(FIELDS) + per_cell
+
+
+# ---------------- Métricas incrementales ----------------
+class RunStats:
+    # Métricas de la partida que se mantienen al avanzar, sin recorrer la rejilla: población, celdas
+    # distintas visitadas, caja del área visitada, histograma de direcciones de movimiento y, si la
+    # rejilla no pasa de HEATMAP_MAX_CELLS, mapa de visitas (uint32 por celda, para el mapa de calor).
+    # Sin mapa, las celdas visitadas se marcan con un bit (1/32 de la memoria) y cualquier retroceso
+    # reinicia la historia, porque no se sabe qué celdas dejan de estar visitadas. Con las estadísticas
+    # activas engine.advance / retreat pasan por aquí: el kernel sólo anota la transición de cada paso
+    # en read_log (un byte, ver trajectory.trace) y cada bloque se resume con NumPy. La población
+    # cambia según la transición (pop_delta[k]); direcciones y posiciones salen de un cumsum de los
+    # giros. Leer cualquier métrica es O(1) salvo tras ediciones
+    # masivas (scatter, macro-pasos), que sólo marcan la población para un recuento perezoso, y tras
+    # retroceder, que obliga a recalcular la caja desde el mapa la próxima vez que se pida. La historia
+    # (visitas, direcciones) cuenta desde el paso `origin` en que se activaron; retroceder más atrás la
+    # reinicia en el paso alcanzado.
+    # El avance analítico de la autopista (fast_forward) no pasa por advance: sus pasos no se cuentan
+    def __init__(self, engine, buf=None, heatmap=None):
+        # heatmap: con mapa de visitas; None = si la rejilla cabe (heatmap_fits). Con `buf` manda lo que
+        # diga su cabecera
+        if isinstance(engine, Colony) or not engine.bounded:
+            raise ValueError("las estadísticas incrementales son para una sola hormiga en rejilla fija")
+        if heatmap is None:
+            heatmap = heatmap_fits(engine.width, engine.height)
+        elif heatmap and not heatmap_fits(engine.width, engine.height):
+            raise ValueError(f"rejilla demasiado grande para el mapa de calor: el mapa de visitas ocuparía "
+                             f"{4 * engine.width * engine.height >> 20} MB (máximo "
+                             f"{HEATMAP_MAX_CELLS:,} celdas)")
+        if len(engine.rule.write) > 256:
+            raise ValueError(f"la regla {engine.rule.name} tiene demasiadas transiciones para anotarlas "
+                             f"en un byte")
+        self.engine = engine
+        self.rule = None
+        self.log = bytearray(STATS_CHUNK)
+        if buf is None:
+            # población inicial desconocida: un solo recuento la primera vez que se lea
+            buf = bytearray(stats_nbytes(engine.width, engine.height, heatmap))
+            np.frombuffer(buf, dtype=np.int64, count=len(FIELDS))[HEATMAP] = heatmap
+            self.attach(buf)
+            self.reset()
+            self.counters[POP_STALE] = 1
+            self.counters[ORIGIN] = engine.steps
+        else:
+            self.attach(buf)  # memoria ya inicializada (p. ej. compartida con el proceso de simulación)
+
+    def attach(self, buf):
+        # `buf` de stats_nbytes bytes: contadores y mapa de visitas (o bits de visitadas) viven ahí (ver
+        # worker.SimWorker); el campo HEATMAP de la cabecera dice cuál de los dos
+        engine = self.engine
+        self.buf = buf
+        self.counters = np.frombuffer(buf, dtype=np.int64, count=len(FIELDS))
+        if self.counters[HEATMAP]:
+            self.visits = np.frombuffer(buf, dtype=np.uint32, count=engine.width * engine.height,
+                                        offset=8 * len(FIELDS)).reshape(engine.height, engine.width)
+            self.seen = None
+        else:
+            self.visits = None
+            self.seen = np.frombuffer(buf, dtype=np.uint8, count=((engine.width + 7) >> 3) * engine.height,
+                                      offset=8 * len(FIELDS))
+
+    def reset(self):
+        # rejilla vacía y sin historia (engine.reset)
+        self.counters[POP] = self.counters[POP_STALE] = 0
+        self.restart()
+
+    def restart(self):
+        # borra la historia (visitas, direcciones, caja) y la hace empezar en el paso actual
+        c = self.counters
+        c[DISTINCT] = c[DIRS] = c[BOX_STALE] = 0
+        c[X0], c[Y0], c[X1], c[Y1] = self.engine.width, self.engine.height, 0, 0  # caja vacía: x1 <= x0
+        c[ORIGIN] = self.engine.steps
+        (self.seen if self.visits is None else self.visits).fill(0)
+
+    def _tables(self):
+        rule = self.engine.rule
+        if rule is self.rule:
+            return
+        k = np.arange(len(rule.write))
+        was_live = (k % rule.n_colors) != 0
+        self.turn = np.asarray(rule.turn, dtype=np.uint8)
+        self.pop_delta = (np.frombuffer(rule.write, dtype=np.uint8) != 0).astype(np.int64) - was_live
+        if rule.reversible:
+            # giro relativo que deshace cada paso (back_dir con dirección 0) y su cambio de población
+            self.back_turn = np.asarray(rule.back_dir[::4], dtype=np.uint8)
+            self.back_pop = (np.frombuffer(rule.unwrite, dtype=np.uint8) != 0).astype(np.int64) - was_live
+        self.rule = rule
+
+    # ---------------- Avance ----------------
+    def advance(self, n):
+        self._tables()
+        self._run(self.engine.advance, self.forward, n)
+
+    def retreat(self, n):
+        engine = self.engine
+        n = engine._check_retreat(n)
+        self._tables()
+        # la historia sólo cubre desde el origen: lo anterior se deshace sin ella y se reinicia al final.
+        # Sin mapa de visitas no hay historia que deshacer: se retrocede sin ella
+        counted = min(n, max(0, engine.steps - int(self.counters[ORIGIN])))
+        if self.visits is None:
+            counted = 0
+        self._run(engine.retreat, self.backward, counted)
+        if n > counted:
+            self._run(engine.retreat, lambda *block: self.backward(*block, history=False), n - counted)
+            self.restart()
+
+    def _run(self, move, record, n):
+        # mueve el motor por bloques anotando las transiciones en self.log y resume cada bloque
+        engine = self.engine
+        done = 0
+        while done < n:
+            m = min(STATS_CHUNK, n - done)
+            x0, y0, d0 = engine.ant_x, engine.ant_y, engine.ant_dir
+            engine.read_log = self.log
+            try:
+                move(m)
+            finally:
+                engine.read_log = None
+            keys = record(x0, y0, d0, np.frombuffer(self.log, dtype=np.uint8, count=m))
+            if engine.dirty is not None:
+                engine.dirty.extend(keys.tolist())
+            done += m
+
+    def forward(self, x0, y0, d0, ks):
+        # bloque de pasos hacia delante desde (x0, y0, d0) con transiciones ks; devuelve las claves
+        # planas de las celdas visitadas (las mismas que el registro de celdas sucias)
+        self._tables()
+        c = self.counters
+        moves = np.cumsum(self.turn[ks], dtype=np.int64)
+        moves += d0
+        moves &= 3
+        xs, ys = self._walk(x0, y0, _DX[moves[:-1]], _DY[moves[:-1]], first=True)
+        c[POP] += int(np.bincount(ks, minlength=len(self.turn)) @ self.pop_delta)
+        c[DIRS] += np.bincount(moves, minlength=4)
+        c[X0] = min(c[X0], xs.min())
+        c[Y0] = min(c[Y0], ys.min())
+        c[X1] = max(c[X1], xs.max() + 1)
+        c[Y1] = max(c[Y1], ys.max() + 1)
+        keys = ys * self.engine.width + xs
+        self._visit(keys, 1)
+        return keys
+
+    def backward(self, x0, y0, d0, js, history=True):
+        # bloque de pasos deshechos (engine.retreat) con las transiciones inversas js; sin history
+        # sólo se actualiza la población (pasos anteriores al origen)
+        self._tables()
+        c = self.counters
+        moves = np.empty(len(js), dtype=np.int64)
+        moves[0] = 0
+        np.cumsum(self.back_turn[js[:-1]], out=moves[1:])
+        moves += d0
+        moves &= 3
+        xs, ys = self._walk(x0, y0, -_DX[moves], -_DY[moves], first=False)
+        c[POP] += int(np.bincount(js, minlength=len(self.back_turn)) @ self.back_pop)
+        keys = ys * self.engine.width + xs
+        if history:
+            c[DIRS] -= np.bincount(moves, minlength=4)
+            c[BOX_STALE] = 1  # la caja no se puede encoger sin mirar el mapa
+            self._visit(keys, -1)
+        return keys
+
+    def _walk(self, x0, y0, dx, dy, first):
+        # posiciones acumulando desplazamientos desde (x0, y0); con first la primera es (x0, y0)
+        engine = self.engine
+        m = len(dx) + first
+        xs = np.empty(m, dtype=np.int64)
+        ys = np.empty(m, dtype=np.int64)
+        np.cumsum(dx, out=xs[first:])
+        np.cumsum(dy, out=ys[first:])
+        if first:
+            xs[0] = ys[0] = 0
+        xs += x0
+        ys += y0
+        xs %= engine.width
+        ys %= engine.height
+        return xs, ys
+
+    def _visit(self, keys, sign):
+        if self.visits is None:
+            # sólo hacia delante (retreat no lleva historia): marca los bits de las celdas nuevas
+            width = self.engine.width
+            cells = np.unique(keys)
+            idx = cells // width * ((width + 7) >> 3) + (cells % width >> 3)
+            masks = (1 << (cells % width & 7)).astype(np.uint8)
+            self.counters[DISTINCT] += np.count_nonzero((self.seen[idx] & masks) == 0)
+            np.bitwise_or.at(self.seen, idx, masks)
+            return
+        flat = self.visits.reshape(-1)
+        cells, counts = np.unique(keys, return_counts=True)
+        counts = counts.astype(np.uint32)
+        if sign > 0:
+            self.counters[DISTINCT] += np.count_nonzero(flat[cells] == 0)
+            flat[cells] += counts
+        else:
+            flat[cells] -= counts
+            self.counters[DISTINCT] -= np.count_nonzero(flat[cells] == 0)
+
+    # ---------------- Ediciones ----------------
+    def edit(self, old, new):
+        # una celda cambia de color fuera del kernel (toggle_cell)
+        self.counters[POP] += (new != 0) - (old != 0)
+
+    def invalidate(self):
+        # edición masiva de celdas: la población se recontará al leerla
+        self.counters[POP_STALE] = 1
+
+    # ---------------- Consultas ----------------
+    def population(self):
+        c = self.counters
+        if c[POP_STALE]:
+            c[POP] = self.engine.population()
+            c[POP_STALE] = 0
+        return int(c[POP])
+
+    def distinct(self):
+        return int(self.counters[DISTINCT])
+
+    def bounding_box(self):
+        # (x0, y0, x1, y1) exclusivo de las celdas visitadas, o None
+        c = self.counters
+        if c[BOX_STALE]:
+            cols = np.flatnonzero(self.visits.any(axis=0))
+            rows = np.flatnonzero(self.visits.any(axis=1))
+            if len(rows):
+                c[X0], c[Y0], c[X1], c[Y1] = cols[0], rows[0], cols[-1] + 1, rows[-1] + 1
+            else:
+                c[X0], c[Y0], c[X1], c[Y1] = self.engine.width, self.engine.height, 0, 0
+            c[BOX_STALE] = 0
+        if c[X1] <= c[X0]:
+            return None
+        return int(c[X0]), int(c[Y0]), int(c[X1]), int(c[Y1])
+
+    def directions(self):
+        # pasos dados hacia N, E, S y O
+        return tuple(int(v) for v in self.counters[DIRS])
+
+    def summary(self):
+        return {
+            'population': self.population(),
+            'distinct': self.distinct(),
+            'bounding_box': self.bounding_box(),
+            'directions': dict(zip("NESO", self.directions())),
+        }
@@ -0,0 +1,163 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from .chunked import UnboundedEngine
+from .engine import GRID_H, GRID_W, LangtonEngine
+from .highway import DETECT_WINDOW, confirmation_step, trajectory_period
+
+# ---------------- Config ----------------
+SWEEP_CHUNK = 2048   # pasos entre comprobaciones de autopista
+DEFAULTS = {
+    'rule': "RL",
+    'width': GRID_W,
+    'height': GRID_H,
+    'unbounded': False,
+    'density': 0.0,
+    'noise_box': 20,
+    'seed': 0,
+    'max_steps': 100000,
+}
+
+
+# ---------------- Parámetros ----------------
+def expand_grid(spec):
+    # {'rule': ['RL', 'LLRR'], 'seed': [0, 1]} -> lista de combinaciones completas (con DEFAULTS)
+    spec = {k: (v if isinstance(v, (list, tuple)) else [v]) for k, v in spec.items()}
+    unknown = set(spec) - set(DEFAULTS)
+    if unknown:
+        raise ValueError(f"parámetros desconocidos: {sorted(unknown)}")
+    keys = sorted(spec)
+    runs = []
+    for values in itertools.product(*(spec[k] for k in keys)):
+        params = dict(DEFAULTS)
+        params.update(zip(keys, values))
+        runs.append(params)
+    return runs
+
+
+def run_key(params):
+    # identificador estable de una combinación, para saltar las ya hechas al repetir el barrido
+    return json.dumps(params, sort_keys=True)
+
+
+def load_done(path):
+    done = set()
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    done.add(run_key(json.loads(line)['params']))
+                except (ValueError, KeyError):
+                    continue  # línea truncada de una ejecución interrumpida
+    return done
+
+
+# ---------------- Una simulación ----------------
+def build_engine(params):
+    cls = UnboundedEngine if params['unbounded'] else LangtonEngine
+    engine = cls(params['width'], params['height'], rule=params['rule'])
+    if params['density'] > 0:
+        rng = np.random.default_rng(params['seed'])
+        box = params['noise_box']
+        x0, y0 = engine.ant_x - box // 2, engine.ant_y - box // 2
+        ys, xs = np.nonzero(rng.random((box, box)) < params['density'])
+        colors = rng.integers(1, engine.rule.n_colors, size=len(xs), dtype=np.uint8)
+        engine.scatter(xs + x0, ys + y0, colors)
+    return engine
+
+
+def run_one(params):
+    # mismo motor y mismas reglas que el visor; se detiene al confirmar la autopista o en max_steps
+    t0 = time.perf_counter()
+    engine = build_engine(params)
+    engine.enable_dirty_log()
+    engine.take_dirty()  # el ruido (scatter) marca dirty_all: sin esto se perdería el primer tramo
+    # la ventana de detección más el tramo desde la comprobación anterior: ahí empieza la racha periódica
+    # y steps_to_highway sale exacto, no redondeado a SWEEP_CHUNK
+    keep = DETECT_WINDOW + SWEEP_CHUNK
+    trail = []
+    highway = None
+    max_steps = int(params['max_steps'])
+    while engine.steps < max_steps:
+        engine.advance(min(SWEEP_CHUNK, max_steps - engine.steps))
+        trail.extend(engine.take_dirty() or [])
+        del trail[:-keep]
+        highway = trajectory_period(engine, trail)
+        if highway is not None:
+            break
+    return {
+        'params': params,
+        'steps_to_highway': confirmation_step(engine, trail, highway[0]) if highway else None,
+        'highway_period': highway[0] if highway else None,
+        'steps': engine.steps,
+        'population': engine.population(),
+        'bounding_box': engine.bounding_box(),
+        'wall_time': time.perf_counter() - t0,
+    }
+
+
+# ---------------- Barrido ----------------
+def run_sweep(spec, out_path, workers=None):
+    # reparte las combinaciones pendientes en un pool de procesos y escribe cada resultado
+    # (una línea JSON) en cuanto termina. Devuelve el número de ejecuciones nuevas.
+    done = load_done(out_path)
+    pending = [p for p in expand_grid(spec) if run_key(p) not in done]
+    if not pending:
+        return 0
+    with open(out_path, "a", encoding="utf-8") as out, \
+            ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [pool.submit(run_one, p) for p in pending]
+        for fut in as_completed(futures):
+            out.write(json.dumps(fut.result()) + "\n")
+            out.flush()
+    return len(pending)
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(prog="python -m langton.sweep",
+                                description="Barrido de parámetros en paralelo (resultados en JSON Lines)")
+    p.add_argument("--out", default="sweep.jsonl", help="fichero de resultados (se reanuda si existe)")
+    p.add_argument("--workers", type=int, default=None, help="procesos (por defecto todos los núcleos)")
+    p.add_argument("--spec", help="fichero JSON con {parámetro: [valores]}")
+    p.add_argument("--rule", nargs="+")
+    p.add_argument("--width", nargs="+", type=int)
+    p.add_argument("--height", nargs="+", type=int)
+    p.add_argument("--unbounded", action="store_true")
+    p.add_argument("--density", nargs="+", type=float)
+    p.add_argument("--noise-box", nargs="+", type=int)
+    p.add_argument("--seed", nargs="+", type=int)
+    p.add_argument("--max-steps", nargs="+", type=float)
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    spec = {}
+    if args.spec:
+        with open(args.spec, encoding="utf-8") as f:
+            spec.update(json.load(f))
+    for key in ('rule', 'width', 'height', 'density', 'noise_box', 'seed'):
+        if getattr(args, key) is not None:
+            spec[key] = getattr(args, key)
+    if args.max_steps is not None:
+        spec['max_steps'] = [int(v) for v in args.max_steps]
+    if args.unbounded:
+        spec['unbounded'] = True
+    t0 = time.perf_counter()
+    n = run_sweep(spec, args.out, args.workers)
+    print(f"{n} ejecuciones nuevas en {time.perf_counter() - t0:.2f} s -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+import json
+import struct
+import zlib
+
+import numpy as np
+
+from .colony import Colony
+from .engine import DX, DY
+
+# ---------------- Config ----------------
+TRACE_CHUNK = 1 << 16   # pasos por bloque (memoria acotada: unos pocos bytes por paso del bloque)
+ZLIB_LEVEL = 1          # compresión rápida: el coste debe quedar muy por debajo del de simular
+MAGIC = b"LANGTRJ1"
+FOOTER = b"LANGTIDX"
+CHUNK_HEADER = struct.Struct("<qqqII")   # paso inicial, x0, y0, pasos, bytes comprimidos
+
+RECORD = np.dtype([('step', '<i8'), ('x', '<i8'), ('y', '<i8'), ('dir', 'u1'), ('color', 'u1')])
+
+_DX = np.asarray(DX, dtype=np.int64)
+_DY = np.asarray(DY, dtype=np.int64)
+
+
+# ---------------- Captura ----------------
+def trace(engine, n_steps, chunk=TRACE_CHUNK):
+    # Generador: avanza el motor n_steps pasos y produce bloques RECORD (paso, x, y, dirección con la
+    # que la hormiga llega a la celda, color antes de escribir)
+    for step0, x0, y0, dirs, colors in _trace_raw(engine, n_steps, chunk):
+        xs, ys = _positions(x0, y0, dirs, engine.bounded, engine.width, engine.height)
+        yield _records(step0, xs, ys, dirs, colors)
+
+
+def _trace_raw(engine, n_steps, chunk):
+    # El kernel sólo anota la transición k = base + color de cada paso (read_log): el color es
+    # k % n_colors y, como los giros son relativos, la dirección de llegada a la celda t + 1 es
+    # (d_t + turn[k_t]) & 3, un cumsum. Las posiciones salen igual, acumulando los movimientos desde
+    # (x0, y0). Un byte por paso escrito por índice cuesta la mitad que un append en el kernel
+    if isinstance(engine, Colony):
+        raise ValueError("la trayectoria se registra para una sola hormiga (no para colonias)")
+    rule = engine.rule
+    if len(rule.write) > 256:
+        raise ValueError(f"la regla {rule.name} tiene demasiadas transiciones para anotarlas en un byte")
+    turn = np.asarray(rule.turn, dtype=np.uint8)
+    colour = (np.arange(len(rule.write)) % rule.n_colors).astype(np.uint8)
+    saved = engine.read_log
+    log = bytearray(min(chunk, n_steps))
+    done = 0
+    try:
+        while done < n_steps:
+            m = min(chunk, n_steps - done)
+            step0, x0, y0, d0 = engine.steps, engine.ant_x, engine.ant_y, engine.ant_dir
+            engine.read_log = log
+            engine.advance(m)
+            ks = np.frombuffer(log, dtype=np.uint8)[:m]
+            engine.read_log = saved
+            if engine.stats is not None:
+                engine.stats.forward(x0, y0, d0, ks)
+            dirs = np.empty(m, dtype=np.uint8)
+            dirs[0] = d0
+            np.cumsum(turn[ks[:-1]], out=dirs[1:])
+            dirs[1:] += d0
+            dirs &= 3
+            done += m
+            yield step0, x0, y0, dirs, colour[ks]
+    finally:
+        engine.read_log = saved
+        if engine.dirty is not None:
+            engine.dirty_all = True  # sin registro de celdas durante la captura: redibujar todo
+
+
+def _positions(x0, y0, dirs, bounded, width, height):
+    # la hormiga llega a la celda t moviéndose en la dirección registrada en t
+    m = len(dirs)
+    moves = dirs[1:]
+    xs = np.empty(m, dtype=np.int64)
+    ys = np.empty(m, dtype=np.int64)
+    xs[0], ys[0] = x0, y0
+    np.cumsum(_DX[moves], out=xs[1:])
+    np.cumsum(_DY[moves], out=ys[1:])
+    xs[1:] += x0
+    ys[1:] += y0
+    if bounded:
+        xs %= width
+        ys %= height
+    return xs, ys
+
+
+def _records(step0, xs, ys, dirs, colors):
+    block = np.empty(len(dirs), dtype=RECORD)
+    block['step'] = np.arange(step0, step0 + len(dirs))
+    block['x'], block['y'] = xs, ys
+    block['dir'], block['color'] = dirs, colors
+    return block
+
+
+# ---------------- Fichero ----------------
+# MAGIC | longitud (uint32) + cabecera JSON | bloques | índice | FOOTER + desplazamiento del índice.
+# Cada bloque es CHUNK_HEADER seguido de zlib(direcciones || colores): la posición se reconstruye
+# acumulando los movimientos desde (x0, y0), así que cuesta 2 bytes por paso antes de comprimir.
+# El índice (paso inicial y desplazamiento de cada bloque) permite saltar a un paso; si falta porque
+# la exportación se interrumpió, el lector recorre los bloques en orden igualmente.
+class TrajectoryWriter:
+    def __init__(self, path, engine):
+        self.f = open(path, "wb")
+        meta = {
+            'width': engine.width,
+            'height': engine.height,
+            'bounded': engine.bounded,
+            'rule': engine.rule.name,
+        }
+        raw = json.dumps(meta).encode("utf-8")
+        self.f.write(MAGIC)
+        self.f.write(struct.pack("<I", len(raw)))
+        self.f.write(raw)
+        self.index = []  # (paso inicial, desplazamiento)
+        self.steps = 0
+        self.raw_bytes = 0
+
+    def write(self, block):
+        # bloque RECORD (p. ej. de trace()); sólo se guardan la posición inicial, direcciones y colores
+        step0, x0, y0 = int(block['step'][0]), int(block['x'][0]), int(block['y'][0])
+        self.write_raw(step0, x0, y0, block['dir'], block['color'])
+
+    def write_raw(self, step0, x0, y0, dirs, colors):
+        payload = dirs.tobytes() + colors.tobytes()
+        data = zlib.compress(payload, ZLIB_LEVEL)
+        self.index.append((step0, self.f.tell()))
+        self.f.write(CHUNK_HEADER.pack(step0, x0, y0, len(dirs), len(data)))
+        self.f.write(data)
+        self.steps += len(dirs)
+        self.raw_bytes += len(payload)
+
+    def close(self):
+        if self.f.closed:
+            return
+        pos = self.f.tell()
+        self.f.write(np.asarray(self.index, dtype="<i8").reshape(-1, 2).tobytes())
+        self.f.write(FOOTER)
+        self.f.write(struct.pack("<Q", pos))
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def export_trajectory(engine, n_steps, path, chunk=TRACE_CHUNK):
+    # simula n_steps registrando la trayectoria en `path`; memoria acotada por el tamaño de bloque
+    with TrajectoryWriter(path, engine) as writer:
+        for step0, x0, y0, dirs, colors in _trace_raw(engine, n_steps, chunk):
+            writer.write_raw(step0, x0, y0, dirs, colors)
+    return writer
+
+
+class TrajectoryReader:
+    # lectura perezosa: cada iteración descomprime un solo bloque
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path}: no es una trayectoria de la hormiga de Langton")
+            (n,) = struct.unpack("<I", f.read(4))
+            self.meta = json.loads(f.read(n).decode("utf-8"))
+            self.data_offset = f.tell()
+            self.index = self._read_index(f)
+
+    def _read_index(self, f):
+        tail = len(FOOTER) + 8
+        f.seek(0, 2)
+        end = f.tell()
+        if end - self.data_offset < tail:
+            return None
+        f.seek(end - tail)
+        footer = f.read(tail)
+        if footer[:len(FOOTER)] != FOOTER:
+            return None  # exportación interrumpida: sin índice
+        (pos,) = struct.unpack("<Q", footer[len(FOOTER):])
+        f.seek(pos)
+        index = np.frombuffer(f.read(end - tail - pos), dtype="<i8").reshape(-1, 2)
+        self.end_offset = pos
+        return index
+
+    def __iter__(self):
+        return self.chunks()
+
+    def chunks(self, start_step=None):
+        # bloques RECORD en orden; con start_step empieza en el bloque que contiene ese paso
+        offset = self.data_offset
+        if start_step is not None and self.index is not None and len(self.index):
+            n = max(0, int(np.searchsorted(self.index[:, 0], start_step, side="right")) - 1)
+            offset = int(self.index[n, 1])
+        end = self.end_offset if self.index is not None else None
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            while end is None or f.tell() < end:
+                head = f.read(CHUNK_HEADER.size)
+                if len(head) < CHUNK_HEADER.size:
+                    break
+                step0, x0, y0, m, size = CHUNK_HEADER.unpack(head)
+                data = f.read(size)
+                if len(data) < size:
+                    break  # bloque truncado
+                yield self._decode(step0, x0, y0, m, zlib.decompress(data))
+
+    def _decode(self, step0, x0, y0, m, payload):
+        planes = np.frombuffer(payload, dtype=np.uint8)
+        dirs, colors = planes[:m], planes[m:]
+        meta = self.meta
+        xs, ys = _positions(x0, y0, dirs, meta['bounded'], meta['width'], meta['height'])
+        return _records(step0, xs, ys, dirs, colors)
+
+    def __len__(self):
+        if self.index is None:
+            return sum(len(b) for b in self.chunks())
+        with open(self.path, "rb") as f:
+            if not len(self.index):
+                return 0
+            f.seek(int(self.index[-1, 1]))
+            step0, _, _, m, _ = CHUNK_HEADER.unpack(f.read(CHUNK_HEADER.size))
+        return step0 + m - int(self.index[0, 0])
@@ -0,0 +1,263 @@
+import atexit
+import multiprocessing as mp
+import queue
+import signal
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .bitpacked import BitPackedEngine
+from .engine import LangtonEngine
+
+# ---------------- Config ----------------
+BATCH = 2048            # pasos por lote en el proceso de simulación (el cerrojo se suelta entre lotes)
+DIRTY_CAP = 1 << 15     # últimas celdas sucias que guarda el anillo compartido
+REPLY_TIMEOUT = 10.0    # segundos máximos esperando a que el proceso confirme una pausa
+# cabecera compartida (int64): estado de la hormiga publicado tras cada lote, si el proceso sigue
+# simulando, cuántas celdas sucias se han anotado desde la última lectura y el rectángulo
+# (x0, y0, x1, y1) que cubre las que no cupieron en el anillo
+STATE = ("steps", "ant_x", "ant_y", "ant_dir", "ant_state", "running", "dirty_total",
+         "lost_x0", "lost_y0", "lost_x1", "lost_y1")
+RUNNING = STATE.index("running")
+DIRTY_TOTAL = STATE.index("dirty_total")
+LOST = slice(STATE.index("lost_x0"), len(STATE))
+KINDS = {'grid': LangtonEngine, 'bitpacked': BitPackedEngine}
+
+
+# ---------------- Memoria compartida ----------------
+# cabecera | anillo de DIRTY_CAP claves sucias (int64) | métricas (stats.RunStats, si están activas) |
+# celdas del motor (mismo formato que _cells)
+def _views(buf, n_stats, n_cells):
+    head = np.frombuffer(buf, dtype=np.int64, count=len(STATE))
+    ring = np.frombuffer(buf, dtype=np.int64, count=DIRTY_CAP, offset=8 * len(STATE))
+    offset = 8 * (len(STATE) + DIRTY_CAP)
+    return head, ring, buf[offset:offset + n_stats], buf[offset + n_stats:offset + n_stats + n_cells]
+
+
+def worker_kind(engine):
+    # sólo rejillas fijas de una hormiga: su estado completo son las celdas y cinco enteros
+    for kind, cls in KINDS.items():
+        if type(engine) is cls:
+            return kind
+    return None
+
+
+def _state(engine):
+    return engine.steps, engine.ant_x, engine.ant_y, engine.ant_dir, engine.ant_state
+
+
+def _no_rect(engine):
+    # rectángulo vacío (x1 <= x0) que cualquier celda amplía
+    return engine.width, engine.height, 0, 0
+
+
+def merge_rect(a, b):
+    # menor rectángulo (x0, y0, x1, y1) que contiene a los dos; None = vacío
+    if a is None or b is None:
+        return b if a is None else a
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+
+def _publish(engine, head, ring):
+    # con el cerrojo tomado: estado de la hormiga y celdas sucias del lote (el anillo conserva las
+    # DIRTY_CAP últimas; dirty_total cuenta también las que se han perdido, y las perdidas amplían el
+    # rectángulo LOST de la cabecera)
+    head[:RUNNING] = _state(engine)
+    log = engine.take_dirty()
+    if log:
+        total = int(head[DIRTY_TOTAL])
+        # la entrada j (desde la última lectura) va a la casilla j % DIRTY_CAP: tras este lote se pierden
+        # las j < total + len(log) - DIRTY_CAP, unas aún sin leer en el anillo y otras del principio del lote
+        cut = total + len(log) - DIRTY_CAP
+        if cut > 0:
+            old = np.arange(max(0, total - DIRTY_CAP), min(total, cut)) % DIRTY_CAP
+            lost = np.concatenate((ring[old], np.asarray(log[:max(0, cut - total)], dtype=np.int64)))
+            if len(lost):
+                xs, ys = engine.dirty_coords(lost)
+                head[LOST] = merge_rect(tuple(head[LOST]),
+                                        (xs.min(), ys.min(), xs.max() + 1, ys.max() + 1))
+        keys = np.asarray(log[-DIRTY_CAP:], dtype=np.int64)
+        start = total + len(log) - len(keys)
+        ring[(start + np.arange(len(keys))) % DIRTY_CAP] = keys
+        head[DIRTY_TOTAL] = total + len(log)
+
+
+def _serve(name, kind, width, height, rule, n_stats, n_cells, lock, commands, replies):
+    # bucle del proceso de simulación: espera órdenes en pausa y, en marcha, avanza por lotes de BATCH
+    # pasos mirando la cola entre lote y lote
+    # con fork el proceso hereda los manejadores de SDL, que convierten SIGTERM en un evento QUIT:
+    # terminate() no lo pararía. Ctrl+C lo atiende el visor, que cierra este proceso
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    shm = shared_memory.SharedMemory(name=name)
+    head, ring, stats, cells = _views(shm.buf, n_stats, n_cells)
+    engine = KINDS[kind](width, height, rule=rule)
+    engine.attach_cells(cells)
+    engine.enable_dirty_log()
+    if n_stats:
+        engine.enable_stats(stats)  # las mismas métricas que lee el visor, ya inicializadas
+    running = reverse = False
+    while True:
+        try:
+            cmd = commands.get(block=not running)
+        except queue.Empty:
+            cmd = None
+        if cmd is not None:
+            op = cmd[0]
+            if op == "play":
+                _, state, reverse = cmd
+                engine.steps, engine.ant_x, engine.ant_y, engine.ant_dir, engine.ant_state = state
+                if engine.stats is not None:
+                    # recuento pendiente (POP_STALE) ahora, con la rejilla quieta: si lo hiciera el visor
+                    # a mitad de lote contaría celdas de un paso y sumaría encima el delta del lote
+                    engine.stats.population()
+                running = True
+            elif op == "pause":
+                running = False
+                with lock:
+                    _publish(engine, head, ring)
+                    head[RUNNING] = 0
+                replies.put(op)
+            elif op == "quit":
+                break
+            continue
+        with lock:
+            if reverse:
+                engine.retreat(min(BATCH, engine.steps))
+                running = engine.steps > 0  # hacia atrás se detiene en el paso 0
+            else:
+                engine.advance(BATCH)
+            _publish(engine, head, ring)
+            head[RUNNING] = running
+    engine.stats = None  # rompe el ciclo motor <-> RunStats: sin vistas vivas se puede cerrar la memoria
+    del head, ring, stats, cells, engine
+    shm.close()
+
+
+# ---------------- Lado del visor ----------------
+class SimWorker:
+    # Simulación en otro proceso sobre una rejilla en memoria compartida: el motor del visor pasa a
+    # usar esas mismas celdas (attach_cells), así que el dibujo las lee sin copiarlas. Mientras el
+    # proceso está en marcha (play) es el dueño del estado de la hormiga y el visor sólo lo lee con
+    # sync(); pause() se lo devuelve, y a partir de ahí el visor puede volver a editar, avanzar o
+    # guardar el motor con normalidad. Cada lote de pasos y su publicación van bajo un cerrojo:
+    # sync() ve siempre el estado al final de un lote. Las celdas que cambian después se anotan en
+    # el anillo y se repintan en el siguiente sync(), así el canvas acaba siempre al día; si entre dos
+    # sync() cambian más de DIRTY_CAP, de las más antiguas sólo queda el rectángulo que las cubre
+    # (take_lost), que el visor vuelve a leer entero. Si el motor
+    # tiene métricas (enable_stats) también pasan a la memoria compartida y las actualiza quien mueva
+    # a la hormiga: el visor las lee cuando quiera sin esperar al cerrojo
+    def __init__(self, engine):
+        kind = worker_kind(engine)
+        if kind is None:
+            raise ValueError(f"el proceso de simulación no admite {type(engine).__name__}")
+        n_cells = len(engine._cells)
+        n_stats = len(engine.stats.buf) if engine.stats is not None else 0  # con o sin mapa de visitas
+        self.shm = shared_memory.SharedMemory(create=True,
+                                              size=8 * (len(STATE) + DIRTY_CAP) + n_stats + n_cells)
+        self.head, self.ring, self.stats, self.cells = _views(self.shm.buf, n_stats, n_cells)
+        self.cells[:] = engine._cells
+        self.head[:] = 0
+        self.head[LOST] = _no_rect(engine)
+        engine.attach_cells(self.cells)
+        if n_stats:
+            self.stats[:] = engine.stats.buf
+            engine.stats.attach(self.stats)
+        self.engine = engine
+        ctx = mp.get_context()
+        self.lock = ctx.Lock()
+        self.commands = ctx.Queue()
+        self.replies = ctx.Queue()
+        self.process = ctx.Process(target=_serve, name="langton-sim", daemon=True,
+                                   args=(self.shm.name, kind, engine.width, engine.height, engine.rule,
+                                         n_stats, n_cells, self.lock, self.commands, self.replies))
+        self.process.start()
+        self.playing = False
+        self.reverse = False
+        self.lost = 0  # celdas sucias que no cupieron en el anillo en el último sync()
+        self.lost_rect = None  # rectángulo que las cubre, acumulado hasta take_lost()
+        atexit.register(self.close)  # liberar la memoria compartida aunque el visor no llame a close()
+
+    @staticmethod
+    def supports(engine):
+        return worker_kind(engine) is not None
+
+    def play(self, reverse=False):
+        if self.playing and reverse == self.reverse:
+            return
+        self.pause()
+        state = _state(self.engine)
+        with self.lock:
+            # el visor puede haber editado o avanzado el motor en pausa: hasta que el proceso lea la
+            # orden, sync() debe ver este estado (y en marcha), no el de la última pausa
+            self.head[:RUNNING] = state
+            self.head[RUNNING] = 1
+        self.commands.put(("play", state, reverse))
+        self.playing = True
+        self.reverse = reverse
+
+    def pause(self):
+        # espera a que el proceso pare y recoge su estado final: el motor vuelve a ser del visor
+        if not self.playing:
+            return
+        self.commands.put(("pause",))
+        try:
+            self.replies.get(timeout=REPLY_TIMEOUT)
+        except queue.Empty:
+            raise RuntimeError("el proceso de simulación no responde") from None
+        self.sync()
+        self.playing = False
+
+    def sync(self):
+        # copia el último estado publicado al motor del visor y le pasa las celdas sucias que guarda el
+        # anillo (las últimas, siempre válidas); las que no cupieron sólo se conocen por el rectángulo que
+        # las cubre (take_lost). Devuelve False si el proceso se ha detenido solo (retroceso hasta el
+        # paso 0)
+        engine = self.engine
+        with self.lock:
+            head = self.head
+            engine.steps, engine.ant_x, engine.ant_y, engine.ant_dir, engine.ant_state = (
+                int(v) for v in head[:RUNNING])
+            total = int(head[DIRTY_TOTAL])
+            if total <= DIRTY_CAP:
+                keys = self.ring[:total].tolist()
+            else:
+                p = total % DIRTY_CAP
+                keys = np.concatenate((self.ring[p:], self.ring[:p])).tolist()
+            head[DIRTY_TOTAL] = 0
+            running = bool(head[RUNNING])
+            lost = tuple(int(v) for v in head[LOST])
+            head[LOST] = _no_rect(engine)
+        self.lost = total - len(keys)
+        if self.lost:
+            self.lost_rect = merge_rect(self.lost_rect, lost)
+        if engine.dirty is not None:
+            engine.dirty.extend(keys)
+        if self.playing and not running:
+            self.playing = False
+        return running
+
+    def take_lost(self):
+        # rectángulo (x0, y0, x1, y1) con las celdas sucias que no cupieron en el anillo desde la última
+        # llamada, o None; sigue disponible tras close() (que sincroniza por última vez)
+        rect, self.lost_rect = self.lost_rect, None
+        return rect
+
+    def close(self):
+        # para el proceso y devuelve al motor una copia privada de las celdas antes de liberar la memoria
+        if self.shm is None:
+            return
+        atexit.unregister(self.close)
+        if self.process.is_alive():
+            self.pause()
+            self.commands.put(("quit",))
+            self.process.join(REPLY_TIMEOUT)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.engine.attach_cells(bytearray(self.cells))
+        if self.engine.stats is not None and self.engine.stats.buf is self.stats:
+            self.engine.stats.attach(bytearray(self.stats))
+        del self.head, self.ring, self.stats, self.cells
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = None
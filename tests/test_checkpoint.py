@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from langton import Colony, LangtonEngine, UnboundedEngine
+from langton.bitpacked import BitPackedEngine
+from langton.checkpoint import load, save
+
+
+def state(engine):
+    ants = tuple(tuple(a.tolist()) for a in engine.ants())  # todas las hormigas de una colonia
+    return engine.steps, engine.ant_x, engine.ant_y, engine.ant_dir, engine.ant_state, ants
+
+
+def cells(engine):
+    if engine.bounded:
+        return engine.region(0, 0, engine.width, engine.height)
+    return engine.region(*engine.bounding_box())
+
+
+def make(kind, rule):
+    if kind == 'colony':
+        engine = Colony(203, 101, rule=rule, n_ants=5, seed=3)
+    else:
+        cls = {'grid': LangtonEngine, 'bitpacked': BitPackedEngine, 'unbounded': UnboundedEngine}[kind]
+        engine = cls(203, 101, rule=rule)
+    engine.advance(30000)
+    return engine
+
+
+# ---------------- Guardar y cargar ----------------
+@pytest.mark.parametrize("use_mmap", [True, False])
+@pytest.mark.parametrize("kind, rule", [('grid', "RL"), ('grid', "LLRR"), ('bitpacked', "RL"),
+                                        ('unbounded', "RL"), ('unbounded', "RLR"), ('colony', "RL")])
+def test_load_matches_saved_engine(tmp_path, kind, rule, use_mmap):
+    engine = make(kind, rule)
+    path = save(engine, str(tmp_path / "ck.lck"))
+    loaded = load(path, use_mmap=use_mmap)
+    assert type(loaded) is type(engine)
+    assert state(loaded) == state(engine)
+    np.testing.assert_array_equal(cells(loaded), cells(engine))
+    # y sigue igual al avanzar los dos
+    engine.advance(5000)
+    loaded.advance(5000)
+    assert state(loaded) == state(engine)
+    np.testing.assert_array_equal(cells(loaded), cells(engine))
+
+
+@pytest.mark.parametrize("kind", ['grid', 'bitpacked'])
+def test_load_as_other_storage(tmp_path, kind):
+    engine = make('grid', "RL")
+    loaded = load(save(engine, str(tmp_path / "ck.lck")), kind=kind)
+    assert state(loaded) == state(engine)
+    np.testing.assert_array_equal(cells(loaded), cells(engine))
+
+
+def test_unbounded_tiles_load_lazily(tmp_path):
+    engine = make('unbounded', "RL")
+    engine.advance(100000)  # la autopista deja teselas atrás que no se vuelven a tocar
+    path = save(engine, str(tmp_path / "ck.lck"))
+    loaded = load(path)
+    n_tiles = len(engine.world.tiles)
+    assert not loaded.world.tiles and len(loaded.world.pending) == n_tiles
+    assert loaded.population() == engine.population()
+    assert loaded.bounding_box() == engine.bounding_box()
+    loaded.advance(1000)
+    assert 0 < len(loaded.world.tiles) < n_tiles
+    # guardar con teselas aún pendientes conserva todas
+    again = load(save(loaded, str(tmp_path / "ck2.lck")), use_mmap=False)
+    engine.advance(1000)
+    assert state(again) == state(engine)
+    assert not again.world.pending and len(again.world.tiles) == n_tiles
+    np.testing.assert_array_equal(cells(again), cells(engine))
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from langton import LangtonEngine, UnboundedEngine
+
+STEPS = [12000, 200000, 400003]
+
+
+def state(engine):
+    return engine.steps, engine.ant_x, engine.ant_y, engine.ant_dir, engine.ant_state
+
+
+def make(cls, seed):
+    # ruido alrededor de la hormiga: la autopista sale de un transitorio distinto en cada semilla
+    engine = cls(600, 600)
+    rng = np.random.default_rng(seed)
+    xs, ys = rng.integers(280, 320, 300), rng.integers(280, 320, 300)
+    engine.scatter(xs, ys, 1)
+    return engine
+
+
+# ---------------- Avance con salto de autopista ----------------
+@pytest.mark.parametrize("n", STEPS)
+@pytest.mark.parametrize("seed", [0, 1])
+@pytest.mark.parametrize("cls", [LangtonEngine, UnboundedEngine])
+def test_fast_forward_matches_plain_run(cls, seed, n):
+    plain, fast = make(cls, seed), make(cls, seed)
+    plain.run(n)
+    fast.run(n, fast_forward=True)
+    assert state(fast) == state(plain)
+    if cls is LangtonEngine:
+        np.testing.assert_array_equal(fast.grid, plain.grid)
+    else:
+        box = plain.world.bounding_box()
+        assert fast.world.bounding_box() == box
+        np.testing.assert_array_equal(fast.region(*box), plain.region(*box))
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from langton import LangtonEngine, lod
+from langton.bitpacked import BitPackedEngine
+from langton.lod import DensityPyramid
+
+SIZES = [(301, 157), (256, 256), (1001, 3), (13, 77)]
+
+
+def reference_level(values, level):
+    # suma por bloques 2^level x 2^level con reshape, rellenando con ceros los bordes que no completan
+    f = 1 << level
+    h, w = values.shape
+    values = np.pad(values.astype(np.int64), ((0, -h % f), (0, -w % f)))
+    return values.reshape(values.shape[0] // f, f, values.shape[1] // f, f).sum(axis=(1, 3))
+
+
+def assert_levels(pyramid, values):
+    for k in range(1, pyramid.max_level + 1):
+        assert pyramid.levels[k].dtype == pyramid.dtypes[k]
+        np.testing.assert_array_equal(pyramid.levels[k], reference_level(values, k))
+
+
+def random_engine(cls, width, height, rng):
+    engine = cls(width, height)
+    n = width * height // 3
+    engine.scatter(rng.integers(0, width, n), rng.integers(0, height, n), 1)
+    engine.enable_dirty_log()
+    engine.take_dirty()
+    return engine
+
+
+# ---------------- Construcción y actualización ----------------
+@pytest.fixture(autouse=True)
+def small_bands(monkeypatch):
+    # bandas de pocas filas para que la construcción cruce varias
+    monkeypatch.setattr(lod, "LOD_BAND", 7)
+
+
+@pytest.mark.parametrize("cls", [LangtonEngine, BitPackedEngine])
+@pytest.mark.parametrize("width,height", SIZES)
+def test_build_matches_reshape_sum(cls, width, height):
+    engine = random_engine(cls, width, height, np.random.default_rng(width * height))
+    pyramid = DensityPyramid(engine)
+    pyramid.build()
+    assert_levels(pyramid, engine.region(0, 0, width, height) != 0)
+
+
+@pytest.mark.parametrize("cls", [LangtonEngine, BitPackedEngine])
+@pytest.mark.parametrize("width,height", SIZES)
+def test_updates_match_rebuild(cls, width, height):
+    rng = np.random.default_rng(width + height)
+    engine = random_engine(cls, width, height, rng)
+    pyramid = DensityPyramid(engine)
+    pyramid.build()
+    engine.advance(3000)
+    pyramid.update(*engine.dirty_coords(engine.take_dirty()))
+    assert_levels(pyramid, engine.region(0, 0, width, height) != 0)
+    for _ in range(10):
+        x0, y0 = rng.integers(0, width), rng.integers(0, height)
+        x1, y1 = rng.integers(x0, width + 1), rng.integers(y0, height + 1)
+        xs, ys = np.meshgrid(np.arange(x0, x1), np.arange(y0, y1))
+        engine.scatter(xs.ravel(), ys.ravel(), rng.integers(0, 2, xs.size))
+        pyramid.update_rect(x0, y0, x1, y1)
+    assert_levels(pyramid, engine.region(0, 0, width, height) != 0)
+
+
+def test_visits_source():
+    engine = LangtonEngine(301, 157, rule="LLRR")
+    engine.enable_stats()
+    engine.advance(20000)
+    pyramid = DensityPyramid(engine, "visits")
+    pyramid.build()
+    assert_levels(pyramid, engine.stats.visits)
+
+
+def test_count_dtypes():
+    # el menor entero que cabe 4^k: uint8 hasta bloques de 8 x 8, uint16 hasta 128 x 128
+    assert [lod.count_dtype(k) for k in (1, 3, 4, 7, 8, 16)] == [np.uint8, np.uint8, np.uint16, np.uint16,
+                                                                 np.uint32, np.uint64]
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from langton import Colony, LangtonEngine, UnboundedEngine
+from langton.bitpacked import BitPackedEngine
+
+ENGINES = {
+    'grid': lambda rule: LangtonEngine(97, 61, rule=rule),
+    'bitpacked': lambda rule: BitPackedEngine(97, 61, rule=rule),
+    'unbounded': lambda rule: UnboundedEngine(97, 61, rule=rule),
+    'colony': lambda rule: Colony(97, 61, rule=rule, n_ants=4, seed=5),
+}
+CASES = [('grid', "RL"), ('grid', "LLRR"), ('grid', "{{{1,2,0},{0,8,0}}}"), ('bitpacked', "RL"),
+         ('unbounded', "RL"), ('unbounded', "RLR"), ('colony', "RL")]
+
+
+def snapshot(engine):
+    ants = tuple(tuple(a.tolist()) for a in engine.ants())
+    state = (engine.steps, engine.ant_x, engine.ant_y, engine.ant_dir, engine.ant_state, ants)
+    if engine.bounded:
+        return state, engine.region(0, 0, engine.width, engine.height)
+    return state, engine.region(-300, -300, 400, 400)
+
+
+def noisy(kind, rule):
+    engine = ENGINES[kind](rule)
+    rng = np.random.default_rng(7)
+    engine.scatter(rng.integers(20, 70, 800), rng.integers(10, 50, 800), 1)
+    return engine
+
+
+# ---------------- Retroceso ----------------
+@pytest.mark.parametrize("kind, rule", CASES)
+def test_advance_then_retreat_restores_grid(kind, rule):
+    engine = noisy(kind, rule)
+    engine.advance(1000)
+    before = snapshot(engine)
+    engine.advance(20000)
+    for n in (7, 5000, 14993):
+        engine.retreat(n)
+    after = snapshot(engine)
+    assert after[0] == before[0]
+    np.testing.assert_array_equal(after[1], before[1])
+
+
+@pytest.mark.parametrize("kind, rule", CASES)
+def test_retreat_stops_at_step_zero(kind, rule):
+    engine = noisy(kind, rule)
+    start = snapshot(engine)
+    engine.advance(3000)
+    engine.retreat(10 ** 6)
+    after = snapshot(engine)
+    assert after[0] == start[0]
+    np.testing.assert_array_equal(after[1], start[1])
+
+
+@pytest.mark.parametrize("kind", ['grid', 'bitpacked'])
+def test_retreat_with_stats_and_dirty_log(kind):
+    # los mismos pasos por RunStats y con registro de celdas sucias
+    engine = noisy(kind, "RL")
+    engine.enable_stats()
+    engine.enable_dirty_log()
+    before = snapshot(engine)
+    engine.advance(9000)
+    engine.retreat(9000)
+    after = snapshot(engine)
+    assert after[0] == before[0]
+    np.testing.assert_array_equal(after[1], before[1])
+    assert engine.stats.population() == engine.population()
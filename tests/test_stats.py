@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from langton import LangtonEngine, stats
+from langton.bitpacked import BitPackedEngine
+
+ENGINES = [LangtonEngine, BitPackedEngine]
+WIDTH, HEIGHT = 61, 47
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    # bloques cortos para que cada avance cruce varios
+    monkeypatch.setattr(stats, "STATS_CHUNK", 500)
+
+
+def random_engine(cls, seed):
+    engine = cls(WIDTH, HEIGHT)
+    rng = np.random.default_rng(seed)
+    n = WIDTH * HEIGHT // 4
+    engine.scatter(rng.integers(0, WIDTH, n), rng.integers(0, HEIGHT, n), 1)
+    return engine
+
+
+def brute_force(cls, seed, n):
+    # las mismas métricas paso a paso sobre un motor sin estadísticas
+    engine = random_engine(cls, seed)
+    visits = np.zeros((HEIGHT, WIDTH), dtype=np.int64)
+    directions = [0] * 4
+    for _ in range(n):
+        visits[engine.ant_y, engine.ant_x] += 1
+        engine.step()
+        directions[engine.ant_dir] += 1
+    rows, cols = np.flatnonzero(visits.any(axis=1)), np.flatnonzero(visits.any(axis=0))
+    box = (int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1) if len(rows) else None
+    return engine, visits, tuple(directions), box
+
+
+def assert_matches(engine, reference):
+    ref_engine, visits, directions, box = reference
+    st = engine.stats
+    assert st.population() == ref_engine.population()
+    assert st.distinct() == np.count_nonzero(visits)
+    assert st.bounding_box() == box
+    assert st.directions() == directions
+    if st.visits is not None:
+        np.testing.assert_array_equal(st.visits, visits)
+
+
+# ---------------- Avance ----------------
+@pytest.mark.parametrize("heatmap", [True, False])
+@pytest.mark.parametrize("cls", ENGINES)
+def test_advance_matches_brute_force(cls, heatmap):
+    engine = random_engine(cls, 1)
+    engine.enable_stats(heatmap=heatmap)
+    assert (engine.stats.visits is not None) == heatmap
+    for n in (1, 777, 2222):
+        engine.advance(n)
+    assert_matches(engine, brute_force(cls, 1, 3000))
+
+
+@pytest.mark.parametrize("heatmap", [True, False])
+@pytest.mark.parametrize("cls", ENGINES)
+def test_retreat_matches_brute_force(cls, heatmap):
+    engine = random_engine(cls, 2)
+    engine.enable_stats(heatmap=heatmap)
+    engine.advance(5000)
+    engine.retreat(1800)
+    if heatmap:
+        assert_matches(engine, brute_force(cls, 2, 3200))
+    else:
+        # sin mapa de visitas no hay historia que deshacer: se reinicia en el paso actual
+        ref_engine = brute_force(cls, 2, 3200)[0]
+        assert engine.stats.population() == ref_engine.population()
+        assert engine.stats.distinct() == 0 and engine.stats.bounding_box() is None
+        assert int(engine.stats.counters[stats.ORIGIN]) == engine.steps == 3200
+
+
+def test_heatmap_gated_by_size(monkeypatch):
+    monkeypatch.setattr(stats, "HEATMAP_MAX_CELLS", WIDTH * HEIGHT - 1)
+    engine = random_engine(BitPackedEngine, 3)
+    assert engine.enable_stats().visits is None
+    assert len(engine.stats.buf) == stats.stats_nbytes(WIDTH, HEIGHT, heatmap=False)
+    with pytest.raises(ValueError):
+        engine.enable_stats(heatmap=True)
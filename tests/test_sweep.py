@@ -0,0 +1,30 @@
+import pytest
+
+from langton.highway import confirmation_step, trajectory_period
+from langton.sweep import DEFAULTS, build_engine, run_one
+
+
+# ---------------- Paso de confirmación ----------------
+@pytest.mark.parametrize("seed", range(8))
+def test_steps_to_highway_matches_single_run(seed):
+    # con ruido la autopista suele empezar dentro del primer SWEEP_CHUNK: el barrido debe fecharla igual
+    # que una única ejecución que conserva la trayectoria entera desde el paso 0
+    params = dict(DEFAULTS, density=0.3, noise_box=10, seed=seed, max_steps=30000)
+    result = run_one(params)
+    assert result['steps_to_highway'] is not None
+
+    engine = build_engine(params)
+    engine.enable_dirty_log()
+    engine.take_dirty()
+    engine.advance(result['steps'])
+    log = engine.take_dirty()
+    period, _ = trajectory_period(engine, log)
+    assert result['highway_period'] == period
+    assert result['steps_to_highway'] == confirmation_step(engine, log, period)
+
+
+def test_empty_grid_highway_step():
+    # hormiga clásica sobre rejilla vacía: la autopista de periodo 104 se confirma en el paso 10495
+    result = run_one(dict(DEFAULTS, width=400, height=400, max_steps=20000))
+    assert result['highway_period'] == 104
+    assert result['steps_to_highway'] == 10495
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from langton import LangtonEngine, UnboundedEngine
+
+
+@pytest.mark.parametrize("rule", ["RL", "LLRR"])
+@pytest.mark.parametrize("move", ["advance", "retreat"])
+def test_read_log_matches_byte_engine(rule, move):
+    # rejilla fija holgada (la hormiga no llega al borde): las mismas transiciones que el mundo sin
+    # bordes, que cruza varias teselas
+    n = 12000
+    engines = [LangtonEngine(1024, 1024, rule=rule), UnboundedEngine(1024, 1024, rule=rule)]
+    logs = []
+    for engine in engines:
+        engine.advance(n)
+        engine.read_log = log = bytearray(n)
+        getattr(engine, move)(n)
+        engine.read_log = None
+        logs.append(np.frombuffer(log, dtype=np.uint8))
+    np.testing.assert_array_equal(logs[0], logs[1])
+    a, b = engines
+    assert (a.steps, a.ant_x, a.ant_y, a.ant_dir, a.ant_state) == (b.steps, b.ant_x, b.ant_y, b.ant_dir,
+                                                                   b.ant_state)
+    np.testing.assert_array_equal(a.region(0, 0, 1024, 1024), b.region(0, 0, 1024, 1024))